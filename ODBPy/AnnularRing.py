@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Annular ring check of drill hits against the pads of the copper layers they span
+"""
+from collections import namedtuple
+import numpy as np
+from .DrillHits import read_drill_hits
+from .FeatureArrays import parse_feature_arrays
+from .Geometry import pad_shapes, distance_inside
+from .Layers import LayerType, read_layer_features
+from .SpatialIndex import GridIndex
+from .Structures import Polarity
+
+__all__ = ["AnnularRing", "annular_rings", "read_annular_rings"]
+
+class AnnularRing(namedtuple("AnnularRing", ["drill", "layer", "pad", "ring"])):
+    """
+    One row per (drill hit, spanned copper layer):
+    drill = drill hit index
+    layer = copper layer position (see StackupIndex.copper_layers)
+    pad = pad index in the copper layer features or -1 if no pad covers the hole
+    ring = minimum annular ring in coordinate units (NaN for missing pads
+        and for pads without a simple shape)
+    """
+    def __len__(self):
+        return len(self.drill)
+
+    def missing(self):
+        "Get the row indices of drills without any pad on a spanned layer"
+        return np.flatnonzero(self.pad < 0)
+
+    def violations(self, min_ring):
+        "Get the row indices with a missing pad or a ring below min_ring"
+        return np.flatnonzero((self.pad < 0) | (self.ring < min_ring))
+
+def _layer_rings(hits, features):
+    "Get (pad, ring) arrays with the best pad of every drill hit on a single layer"
+    pads = features.pads
+    shape, half_width, half_height = pad_shapes(features)
+    radius = hits.radius(features.unit)
+    candidates = np.flatnonzero(pads.polarity == Polarity.Positive.value)
+    reach = np.nan_to_num(np.hypot(half_width, half_height))[candidates]
+    px, py = pads.x[candidates], pads.y[candidates]
+    index = GridIndex(px - reach, py - reach, px + reach, py + reach)
+    x, y = hits.coordinates(features.unit)
+    query, items = index.query_pairs(x, y, x, y)
+    items = candidates[items]
+    inside = distance_inside(shape[items], half_width[items], half_height[items],
+                             pads.angle[items], x[query] - pads.x[items],
+                             y[query] - pads.y[items])
+    ring = inside - radius[query]
+    # Only pads that overlap the hole (or cannot be measured) are candidates
+    overlapping = np.isnan(inside) | (inside > -radius[query])
+    query, items, ring = query[overlapping], items[overlapping], ring[overlapping]
+    # Keep the pad with the largest ring per drill
+    order = np.lexsort((-np.nan_to_num(ring, nan=-np.inf), query))
+    query, items, ring = query[order], items[order], ring[order]
+    first = np.unique(query, return_index=True)[1]
+    best_pad = np.full(len(hits), -1, dtype=np.int64)
+    best_ring = np.full(len(hits), np.nan)
+    best_pad[query[first]] = items[first]
+    best_ring[query[first]] = ring[first]
+    return best_pad, best_ring
+
+def annular_rings(hits, layers):
+    """
+    Compute the annular rings of DrillHits on the given copper layers,
+    a list of (copper layer position, FeatureArrays).
+    Returns an AnnularRing with the rows grouped by layer.
+    """
+    count = len(hits)
+    drills, positions, pads, rings = [], [], [], []
+    for position, features in layers:
+        pad, ring = _layer_rings(hits, features)
+        drills.append(np.arange(count))
+        positions.append(np.full(count, position, dtype=np.int64))
+        pads.append(pad)
+        rings.append(ring)
+    if not layers:
+        empty = np.zeros(0, dtype=np.int64)
+        return AnnularRing(empty, empty, empty, np.zeros(0))
+    return AnnularRing(*(np.concatenate(column) for column in (drills, positions, pads, rings)))
+
+def read_annular_rings(directory, layers, by="size"):
+    """
+    Check every drill layer of a LayerSet against the copper layers it spans.
+    Every copper layer is read only once.
+    Returns a dict drill layer name => AnnularRing
+    """
+    stackup = layers.stackup()
+    copper = {}
+    result = {}
+    for drill in stackup.layers.by_type(LayerType.Drill):
+        spanned = []
+        for position in stackup.span_positions(drill):
+            name = stackup.copper_layers[position].name
+            if name not in copper:
+                copper[name] = parse_feature_arrays(read_layer_features(directory, name))
+            spanned.append((position, copper[name]))
+        result[drill.name] = annular_rings(read_drill_hits(directory, drill.name, by), spanned)
+    return result
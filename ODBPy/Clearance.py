@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Copper spacing (clearance) check for decoded layer features
+"""
+from collections import namedtuple
+import numpy as np
+from .FeatureArrays import parse_feature_arrays
+from .Geometry import SHAPE_OTHER, SHAPE_ROUND, SHAPE_RECT, SHAPE_OVAL, Primitives, \
+     symbol_shapes, symbol_outlines, pad_shapes, rotate, box_outlines, segment_distance, tessellate_arcs, outlines_containing, \
+     surface_edges, primitives_inside
+from .ColumnarNetlist import read_columnar_netlist
+from .Layers import StackupIndex, read_layer_features
+from .SpatialIndex import GridIndex, expand_ranges
+from .Stroke import line_primitives
+from .Structures import Polarity, Mirror
+from .Utils import parallel_map
+
+__all__ = ["ClearanceViolations", "LayerCopper", "unsupported_symbols", "feature_primitives",
+           "layer_copper", "check_clearance", "read_clearance"]
+
+class ClearanceViolations(namedtuple("ClearanceViolations", [
+        "feature_a", "feature_b", "distance", "x", "y"])):
+    """
+    Pairs of features closer than the threshold, sorted by distance.
+    feature_a < feature_b are feature orders (see FeatureArrays),
+    distance = 0 for touching features of different nets (shorts),
+    x, y = location in the middle of the gap
+    """
+    def __len__(self):
+        return len(self.distance)
+
+def unsupported_symbols(features):
+    """
+    Get the sorted names of the pad symbols of FeatureArrays that
+    feature_primitives() can not draw (see Geometry.symbol_outlines())
+    """
+    shape = symbol_shapes(features, features.pads.symbol)[0]
+    symbols = np.unique(features.pads.symbol[shape == SHAPE_OTHER]).tolist()
+    return sorted(str(features.symbols.get(num)) for num in symbols
+                  if symbol_outlines(features.symbols.get(num)) is None)
+
+_mirror_x = [Mirror.Mirror.value, Mirror.MirrorX.value, Mirror.MirrorXY.value]
+_mirror_y = [Mirror.MirrorY.value, Mirror.MirrorXY.value]
+
+def _outline_pad_primitives(features, keep, max_angle):
+    "Build the outline Primitives of the selected pads from their symbol outlines"
+    pads = features.pads
+    parts = []
+    for num in np.unique(pads.symbol[keep]).tolist():
+        outlines = symbol_outlines(features.symbols.get(num), max_angle)
+        if outlines is None:
+            continue
+        pad = np.flatnonzero(keep & (pads.symbol == num))
+        # Symbols are sized in 1/1000 of the coordinate unit, mirrored before the rotation
+        scale = pads.resize[pad, None] / 1000.
+        sx = np.where(np.isin(pads.mirror[pad, None], _mirror_x), -scale, scale)
+        sy = np.where(np.isin(pads.mirror[pad, None], _mirror_y), -scale, scale)
+        for outline in outlines:
+            x, y = rotate(outline[:, 0] * sx, outline[:, 1] * sy, pads.angle[pad, None])
+            vertices = np.stack((pads.x[pad, None] + x, pads.y[pad, None] + y), axis=2)
+            parts.append(Primitives.outlines(pads.order[pad], vertices))
+    return parts
+
+def feature_primitives(features, max_angle=10., polarity=Polarity.Positive,
+                       layer_polarity=Polarity.Positive, strict=False):
+    """
+    Build the Primitives of the features of FeatureArrays with the given
+    Polarity (None = all features). On a negative layer (see Layer.polarity)
+    the feature polarities are flipped like in FeatureArrays.polarities().
+    Arcs, circular surface steps and curved symbol outlines are tessellated
+    with chords spanning at most max_angle degrees. Pads with symbols listed
+    by unsupported_symbols() are skipped, or raise a ValueError if strict.
+    """
+    if strict:
+        unsupported = unsupported_symbols(features)
+        if unsupported:
+            raise ValueError("Unsupported pad symbols: {}".format(", ".join(unsupported)))
+    if polarity is not None and layer_polarity == Polarity.Negative:
+        polarity = Polarity.Negative if polarity == Polarity.Positive else Polarity.Positive
+    def selected(column):
+        "Mask of the features with the requested polarity"
+        if polarity is None:
+            return np.ones(len(column), dtype=bool)
+        return column == polarity.value
+    parts = []
+    # Pads
+    pads = features.pads
+    shape, half_width, half_height = pad_shapes(features)
+    keep = selected(pads.polarity)
+    round_ = keep & (shape == SHAPE_ROUND)
+    parts.append(Primitives.capsules(pads.order[round_], pads.x[round_], pads.y[round_],
+                                     pads.x[round_], pads.y[round_], half_width[round_]))
+    oval = keep & (shape == SHAPE_OVAL)
+    core = np.abs(half_width[oval] - half_height[oval])
+    horizontal = half_width[oval] >= half_height[oval]
+    dx, dy = rotate(np.where(horizontal, core, 0.), np.where(horizontal, 0., core), pads.angle[oval])
+    parts.append(Primitives.capsules(pads.order[oval], pads.x[oval] - dx, pads.y[oval] - dy,
+                                     pads.x[oval] + dx, pads.y[oval] + dy,
+                                     np.minimum(half_width[oval], half_height[oval])))
+    rect = keep & (shape == SHAPE_RECT)
+    parts.append(Primitives.outlines(pads.order[rect], box_outlines(
+        pads.x[rect], pads.y[rect], half_width[rect], half_height[rect], pads.angle[rect])))
+    parts.extend(_outline_pad_primitives(features, keep & (shape == SHAPE_OTHER), max_angle))
+    # Lines
+    parts.append(line_primitives(features, selected(features.lines.polarity)))
+    # Arcs (always drawn with a round pen)
+    arcs = features.arcs
+    _, half_width, _ = symbol_shapes(features, arcs.symbol)
+    keep = selected(arcs.polarity) & ~np.isnan(half_width)
+    arc, x0, y0, x1, y1 = tessellate_arcs(
+        arcs.xs[keep], arcs.ys[keep], arcs.xe[keep], arcs.ye[keep],
+        arcs.xc[keep], arcs.yc[keep], arcs.clockwise[keep], max_angle)
+    parts.append(Primitives.capsules(arcs.order[keep][arc], x0, y0, x1, y1,
+                                     half_width[keep][arc]))
+    # Surfaces
+    surfaces = [(order, surface) for order, surface in features.surfaces
+                if polarity is None or surface.polarity == polarity]
+    order, x0, y0, x1, y1 = surface_edges(surfaces, max_angle)
+    parts.append(Primitives.edges(order, x0, y0, x1, y1))
+    return Primitives.concatenate(parts)
+
+class LayerCopper(namedtuple("LayerCopper", ["primitives", "clearing", "plane"])):
+    """
+    The copper of a layer as drawn by its features in order.
+    primitives = Primitives of the features adding copper (without the ones
+        removed entirely by a later clearing feature), on a negative layer
+        including the plane: a rectangle around all features drawn first,
+    clearing = Primitives of the features removing copper,
+    plane = feature order of the plane (-1 on positive layers).
+    Copper only counts as removed where it lies entirely inside a single
+    clearing feature drawn after it.
+    """
+    def ranks(self, orders):
+        "Get the drawing position of feature orders (-1 for the plane)"
+        orders = np.asarray(orders, dtype=np.int64)
+        return np.where(orders == self.plane, -1, orders)
+
+    def _margins(self, inner, item, after, limit):
+        """
+        For every entry (item, after), get the largest margin (see
+        Geometry.primitives_inside()) by which all inner Primitives owned by
+        item lie inside a clearing feature drawn after the rank after.
+        NaN where there is no such clearing feature.
+        """
+        item = np.asarray(item, dtype=np.int64)
+        result = np.full(len(item), np.nan)
+        index, cleared, margin = primitives_inside(inner, self.clearing, limit)
+        if len(index) == 0:
+            return result
+        owner = inner.owner[index]
+        counts = np.bincount(inner.owner)
+        # Only clearing features containing all primitives of an item count
+        pairs, inverse, found = np.unique(np.column_stack((owner, cleared)), axis=0,
+                                          return_inverse=True, return_counts=True)
+        smallest = np.full(len(pairs), np.inf)
+        np.minimum.at(smallest, inverse.ravel(), margin)
+        full = found == counts[pairs[:, 0]]
+        pairs, smallest = pairs[full], smallest[full]
+        entry, candidate = expand_ranges(np.searchsorted(pairs[:, 0], item, side="left"),
+                                         np.searchsorted(pairs[:, 0], item, side="right"))
+        later = self.ranks(pairs[candidate, 1]) > np.asarray(after)[entry]
+        entry, candidate = entry[later], candidate[later]
+        best = np.full(len(item), -np.inf)
+        np.maximum.at(best, entry, smallest[candidate])
+        return np.where(np.isfinite(best), best, result)
+
+    def clearing_margins(self, a, b, limit=0.):
+        """
+        For pairs of copper feature orders, get the margin by which the later
+        feature lies inside a clearing feature drawn between both, i.e. the
+        gap the clearing leaves around it (at most limit). NaN for pairs
+        not separated by a clearing feature.
+        """
+        rank_a, rank_b = self.ranks(a), self.ranks(b)
+        later = np.where(rank_a > rank_b, a, b)
+        select = np.isin(self.primitives.owner, later)
+        inner = Primitives(*(column[select] for column in self.primitives))
+        return self._margins(inner, later, np.minimum(rank_a, rank_b), limit)
+
+    def cleared_pairs(self, a, b):
+        "Are the contacts of pairs of touching copper features removed by a clearing feature?"
+        return ~np.isnan(self.clearing_margins(a, b))
+
+    def cleared_at(self, query, feature, x, y, radius=0.):
+        """
+        For (query index, feature order) pairs of copper features touching
+        circles of the given radius (a number or one per point) around query
+        points: Is the circle inside a clearing feature drawn after the feature?
+        """
+        x, y = np.atleast_1d(np.asarray(x, dtype=float)), np.atleast_1d(np.asarray(y, dtype=float))
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)
+        inner = Primitives.capsules(np.arange(len(x)), x, y, x, y, radius)
+        return ~np.isnan(self._margins(inner, query, self.ranks(feature), 0.))
+
+def layer_copper(features, max_angle=10., layer_polarity=Polarity.Positive):
+    """
+    Build the LayerCopper of FeatureArrays. On a negative layer (see
+    Layer.polarity) the features drawn positive clear the plane.
+    See feature_primitives() for max_angle.
+    """
+    copper = feature_primitives(features, max_angle, layer_polarity=layer_polarity)
+    clearing = feature_primitives(features, max_angle, polarity=Polarity.Negative,
+                                  layer_polarity=layer_polarity)
+    plane = -1
+    if layer_polarity == Polarity.Negative and len(copper) + len(clearing):
+        xmin, ymin, xmax, ymax = (np.concatenate(pair) for pair in
+                                  zip(copper.extents(), clearing.extents()))
+        xmin, ymin, xmax, ymax = xmin.min(), ymin.min(), xmax.max(), ymax.max()
+        plane = len(features.polarities())
+        copper = Primitives.concatenate([copper, Primitives.outlines(
+            np.array([plane]), box_outlines(np.array([(xmin + xmax) / 2]),
+                                            np.array([(ymin + ymax) / 2]),
+                                            np.array([(xmax - xmin) / 2]),
+                                            np.array([(ymax - ymin) / 2]), np.zeros(1)))])
+    result = LayerCopper(copper, clearing, plane)
+    owners = np.unique(copper.owner)
+    removed = owners[~np.isnan(result._margins(copper, owners, result.ranks(owners), 0.))]
+    keep = ~np.isin(copper.owner, removed)
+    return LayerCopper(Primitives(*(column[keep] for column in copper)), clearing, plane)
+
+def _min_per_pair(a, b, distance, x, y):
+    "Keep only the smallest distance for every (a, b) pair"
+    order = np.lexsort((distance, b, a))
+    a, b, distance, x, y = a[order], b[order], distance[order], x[order], y[order]
+    first = np.ones(len(a), dtype=bool)
+    first[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+    return a[first], b[first], distance[first], x[first], y[first]
+
+def _tile_violations(primitives, threshold):
+    """
+    Find all feature pairs of a set of primitives that are closer than threshold.
+    Returns (a, b, distance, x, y) arrays with touching pairs included.
+    """
+    owner, x0, y0, x1, y1, radius, _ = primitives
+    xmin, ymin, xmax, ymax = Primitives(*primitives).extents()
+    index = GridIndex(xmin, ymin, xmax, ymax)
+    first, second = index.query_pairs(xmin - threshold, ymin - threshold,
+                                      xmax + threshold, ymax + threshold)
+    # Each pair of different features only once
+    keep = owner[first] < owner[second]
+    first, second = first[keep], second[keep]
+    distance, ax, ay, bx, by = segment_distance(
+        x0[first], y0[first], x1[first], y1[first],
+        x0[second], y0[second], x1[second], y1[second])
+    gap = distance - radius[first] - radius[second]
+    keep = gap < threshold
+    first, second, gap = first[keep], second[keep], gap[keep]
+    distance, ax, ay, bx, by = distance[keep], ax[keep], ay[keep], bx[keep], by[keep]
+    # Middle of the gap between the capsule surfaces
+    along = (radius[first] + gap / 2) / np.where(distance > 0, distance, 1.)
+    x, y = ax + (bx - ax) * along, ay + (by - ay) * along
+    return _min_per_pair(owner[first], owner[second], gap, x, y)
+
+def check_clearance(features, threshold, tile_size=None, workers=None, max_angle=10.,
+                    nets=None, layer_polarity=Polarity.Positive):
+    """
+    Find all pairs of copper features (see layer_copper()) of FeatureArrays
+    of different nets that are closer than threshold (in coordinate units).
+    nets = net of every feature order (-1 = unknown), e.g. from
+    Connectivity.netlist_feature_nets(). Touching features of different
+    nets are shorts and reported with distance 0. Pairs involving
+    features of unknown net are only reported if they do not touch,
+    which is the only check done without nets.
+    Features separated by a clearing feature (e.g. a via in the antipad of
+    a pour) never touch, their distance is at least the gap the clearing
+    feature leaves around the later one. On a negative layer these are
+    the only pairs with the plane, located at the start of the feature.
+    If tile_size is given, the layer is split into square tiles of that size
+    that are checked in a process pool (see Utils.parallel_map() for workers).
+    See feature_primitives() for layer_polarity.
+    Returns ClearanceViolations.
+    """
+    copper = layer_copper(features, max_angle, layer_polarity)
+    primitives = copper.primitives
+    # The plane surrounds everything, its pairs are checked below
+    drawn = Primitives(*(column[primitives.owner != copper.plane] for column in primitives))
+    if tile_size is None:
+        tiles = [np.arange(len(drawn))]
+    else:
+        # Every primitive belongs to all tiles its neighbourhood overlaps
+        xmin, ymin, xmax, ymax = drawn.extents()
+        margin = threshold / 2
+        tiles = [items for items in GridIndex(xmin - margin, ymin - margin, xmax + margin,
+                                              ymax + margin, cell_size=tile_size).cells()
+                 if len(items) > 1]
+    jobs = [tuple(column[items] for column in drawn) for items in tiles]
+    results = list(parallel_map(_tile_violations, jobs, [threshold] * len(jobs),
+                                workers=1 if len(jobs) <= 1 else workers))
+    # Features inside a filled outline touch it as well:
+    # test one point of every feature
+    owners, starts = np.unique(drawn.owner, return_index=True)
+    query, container = outlines_containing(drawn, drawn.x0[starts], drawn.y0[starts])
+    inner = owners[query]
+    keep = inner != container
+    query, inner, container = query[keep], inner[keep], container[keep]
+    results.append((np.minimum(inner, container), np.maximum(inner, container),
+                    np.zeros(len(query)), drawn.x0[starts[query]], drawn.y0[starts[query]]))
+    a, b, distance, x, y = _min_per_pair(*(np.concatenate(column) for column in zip(*results)))
+    touching = distance <= 0
+    # Only the gap left by a clearing feature between them counts,
+    # even inside a filled outline
+    separated = copper.clearing_margins(a, b, threshold)
+    cleared = ~np.isnan(separated)
+    distance = np.where(cleared, np.where(touching, separated, np.maximum(distance, separated)),
+                        np.where(touching, 0., distance))
+    touching &= ~cleared
+    keep = ~cleared | (distance < threshold)
+    a, b, distance, x, y = a[keep], b[keep], distance[keep], x[keep], y[keep]
+    touching = touching[keep]
+    if copper.plane >= 0:
+        # The plane is ordered after all features
+        separated = copper.clearing_margins(np.full(len(owners), copper.plane), owners,
+                                            threshold)
+        plane = separated < threshold
+        a = np.concatenate((owners[plane], a))
+        b = np.concatenate((np.full(np.count_nonzero(plane), copper.plane), b))
+        distance = np.concatenate((separated[plane], distance))
+        x = np.concatenate((drawn.x0[starts[plane]], x))
+        y = np.concatenate((drawn.y0[starts[plane]], y))
+        touching = np.concatenate((np.zeros(np.count_nonzero(plane), dtype=bool), touching))
+    if nets is None:
+        keep = ~touching
+    else:
+        # Orders beyond the nets array pick the appended -1
+        nets = np.append(np.asarray(nets, dtype=np.int64), -1)
+        net_a = nets[np.minimum(a, len(nets) - 1)]
+        net_b = nets[np.minimum(b, len(nets) - 1)]
+        known = (net_a >= 0) & (net_b >= 0)
+        keep = ~(known & (net_a == net_b)) & (known | ~touching)
+    a, b, distance, x, y = a[keep], b[keep], distance[keep], x[keep], y[keep]
+    order = np.lexsort((b, a, distance))
+    return ClearanceViolations(a[order], b[order], distance[order], x[order], y[order])
+
+def read_clearance(directory, layers, threshold, tile_size=None, workers=None,
+                   netlist="cadnet"):
+    """
+    Check every copper layer of the given LayerSet. The feature nets are
+    derived from the given netlist (None = check without nets).
+    Returns a dict layer name => ClearanceViolations
+    """
+    # Connectivity builds on the primitives of this module
+    from .Connectivity import netlist_feature_nets
+    if netlist is not None:
+        netlist = read_columnar_netlist(directory, netlist)
+    copper = StackupIndex(layers).copper_layers
+    result = {}
+    for position, layer in enumerate(copper):
+        features = parse_feature_arrays(read_layer_features(directory, layer.name))
+        nets = None if netlist is None else \
+               netlist_feature_nets(features, netlist, position, len(copper),
+                                    layer_polarity=layer.polarity)
+        result[layer.name] = check_clearance(features, threshold, tile_size, workers,
+                                             nets=nets, layer_polarity=layer.polarity)
+    return result
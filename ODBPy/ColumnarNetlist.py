@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar (structure of arrays) ODB++ netlist with a CSR net index
+"""
+import os.path
+import numpy as np
+from .LineRecordParser import read_linerecords
+from .NetlistParser import parse_net_names, split_netlist_point, NetSide, \
+     NetPointExposure, TestpointTestSide
+from .SpatialIndex import GridIndex
+from .Structures import PointArray
+from .Units import find_unit, to_mm
+from .Utils import step_directory
+
+__all__ = ["ColumnarNetlist", "parse_columnar_netlist", "read_columnar_netlist",
+           "NO_NET", "POINT_VIA", "POINT_FIDUCIAL", "POINT_TESTPOINT",
+           "POINT_FORCE_MIDPOINT", "POINT_MIDPOINT"]
+
+# Net number used for $NONE$ points (-1 is already used for tooling holes)
+NO_NET = -2
+
+# Bits of the flags column
+POINT_VIA = 1
+POINT_FIDUCIAL = 2
+POINT_TESTPOINT = 4
+POINT_FORCE_MIDPOINT = 8
+POINT_MIDPOINT = 16 # Point location "m" instead of "e"
+
+_side_codes = {"T": NetSide.Top.value, "D": NetSide.Bottom.value, "B": NetSide.Both.value}
+_point_location_flags = {"e": 0, "m": POINT_MIDPOINT}
+_exposure_codes = {
+    "e": NetPointExposure.SolderMaskExposed.value,
+    "c": NetPointExposure.SolderMaskCovered.value,
+    "p": NetPointExposure.SolderMaskCoveredPrimaryTop.value,
+    "s": NetPointExposure.SolderMaskCoveredSecondaryBottom.value
+}
+_testside_codes = {
+    "c": TestpointTestSide.ComponentSide.value,
+    "s": TestpointTestSide.SolderSide.value,
+    "b": TestpointTestSide.BothSides.value,
+    "a": TestpointTestSide.AnyOneSide.value,
+    "n": TestpointTestSide.Undefined.value,
+    None: TestpointTestSide.Undefined.value
+}
+
+def _scan_netlist_point(line):
+    """
+    Split a netlist point line into a tuple of plain values
+    (netid, radius, x, y, side, exposure, flags, testside)
+    or return None if the line is not a netlist point.
+    """
+    fields = split_netlist_point(line)
+    if fields is None:
+        return None
+    netid, radius, x, y, side, _, point_location, exposure, _, \
+        v, f, t, m, _, testside = fields
+    try:
+        radius, x, y = float(radius), float(x), float(y)
+    except ValueError:
+        return None
+    flags = _point_location_flags[point_location]
+    if v == "v":
+        flags |= POINT_VIA
+    if f == "f":
+        flags |= POINT_FIDUCIAL
+    if t == "t":
+        flags |= POINT_TESTPOINT
+    if m == "m":
+        flags |= POINT_FORCE_MIDPOINT
+    return (NO_NET if netid == "$NONE$" else int(netid), radius, x, y,
+            _side_codes[side], _exposure_codes[exposure], flags, _testside_codes[testside])
+
+
+class ColumnarNetlist(object):
+    """
+    Netlist points stored column-wise.
+
+    Per-point columns (all of length N):
+        netid: Net number from the file (-1 = tooling hole, NO_NET = $NONE$)
+        net_index: Index into nets/names
+        radius, x, y: float columns
+        side: NetSide values, exposure: NetPointExposure values
+        flags: POINT_... bit mask, testside: TestpointTestSide values
+    unit: Coordinate unit (INCH or MM)
+    Per-net columns:
+        nets: Sorted unique net numbers
+        names: Net name for every net (the net number if it has no name)
+        net_offsets: The points of net i are net_points[net_offsets[i]:net_offsets[i+1]]
+    """
+    def __init__(self, netid, radius, x, y, side, exposure, flags, testside, netnames,
+                 unit="INCH"):
+        self.netid = np.asarray(netid, dtype=np.int64)
+        self.radius = np.asarray(radius, dtype=float)
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.side = np.asarray(side, dtype=np.int8)
+        self.exposure = np.asarray(exposure, dtype=np.int8)
+        self.flags = np.asarray(flags, dtype=np.int8)
+        self.testside = np.asarray(testside, dtype=np.int8)
+        self.unit = unit
+        # CSR grouping of points by net
+        self.nets, self.net_index = np.unique(self.netid, return_inverse=True)
+        self.net_points = np.argsort(self.net_index, kind="stable")
+        self.net_offsets = np.concatenate(([0], np.cumsum(
+            np.bincount(self.net_index, minlength=len(self.nets)))))
+        self.names = [
+            "$NONE$" if net == NO_NET else netnames.get(net, net)
+            for net in self.nets.tolist()]
+        self._name_index = {name: i for i, name in enumerate(self.names)}
+        self._point_index = None
+
+    def __len__(self):
+        return len(self.netid)
+
+    def net_by_name(self, name):
+        "Get the net index for the given name or None if there is no such net"
+        return self._name_index.get(name)
+
+    def points_of(self, net):
+        "Get the point indices of a net given by index"
+        return self.net_points[self.net_offsets[net]:self.net_offsets[net + 1]]
+
+    def points_by_name(self, name):
+        "Get the point indices of a net given by name (empty if there is no such net)"
+        net = self.net_by_name(name)
+        return self.points_of(net) if net is not None else self.net_points[:0]
+
+    def locations(self):
+        "Get the point locations as a PointArray"
+        return PointArray.from_xy(self.x, self.y)
+
+    def coordinates(self, unit):
+        "Get the (x, y) point columns converted to the given coordinate unit"
+        scale = to_mm(1., self.unit) / to_mm(1., unit)
+        return self.x * scale, self.y * scale
+
+    def point_index(self):
+        "Get the spatial index over all points (built on first use)"
+        if self._point_index is None:
+            self._point_index = GridIndex.from_points(self.x, self.y)
+        return self._point_index
+
+    def nets_at(self, x, y, tolerance):
+        """
+        For arrays of query coordinates, find the net index of the nearest
+        netlist point at most tolerance away (-1 if there is none).
+        """
+        points, _ = self.point_index().nearest(x, y, tolerance)
+        return np.where(points >= 0, self.net_index[points], -1)
+
+
+def parse_columnar_netlist(linerecords):
+    """Build a ColumnarNetlist from a netlist linerecord dict"""
+    scanned = filter(None, map(_scan_netlist_point, linerecords["Netlist points"]))
+    columns = list(zip(*scanned)) or [()] * 8
+    # The unit line precedes the point section
+    unit = find_unit(line for section, lines in linerecords.items()
+                     if section != "Netlist points" for line in lines)
+    return ColumnarNetlist(*columns, netnames=parse_net_names(linerecords), unit=unit)
+
+def read_columnar_netlist(directory, netlist="cadnet", step="pcb"):
+    """
+    Read a netlist (by default the CAD netlist)
+    of a step of the given ODB++ directory into a ColumnarNetlist
+    """
+    netlist_path = os.path.join(step_directory(directory, step), "netlists", netlist, "netlist")
+    return parse_columnar_netlist(read_linerecords(netlist_path))
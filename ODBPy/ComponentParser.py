@@ -5,17 +5,22 @@ ODB++ surface parser components
 """
 import re
 from collections import namedtuple
+import numpy as np
+from .Attributes import parse_attributes
 from .Decoder import DecoderOption, run_decoder
+from .LineRecordParser import read_raw_linerecords
 from .Structures import *
 from .Utils import try_parse_number
 
 __all__ = ["components_decoder_options", "parse_components",
-           "consolidate_component_tags", "Component", "map_components_by_name"]
+           "consolidate_component_tags", "Component", "map_components_by_name",
+           "ToeprintRecord", "ToeprintArrays", "stream_components",
+           "parse_components_streaming", "read_components_streaming"]
 
 _prp_re = re.compile(r"^PRP\s+(\S+)\s+'([^']+)'\s*$") # Property record
 # _prp_re.search("PRP Name 'EEUFR1H470'")
 _top_re = re.compile(r"^TOP\s+(\d+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+([NM])\s+(\d+)\s+(\d+)\s+(\S+)\s*$") # Toeprint record
-_cmp_re = re.compile(r"^CMP\s+(\d+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+([NM])\s+(\S+)\s+(\S+)\s*(;\s*.+?)?$") # component record
+_cmp_re = re.compile(r"^CMP\s+(\d+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+([NM])\s+(\S+)\s+([^\s;]+)\s*(;\s*.+?)?$") # component record
 
 ComponentRecordTag = namedtuple("ComponentRecordTag",[
         "package_ref", "location", "rotation", "mirror", "name", "part_name", "attributes"])
@@ -26,6 +31,11 @@ ToeprintRecord = namedtuple("ToeprintRecord", [
 Component = namedtuple("Component", [
         "name", "part_name", "location", "rotation", "mirror", "attributes", "properties", "toeprints"])
 
+# Columnar toeprints: "component" is the index of the owning component,
+# "mirrored" is a boolean array and "toeprint_name" a list
+ToeprintArrays = namedtuple("ToeprintArrays", [
+        "component", "pin_num", "x", "y", "rotation", "mirrored", "net_num", "subnet_num", "toeprint_name"])
+
 def consolidate_component_tags(tags):
     component = None # Expect only one
     properties = {}
@@ -64,10 +74,19 @@ def _parse_top(match):
         try_parse_number(toeprint_name)
     )
 
+def _cmp_attributes(text):
+    """
+    Parse the ";"-separated part of a CMP record after the part name,
+    ignoring the ID=<id> field
+    """
+    fields = [field.strip() for field in text.split(";")]
+    attributes = ",".join(field for field in fields
+                          if field and not field.startswith("ID="))
+    return parse_attributes(attributes) if attributes else {}
+
 def _parse_cmp(match):
     pkg_ref, x, y, rot, mirror, name, part_name, attributes = match.groups()
-    attributes = parse_attributes(attributes[1:]) \
-                 if attributes is not None else {}
+    attributes = _cmp_attributes(attributes) if attributes is not None else {}
     return ComponentRecordTag(
         int(pkg_ref),
         Point(float(x), float(y)),
@@ -109,3 +128,107 @@ def map_components_by_name(components):
         component.name: component
         for component in components
     }
+
+def _split_prp(rest):
+    "Split the part of a PRP record after the keyword. Returns a PropertyRecordTag or None"
+    key, _, value = rest.strip().partition(" ")
+    value = value.strip()
+    if not key or len(value) < 3 or value[0] != "'" or value[-1] != "'":
+        return None
+    return PropertyRecordTag(key, value[1:-1])
+
+def _split_cmp(rest):
+    "Split the part of a CMP record after the keyword. Returns a ComponentRecordTag or None"
+    fields, _, attributes = rest.partition(";")
+    fields = fields.split()
+    if len(fields) != 7 or fields[4] not in mirror_map:
+        return None
+    pkg_ref, x, y, rot, mirror, name, part_name = fields
+    return ComponentRecordTag(
+        int(pkg_ref),
+        Point(float(x), float(y)),
+        float(rot),
+        mirror_map[mirror],
+        try_parse_number(name),
+        try_parse_number(part_name),
+        _cmp_attributes(attributes)
+    )
+
+def stream_components(lines, toeprint_columns=None):
+    """
+    Walk the raw lines of a components file once (e.g. from read_raw_linerecords())
+    and yield a Component for every CMP record, together with the
+    PRP and TOP records following it.
+    Records are dispatched on their keyword, every other line is ignored.
+    Malformed TOP and PRP records are skipped, a malformed CMP record
+    raises a ValueError (its records would end up in the wrong component).
+
+    If toeprint_columns is a list of 9 lists, toeprints are not built as
+    ToeprintRecords (the components get an empty toeprint list).
+    Instead, the ToeprintArrays fields are appended to the lists.
+    """
+    component, properties, toeprints = None, {}, []
+    index = -1 # Index of the current component
+    for line in lines:
+        keyword, _, rest = line.partition(" ")
+        if keyword == "TOP":
+            fields = rest.split()
+            if component is None or len(fields) != 8 or fields[4] not in mirror_map:
+                continue
+            pin_num, x, y, rot, mirror, net_num, subnet_num, toeprint_name = fields
+            try:
+                values = (index, int(pin_num), float(x), float(y), float(rot), mirror,
+                          int(net_num), int(subnet_num), try_parse_number(toeprint_name))
+            except ValueError:
+                continue
+            if toeprint_columns is None:
+                toeprints.append(ToeprintRecord(
+                    values[1], Point(values[2], values[3]), values[4],
+                    mirror_map[mirror], values[6], values[7], values[8]))
+            else:
+                for column, value in zip(toeprint_columns, values):
+                    column.append(value)
+        elif keyword == "PRP":
+            tag = _split_prp(rest)
+            if tag is not None:
+                properties[tag.key] = tag.value
+        elif keyword == "CMP":
+            try:
+                tag = _split_cmp(rest)
+            except ValueError:
+                tag = None
+            if tag is None:
+                raise ValueError("Invalid CMP record: {}".format(line))
+            if component is not None:
+                yield Component(component.name, component.part_name, component.location,
+                                component.rotation, component.mirror, component.attributes,
+                                properties, toeprints)
+            component, properties, toeprints = tag, {}, []
+            index += 1
+    if component is not None:
+        yield Component(component.name, component.part_name, component.location,
+                        component.rotation, component.mirror, component.attributes,
+                        properties, toeprints)
+
+def parse_components_streaming(lines, columnar_toeprints=False):
+    """
+    Single-pass alternative to parse_components() working on the raw lines.
+    Returns a dict of component index => Component like parse_components()
+    does for files with "CMP <n>" sections.
+    If columnar_toeprints is True, returns (components, ToeprintArrays) instead
+    and the components do not carry ToeprintRecords.
+    """
+    columns = [[] for _ in ToeprintArrays._fields] if columnar_toeprints else None
+    components = dict(enumerate(stream_components(lines, columns)))
+    if not columnar_toeprints:
+        return components
+    component, pin_num, x, y, rotation, mirror, net_num, subnet_num, names = columns
+    return components, ToeprintArrays(
+        np.array(component, dtype=np.int64), np.array(pin_num, dtype=np.int64),
+        np.array(x, dtype=float), np.array(y, dtype=float), np.array(rotation, dtype=float),
+        np.array(mirror) == "M", np.array(net_num, dtype=np.int64),
+        np.array(subnet_num, dtype=np.int64), names)
+
+def read_components_streaming(filename, columnar_toeprints=False):
+    "Read a components file with parse_components_streaming()"
+    return parse_components_streaming(read_raw_linerecords(filename), columnar_toeprints)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indexed collection of the top and bottom side components of a job
+"""
+from collections import defaultdict
+from itertools import takewhile
+import numpy as np
+from .ComponentParser import parse_components_streaming
+from .Layers import layer_file_path
+from .LineRecordParser import read_raw_linerecords
+from .NetlistParser import NetSide
+from .SpatialIndex import GridIndex
+from .Structures import Mirror, PointArray
+from .Units import find_unit
+
+__all__ = ["ComponentCollection", "read_component_side", "read_component_collection"]
+
+def _as_component_list(components):
+    "Accept a parse_components() dict (in file order), a list of components or None"
+    if components is None:
+        return []
+    if isinstance(components, dict):
+        return list(components.values())
+    return list(components)
+
+def _toeprint_columns(components, toeprints, first):
+    """
+    Get the (component, pin, x, y, net, subnet) toeprint columns of one side,
+    either from ToeprintArrays or from the components' ToeprintRecords.
+    first is the index of the first component of this side in the collection.
+    """
+    if toeprints is not None:
+        return (toeprints.component + first, toeprints.pin_num, toeprints.x,
+                toeprints.y, toeprints.net_num, toeprints.subnet_num)
+    records = [tp for c in components for tp in c.toeprints]
+    return (first + np.repeat(np.arange(len(components)), [len(c.toeprints) for c in components]),
+            np.array([tp.pin_num for tp in records], dtype=np.int64),
+            np.array([tp.location.x for tp in records], dtype=float),
+            np.array([tp.location.y for tp in records], dtype=float),
+            np.array([tp.net_num for tp in records], dtype=np.int64),
+            np.array([tp.subnet_num for tp in records], dtype=np.int64))
+
+class ComponentCollection(object):
+    """
+    All components of a board with lookup indexes.
+
+    Per-component columns: side (NetSide values), x, y,
+        rotation (clockwise degrees), mirrored (bool)
+    Per-toeprint columns: toeprint_component (index into components),
+        toeprint_pin, toeprint_x, toeprint_y, toeprint_net, toeprint_subnet
+
+    The toeprints of each side are taken from the optional ToeprintArrays
+    (see parse_components_streaming()) or else from the components.
+    unit is the coordinate unit of both sides.
+    """
+    def __init__(self, top=None, bottom=None, top_toeprints=None, bottom_toeprints=None,
+                 unit="INCH"):
+        top, bottom = _as_component_list(top), _as_component_list(bottom)
+        self.unit = unit
+        self.components = top + bottom
+        self.side = np.array([NetSide.Top.value] * len(top) +
+                             [NetSide.Bottom.value] * len(bottom), dtype=np.int8)
+        self.x = np.array([c.location.x for c in self.components], dtype=float)
+        self.y = np.array([c.location.y for c in self.components], dtype=float)
+        self.rotation = np.array([c.rotation for c in self.components], dtype=float)
+        self.mirrored = np.array([c.mirror != Mirror.No for c in self.components], dtype=bool)
+        # Hash indexes
+        self._by_name = {c.name: i for i, c in enumerate(self.components)}
+        self._by_part = defaultdict(list)
+        for i, component in enumerate(self.components):
+            self._by_part[component.part_name].append(i)
+        # Toeprint columns
+        columns = zip(_toeprint_columns(top, top_toeprints, 0),
+                      _toeprint_columns(bottom, bottom_toeprints, len(top)))
+        self.toeprint_component, self.toeprint_pin, self.toeprint_x, \
+            self.toeprint_y, self.toeprint_net, self.toeprint_subnet = \
+            [np.concatenate(pair) for pair in columns]
+        # CSR index net number => toeprints
+        self.nets, net_index = np.unique(self.toeprint_net, return_inverse=True)
+        self.net_toeprints = np.argsort(net_index, kind="stable")
+        self.net_offsets = np.concatenate(([0], np.cumsum(
+            np.bincount(net_index, minlength=len(self.nets)))))
+        self._component_index = None
+        self._toeprint_index = None
+        self._local_locations = None
+
+    @classmethod
+    def from_sides(cls, top=None, bottom=None):
+        """
+        Build a ComponentCollection from the (components, ToeprintArrays, unit)
+        of the top and bottom side (see read_component_side()), each optional.
+        Raises ValueError if the sides are in different units.
+        """
+        sides = [side for side in (top, bottom) if side is not None]
+        units = {unit for _, _, unit in sides}
+        if len(units) > 1:
+            raise ValueError("Component layers in different units: {}".format(
+                ", ".join(sorted(units))))
+        (top, top_toeprints, _), (bottom, bottom_toeprints, _) = [
+            side if side is not None else (None, None, None) for side in (top, bottom)]
+        return cls(top, bottom, top_toeprints, bottom_toeprints,
+                   units.pop() if units else "INCH")
+
+    def __len__(self):
+        return len(self.components)
+
+    def __iter__(self):
+        return iter(self.components)
+
+    def index_of(self, name):
+        "Get the index of the component with the given name or None"
+        return self._by_name.get(name)
+
+    def by_name(self, name):
+        "Get the component with the given name or None"
+        index = self._by_name.get(name)
+        return self.components[index] if index is not None else None
+
+    def by_part(self, part_name):
+        "Get a list of all components with the given part name"
+        return [self.components[i] for i in self._by_part.get(part_name, [])]
+
+    def toeprints_on_net(self, net_num):
+        "Get the toeprint indices connected to the given net number"
+        pos = np.searchsorted(self.nets, net_num)
+        if pos >= len(self.nets) or self.nets[pos] != net_num:
+            return self.net_toeprints[:0]
+        return self.net_toeprints[self.net_offsets[pos]:self.net_offsets[pos + 1]]
+
+    def locations(self):
+        "Get the component locations as a PointArray"
+        return PointArray.from_xy(self.x, self.y)
+
+    def toeprint_locations(self):
+        "Get the toeprint locations as a PointArray"
+        return PointArray.from_xy(self.toeprint_x, self.toeprint_y)
+
+    def toeprint_local_locations(self):
+        """
+        Get the toeprint coordinates relative to their component as a PointArray
+        (cached): the board coordinates of the toeprint records are moved,
+        rotated counter-clockwise and mirrored in X back by the placement
+        of their component, all in one pass.
+        """
+        if self._local_locations is None:
+            owner = self.toeprint_component
+            self._local_locations = (self.toeprint_locations() - self.locations()[owner].xy) \
+                .rotate(-self.rotation[owner]).mirror(self.mirrored[owner])
+        return self._local_locations
+
+    def component_extents(self):
+        """
+        Get (xmin, ymin, xmax, ymax) arrays of every component,
+        spanning its location and all of its toeprints
+        """
+        xmin, ymin, xmax, ymax = self.x.copy(), self.y.copy(), self.x.copy(), self.y.copy()
+        owner = self.toeprint_component
+        np.minimum.at(xmin, owner, self.toeprint_x)
+        np.minimum.at(ymin, owner, self.toeprint_y)
+        np.maximum.at(xmax, owner, self.toeprint_x)
+        np.maximum.at(ymax, owner, self.toeprint_y)
+        return xmin, ymin, xmax, ymax
+
+    def component_index(self):
+        "Get the spatial index over the component extents (built on first use)"
+        if self._component_index is None:
+            self._component_index = GridIndex(*self.component_extents())
+        return self._component_index
+
+    def toeprint_index(self):
+        "Get the spatial index over the toeprint locations (built on first use)"
+        if self._toeprint_index is None:
+            self._toeprint_index = GridIndex.from_points(self.toeprint_x, self.toeprint_y)
+        return self._toeprint_index
+
+    def components_in_bbox(self, xmin, ymin, xmax, ymax, side=None):
+        """
+        Get the indices of all components overlapping the given box,
+        optionally only on the given NetSide
+        """
+        found = self.component_index().query_bbox(xmin, ymin, xmax, ymax)
+        if side is not None:
+            found = found[self.side[found] == side.value]
+        return found
+
+    def nearest_toeprints(self, x, y, radius):
+        """
+        For arrays of query coordinates, find the nearest toeprint
+        at most radius away. Returns (toeprint index or -1, distance) arrays.
+        """
+        return self.toeprint_index().nearest(x, y, radius)
+
+
+def read_component_side(filename):
+    """
+    Read a components file into (components, ToeprintArrays, unit),
+    see parse_components_streaming(). The unit is taken from the
+    header lines before the first component.
+    """
+    lines = read_raw_linerecords(filename)
+    unit = find_unit(takewhile(lambda line: not line.startswith("CMP"), lines))
+    components, toeprints = parse_components_streaming(lines, columnar_toeprints=True)
+    return components, toeprints, unit
+
+def read_component_collection(directory, layers):
+    """
+    Read the top and bottom component layers of the given LayerSet
+    into a ComponentCollection
+    """
+    top, bottom = layers.component_layers() or (None, None)
+    return ComponentCollection.from_sides(*[
+        read_component_side(layer_file_path(directory, layer.name, "components.Z"))
+        if layer is not None else None for layer in (top, bottom)])
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Polarity-aware tiled compositing of layer features into the resulting copper
+"""
+from collections import namedtuple
+import numpy as np
+from .Clearance import feature_primitives
+from .Geometry import Primitives, point_segment_distance
+from .Graph import connected_components
+from .SpatialIndex import GridIndex, expand_ranges
+from .Structures import Polarity
+from .Utils import parallel_map
+
+__all__ = ["TileGrid", "CompositeLayer", "composite_tile", "iter_primitive_tiles",
+           "iter_composite_tiles", "composite_layer", "composite_primitives", "label_regions"]
+
+class TileGrid(namedtuple("TileGrid", ["xmin", "ymin", "resolution", "tile_pixels", "shape"])):
+    """
+    Square tiles of tile_pixels x tile_pixels pixels covering a layer.
+    resolution = pixel size in coordinate units,
+    shape = (tile rows, tile columns).
+    Bitmaps are indexed [row, column] with row 0 at ymin,
+    i.e. they need to be flipped vertically to be viewed as images.
+    """
+    @classmethod
+    def covering(cls, xmin, ymin, xmax, ymax, resolution, tile_pixels=512):
+        "Build the tile grid covering the given extents"
+        size = resolution * tile_pixels
+        shape = (max(int(np.ceil((ymax - ymin) / size)), 1),
+                 max(int(np.ceil((xmax - xmin) / size)), 1))
+        return cls(xmin, ymin, resolution, tile_pixels, shape)
+
+    def tiles(self):
+        "Get a list of all (tile row, tile column) keys"
+        return [(row, column) for row in range(self.shape[0]) for column in range(self.shape[1])]
+
+    def tile_bounds(self, row, column):
+        "Get (xmin, ymin, xmax, ymax) of a tile"
+        size = self.resolution * self.tile_pixels
+        x0, y0 = self.xmin + column * size, self.ymin + row * size
+        return (x0, y0, x0 + size, y0 + size)
+
+    def extents(self):
+        "Get (xmin, ymin, xmax, ymax) of the entire grid"
+        size = self.resolution * self.tile_pixels
+        return (self.xmin, self.ymin,
+                self.xmin + self.shape[1] * size, self.ymin + self.shape[0] * size)
+
+def _pixel_range(lo, hi, origin, resolution, pixels):
+    "Half-open index range of the pixels whose centers lie within [lo, hi]"
+    first = np.ceil((lo - origin) / resolution - 0.5)
+    last = np.floor((hi - origin) / resolution - 0.5) + 1
+    return (np.clip(first, 0, pixels).astype(np.int64),
+            np.clip(last, 0, pixels).astype(np.int64))
+
+def _outline_pixels(run, x0, y0, resolution, pixels):
+    """
+    Get (feature, flat pixel index) of all pixels covered by outline features.
+    Crossings of the outline edges with the pixel rows are paired per
+    feature and row (even-odd rule), every pair fills the span in between.
+    """
+    outline = run.outline
+    ex0, ey0, ex1, ey1 = run.x0[outline], run.y0[outline], run.x1[outline], run.y1[outline]
+    # Rows whose center y lies in [min(ey0, ey1), max(ey0, ey1))
+    first = np.clip(np.ceil((np.minimum(ey0, ey1) - y0) / resolution - 0.5), 0, pixels)
+    stop = np.clip(np.ceil((np.maximum(ey0, ey1) - y0) / resolution - 0.5), 0, pixels)
+    edge, rows = expand_ranges(first.astype(np.int64), stop.astype(np.int64))
+    center = y0 + (rows + 0.5) * resolution
+    t = (center - ey0[edge]) / (ey1[edge] - ey0[edge])
+    crossing = ex0[edge] + t * (ex1[edge] - ex0[edge])
+    # First pixel right of the crossing
+    columns = np.clip(np.ceil((crossing - x0) / resolution - 0.5), 0, pixels).astype(np.int64)
+    owner = run.owner[outline][edge]
+    order = np.lexsort((crossing, rows, owner))
+    rows, columns, owner = rows[order], columns[order], owner[order]
+    span, local = expand_ranges(columns[0::2], columns[1::2])
+    return owner[0::2][span], rows[0::2][span] * pixels + local
+
+def _capsule_pixels(run, x0, y0, resolution, pixels):
+    "Get unique (feature, flat pixel index) of all pixels covered by capsule features"
+    capsule = ~run.outline
+    cx0, cy0, cx1, cy1 = run.x0[capsule], run.y0[capsule], run.x1[capsule], run.y1[capsule]
+    radius, owner = run.radius[capsule], run.owner[capsule]
+    c0, c1 = _pixel_range(np.minimum(cx0, cx1) - radius, np.maximum(cx0, cx1) + radius,
+                          x0, resolution, pixels)
+    r0, r1 = _pixel_range(np.minimum(cy0, cy1) - radius, np.maximum(cy0, cy1) + radius,
+                          y0, resolution, pixels)
+    width, height = np.maximum(c1 - c0, 0), np.maximum(r1 - r0, 0)
+    item, local = expand_ranges(np.zeros(len(width), dtype=np.int64), width * height)
+    columns = c0[item] + local % np.maximum(width[item], 1)
+    rows = r0[item] + local // np.maximum(width[item], 1)
+    distance = point_segment_distance(
+        x0 + (columns + 0.5) * resolution, y0 + (rows + 0.5) * resolution,
+        cx0[item], cy0[item], cx1[item], cy1[item])[0]
+    inside = distance <= radius[item]
+    # Features consisting of several capsules (arcs) cover every pixel once
+    codes = np.unique(owner[item[inside]] * (pixels * pixels) +
+                      rows[inside] * pixels + columns[inside])
+    return codes // (pixels * pixels), codes % (pixels * pixels)
+
+def composite_tile(primitives, polarities, bounds, resolution, pixels, coverage=False,
+                   layer_polarity=Polarity.Positive):
+    """
+    Render Primitives of all polarities (sorted by feature order) into a
+    pixels x pixels tile starting at the lower left corner of bounds.
+    polarities = Polarity values indexed by feature order
+    (see FeatureArrays.polarities()). Negative layers start out as copper.
+    Returns (copper bitmap, coverage) where coverage counts the positive
+    features drawn on every pixel (None unless requested).
+    """
+    x0, y0 = bounds[0], bounds[1]
+    copper = np.full(pixels * pixels, layer_polarity == Polarity.Negative)
+    counts = np.zeros(pixels * pixels, dtype=np.int32) if coverage else None
+    feature_polarity = polarities[primitives.owner]
+    # Runs of consecutive features with the same polarity
+    changes = np.flatnonzero(feature_polarity[1:] != feature_polarity[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    stops = np.concatenate((changes, [len(feature_polarity)]))
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        if start == stop:
+            continue
+        run = Primitives(*(column[start:stop] for column in primitives))
+        covered = np.concatenate((_outline_pixels(run, x0, y0, resolution, pixels)[1],
+                                  _capsule_pixels(run, x0, y0, resolution, pixels)[1]))
+        positive = feature_polarity[start] == Polarity.Positive.value
+        copper[covered] = positive
+        if coverage and positive:
+            counts += np.bincount(covered, minlength=pixels * pixels).astype(np.int32)
+    return copper.reshape(pixels, pixels), \
+           counts.reshape(pixels, pixels) if coverage else None
+
+def _composite_job(job):
+    "Process pool entry point for composite_tile()"
+    key, primitives, polarities, bounds, resolution, pixels, coverage, layer_polarity = job
+    return (key,) + composite_tile(Primitives(*primitives), polarities, bounds,
+                                   resolution, pixels, coverage, layer_polarity)
+
+def _tile_jobs(primitives, polarities, grid, coverage, layer_polarity):
+    "Generate the composite_tile() jobs with the primitives relevant for every tile"
+    xmin, ymin, xmax, ymax = primitives.extents()
+    # Scanlines need all edges of an outline on their rows, not only those in the tile
+    gxmin, _, gxmax, _ = grid.extents()
+    xmin = np.where(primitives.outline, np.minimum(xmin, gxmin), xmin)
+    xmax = np.where(primitives.outline, np.maximum(xmax, gxmax), xmax)
+    keys = grid.tiles()
+    bounds = np.array([grid.tile_bounds(*key) for key in keys])
+    size = grid.resolution * grid.tile_pixels
+    index = GridIndex(*bounds.T, cell_size=size)
+    items, tiles = index.query_pairs(xmin, ymin, xmax, ymax)
+    # Group by tile, keeping the feature order within every tile
+    order = np.lexsort((items, tiles))
+    items, tiles = items[order], tiles[order]
+    starts = np.searchsorted(tiles, np.arange(len(keys)))
+    stops = np.searchsorted(tiles, np.arange(len(keys)), side="right")
+    for i, key in enumerate(keys):
+        selected = items[starts[i]:stops[i]]
+        yield (key, tuple(column[selected] for column in primitives), polarities,
+               tuple(bounds[i]), grid.resolution, grid.tile_pixels, coverage, layer_polarity)
+
+def iter_primitive_tiles(primitives, polarities, grid, workers=None, coverage=False,
+                         layer_polarity=Polarity.Positive):
+    """
+    Composite Primitives (sorted by feature order) on a TileGrid.
+    polarities = Polarity values indexed by feature order.
+    Tiles are rendered in a process pool (see Utils.parallel_map() for workers).
+    Yields (tile key, copper, coverage) for every tile.
+    """
+    jobs = _tile_jobs(primitives, polarities, grid, coverage, layer_polarity)
+    yield from parallel_map(_composite_job, jobs, workers=workers)
+
+def iter_composite_tiles(features, resolution, tile_pixels=512, extents=None,
+                         workers=None, coverage=False, max_angle=10.,
+                         layer_polarity=Polarity.Positive):
+    """
+    Composite the features of FeatureArrays tile by tile.
+    resolution = pixel size in coordinate units,
+    extents = (xmin, ymin, xmax, ymax) to render (default: the feature extents).
+    The whole tile grid of a negative layer (see Layer.polarity) is copper
+    except where its positive features are drawn.
+    See iter_primitive_tiles() for the workers parameter.
+    First yields the TileGrid, then (tile key, copper, coverage) for every tile.
+    """
+    primitives = feature_primitives(features, max_angle, polarity=None)
+    if extents is None:
+        xmin, ymin, xmax, ymax = primitives.extents()
+        extents = (xmin.min(), ymin.min(), xmax.max(), ymax.max()) if len(primitives) \
+                  else (0., 0., 0., 0.)
+    grid = TileGrid.covering(*extents, resolution=resolution, tile_pixels=tile_pixels)
+    yield grid
+    for result in iter_primitive_tiles(primitives, features.polarities(layer_polarity),
+                                       grid, workers, coverage, layer_polarity):
+        yield result
+
+class CompositeLayer(namedtuple("CompositeLayer", ["grid", "copper", "coverage"])):
+    """
+    The composited copper of a layer.
+    grid = TileGrid, copper = dict tile key => bitmap,
+    coverage = dict tile key => positive feature count per pixel (or None)
+    """
+    def _mosaic(self, tiles):
+        pixels = self.grid.tile_pixels
+        rows, columns = self.grid.shape
+        result = np.zeros((rows * pixels, columns * pixels), dtype=next(iter(tiles.values())).dtype)
+        for (row, column), tile in tiles.items():
+            result[row * pixels:(row + 1) * pixels, column * pixels:(column + 1) * pixels] = tile
+        return result
+
+    def mosaic(self):
+        "Assemble the copper tiles into a single bitmap"
+        return self._mosaic(self.copper)
+
+    def overlaps(self):
+        "Get a bitmap of all pixels drawn by more than one positive feature"
+        if self.coverage is None:
+            raise ValueError("Overlap detection requires compositing with coverage=True")
+        return self._mosaic(self.coverage) > 1
+
+    def area(self):
+        "Get the copper area in square coordinate units"
+        return sum(int(tile.sum()) for tile in self.copper.values()) * self.grid.resolution ** 2
+
+    def regions(self):
+        "Label the connected copper regions across all tiles (see label_regions())"
+        return label_regions(self.mosaic())
+
+def _collect_tiles(grid, results, coverage):
+    "Build a CompositeLayer from (tile key, copper, coverage) results"
+    copper, counts = {}, {} if coverage else None
+    for key, tile, tile_coverage in results:
+        copper[key] = tile
+        if coverage:
+            counts[key] = tile_coverage
+    return CompositeLayer(grid, copper, counts)
+
+def composite_layer(features, resolution, tile_pixels=512, extents=None,
+                    workers=None, coverage=False, max_angle=10.,
+                    layer_polarity=Polarity.Positive):
+    """
+    Composite the features of FeatureArrays into a CompositeLayer.
+    See iter_composite_tiles() for the parameters.
+    """
+    results = iter_composite_tiles(features, resolution, tile_pixels, extents,
+                                   workers, coverage, max_angle, layer_polarity)
+    grid = next(results)
+    return _collect_tiles(grid, results, coverage)
+
+def composite_primitives(primitives, polarities, grid, workers=None, coverage=False):
+    """
+    Composite Primitives on a TileGrid into a CompositeLayer.
+    See iter_primitive_tiles() for the parameters.
+    """
+    return _collect_tiles(grid, iter_primitive_tiles(
+        primitives, polarities, grid, workers, coverage), coverage)
+
+def label_regions(bitmap):
+    """
+    Label the 4-connected regions of a bitmap.
+    Returns (labels, count) with labels -1 for empty pixels
+    and 0 .. count - 1 for the regions.
+    """
+    height, width = bitmap.shape
+    pixels = np.flatnonzero(bitmap)
+    node = np.full(bitmap.size, -1, dtype=np.int64)
+    node[pixels] = np.arange(len(pixels))
+    flat = node.reshape(height, width)
+    horizontal = bitmap[:, :-1] & bitmap[:, 1:]
+    vertical = bitmap[:-1, :] & bitmap[1:, :]
+    a = np.concatenate((flat[:, :-1][horizontal], flat[:-1, :][vertical]))
+    b = np.concatenate((flat[:, 1:][horizontal], flat[1:, :][vertical]))
+    components = connected_components(len(pixels), a, b)
+    labels = np.full(bitmap.size, -1, dtype=np.int64)
+    labels[pixels] = components
+    return labels.reshape(height, width), int(components.max(initial=-1)) + 1
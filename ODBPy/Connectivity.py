@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Connectivity extraction from the copper geometry
+"""
+from collections import namedtuple
+import numpy as np
+from .Clearance import layer_copper
+from .ColumnarNetlist import ColumnarNetlist, NO_NET, read_columnar_netlist
+from .DrillHits import read_drill_hits
+from .FeatureArrays import parse_feature_arrays
+from .Geometry import segment_distance, outlines_containing
+from .Graph import connected_components, propagate_labels
+from .Layers import LayerType, read_layer_features
+from .NetlistDiff import diff_netlists
+from .NetlistParser import NetSide
+from .SpatialIndex import GridIndex
+from .Structures import HolePlating, Polarity
+from .Utils import parallel_map
+
+__all__ = ["LayerConnectivity", "CopperNets", "touching_pairs", "features_at",
+           "layer_points", "netlist_feature_nets", "layer_connectivity", "connect_layers",
+           "copper_netlist", "compare_with_netlist", "read_copper_nets"]
+
+class LayerConnectivity(namedtuple("LayerConnectivity", [
+        "unit", "copper", "component", "count"])):
+    """
+    Connected copper of a single layer.
+    unit = coordinate unit, copper = Clearance.LayerCopper,
+    component = connected component for every feature order, followed by
+        the plane on negative layers (-1 for orders without copper),
+    count = number of components
+    """
+
+class CopperNets(namedtuple("CopperNets", ["layers", "offsets", "net", "count"])):
+    """
+    Nets derived from the copper of all layers.
+    layers = LayerConnectivity by copper layer position,
+    offsets = first node of every layer (the layer components are
+        numbered offsets[layer] + component, followed by the drill hits),
+    net = net number of every node, count = number of nets
+    """
+    def feature_nets(self, layer):
+        "Get the net of every feature order of a copper layer (-1 without copper)"
+        component = self.layers[layer].component
+        return np.where(component >= 0, self.net[self.offsets[layer] + component], -1)
+
+    def nets_at(self, layer, x, y, radius=0.):
+        """
+        Get the net at every query point of a copper layer
+        (-1 where no copper is within radius)
+        """
+        query, owner = _copper_at(self.layers[layer].copper, x, y, radius)
+        result = np.full(len(np.atleast_1d(x)), -1, dtype=np.int64)
+        result[query] = self.feature_nets(layer)[owner]
+        return result
+
+    def net_names(self, netlist):
+        """
+        Name every net after the ColumnarNetlist net with the most points
+        on its copper (see copper_netlist() for the point lookup). A netlist
+        net split over several nets only names the one with most of its
+        points. All other nets are named COPPER_<net>.
+        """
+        return _net_names(self, netlist, _point_nets(self, netlist))
+
+def _point_nets(nets, netlist):
+    """
+    Get the net of every netlist point (-1 without copper).
+    Points on both sides are looked up on the first copper layer
+    and, if there is no copper, on the last one.
+    """
+    count = len(nets.layers)
+    derived = np.full(len(netlist), -1, dtype=np.int64)
+    for layer in sorted({0, count - 1}):
+        points = layer_points(netlist, layer, count)
+        points = points[derived[points] < 0]
+        x, y = netlist.coordinates(nets.layers[layer].unit)
+        derived[points] = nets.nets_at(layer, x[points], y[points])
+    return derived
+
+def _net_names(nets, netlist, derived):
+    "Name the CopperNets given the net of every netlist point, see CopperNets.net_names()"
+    regular = (derived >= 0) & (netlist.netid >= 0)
+    names = ["COPPER_{}".format(net) for net in range(nets.count)]
+    if not np.any(regular):
+        return names
+    pairs, counts = np.unique(np.column_stack(
+        (derived[regular], netlist.net_index[regular])), axis=0, return_counts=True)
+    # The most frequent netlist net comes first for every copper net
+    order = np.lexsort((-counts, pairs[:, 0]))
+    pairs, counts = pairs[order], counts[order]
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:, 0] != pairs[:-1, 0]
+    pairs, counts = pairs[first], counts[first]
+    # The copper net with the most points comes first for every netlist net
+    pairs = pairs[np.lexsort((-counts, pairs[:, 1]))]
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:, 1] != pairs[:-1, 1]
+    for net, index in pairs[first].tolist():
+        names[net] = netlist.names[index]
+    return names
+
+def touching_pairs(primitives):
+    """
+    Find all pairs of features whose Primitives touch or overlap, including
+    features inside the filled outline of another feature.
+    Returns (a, b) feature order arrays with a < b.
+    """
+    owner, x0, y0, x1, y1, radius, _ = primitives
+    xmin, ymin, xmax, ymax = primitives.extents()
+    first, second = GridIndex(xmin, ymin, xmax, ymax).query_pairs(xmin, ymin, xmax, ymax)
+    keep = owner[first] < owner[second]
+    first, second = first[keep], second[keep]
+    distance = segment_distance(x0[first], y0[first], x1[first], y1[first],
+                                x0[second], y0[second], x1[second], y1[second])[0]
+    touching = distance <= radius[first] + radius[second]
+    a, b = owner[first[touching]], owner[second[touching]]
+    # Features without touching edges may lie inside an outline:
+    # test one point of every feature
+    features, starts = np.unique(owner, return_index=True)
+    query, container = outlines_containing(primitives, x0[starts], y0[starts])
+    inner = features[query]
+    keep = inner != container
+    a = np.concatenate((a, np.minimum(inner, container)[keep]))
+    b = np.concatenate((b, np.maximum(inner, container)[keep]))
+    if len(a) == 0:
+        return a.astype(np.int64), b.astype(np.int64)
+    pairs = np.unique(np.column_stack((a, b)), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+def features_at(primitives, x, y, radius=0.):
+    """
+    Find the features whose Primitives touch circles of the given radius
+    (a number or one per point) around the query points.
+    Returns (query index, feature order) pairs.
+    """
+    x, y = np.atleast_1d(np.asarray(x, dtype=float)), np.atleast_1d(np.asarray(y, dtype=float))
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)
+    owner, x0, y0, x1, y1, reach, _ = primitives
+    xmin, ymin, xmax, ymax = primitives.extents()
+    query, items = GridIndex(xmin, ymin, xmax, ymax).query_pairs(
+        x - radius, y - radius, x + radius, y + radius)
+    distance = segment_distance(x[query], y[query], x[query], y[query],
+                                x0[items], y0[items], x1[items], y1[items])[0]
+    hit = distance <= radius[query] + reach[items]
+    inside, container = outlines_containing(primitives, x, y)
+    query = np.concatenate((query[hit], inside))
+    found = np.concatenate((owner[items[hit]], container))
+    if len(query) == 0:
+        return query.astype(np.int64), found.astype(np.int64)
+    pairs = np.unique(np.column_stack((query, found)), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+def _copper_at(copper, x, y, radius=0.):
+    "Like features_at(), but for the copper features of a LayerCopper"
+    query, owner = features_at(copper.primitives, x, y, radius)
+    keep = ~copper.cleared_at(query, owner, x, y, radius)
+    return query[keep], owner[keep]
+
+def _copper_pairs(copper):
+    "Get the pairs of touching copper features of a LayerCopper not separated by clearing"
+    a, b = touching_pairs(copper.primitives)
+    keep = ~copper.cleared_pairs(a, b)
+    return a[keep], b[keep]
+
+def layer_connectivity(features, max_angle=10., layer_polarity=Polarity.Positive):
+    """
+    Find the connected copper of FeatureArrays (see Clearance.layer_copper()).
+    Copper is only separated by a clearing feature (e.g. an antipad cut
+    into a pour) where one of the features lies entirely inside it.
+    """
+    copper = layer_copper(features, max_angle, layer_polarity)
+    a, b = _copper_pairs(copper)
+    size = max(len(features.polarities()), copper.plane + 1)
+    orders = np.unique(copper.primitives.owner)
+    # Compact node numbers for the features with copper
+    node = np.full(size, -1, dtype=np.int64)
+    node[orders] = np.arange(len(orders))
+    components = connected_components(len(orders), node[a], node[b])
+    component = np.full(size, -1, dtype=np.int64)
+    component[orders] = components
+    return LayerConnectivity(features.unit, copper, component,
+                             int(components.max(initial=-1)) + 1)
+
+def layer_points(netlist, position, count):
+    """
+    Get the indices of the netlist points on a copper layer given by its position
+    in a stackup of count copper layers: top side points lie on the first layer,
+    bottom side points on the last one and points on both sides on every layer
+    """
+    side = netlist.side
+    mask = side == NetSide.Both.value
+    if position == 0:
+        mask |= side == NetSide.Top.value
+    if position == count - 1:
+        mask |= side == NetSide.Bottom.value
+    return np.flatnonzero(mask)
+
+def netlist_feature_nets(features, netlist, position, count, max_angle=10.,
+                         layer_polarity=Polarity.Positive):
+    """
+    Get the netlist net (index into netlist.nets) of every feature order of
+    the FeatureArrays of a copper layer, followed by the plane on negative
+    layers (see layer_points() for position and count, layer_connectivity()
+    for the copper).
+    Features under a netlist point take its net (pads under several points
+    the net of the point closest to their center), which then spreads to
+    the touching features, so where the copper of two nets touches, the
+    touching features have different nets. Features not connected to any
+    netlist point get -1.
+    """
+    copper = layer_copper(features, max_angle, layer_polarity)
+    points = layer_points(netlist, position, count)
+    # Tooling holes and points without a net do not name the copper
+    points = points[netlist.netid[points] >= 0]
+    x, y = (column[points] for column in netlist.coordinates(features.unit))
+    query, owner = _copper_at(copper, x, y)
+    size = max(len(features.polarities()), copper.plane + 1)
+    pads = features.pads
+    center_x, center_y = np.zeros(size), np.zeros(size)
+    center_x[pads.order], center_y[pads.order] = pads.x, pads.y
+    is_pad = np.zeros(size, dtype=bool)
+    is_pad[pads.order] = True
+    offset = np.where(is_pad[owner], np.hypot(x[query] - center_x[owner],
+                                              y[query] - center_y[owner]), 0.)
+    # The closest point of every feature wins
+    order = np.lexsort((offset, owner))
+    owner, query = owner[order], query[order]
+    first = np.unique(owner, return_index=True)[1]
+    nets = np.full(size, -1, dtype=np.int64)
+    nets[owner[first]] = netlist.net_index[points[query[first]]]
+    return propagate_labels(nets, *_copper_pairs(copper))
+
+def connect_layers(layers, drills):
+    """
+    Join the LayerConnectivity of all copper layers (by position) through
+    drill hits: drills = list of (DrillHits, spanned copper positions).
+    Non-plated holes do not connect. Returns CopperNets.
+    """
+    offsets = np.cumsum([0] + [layer.count for layer in layers])
+    a, b = [], []
+    node = int(offsets[-1])
+    for hits, positions in drills:
+        non_plated = [i for i, tool in enumerate(hits.tools)
+                      if tool.type == HolePlating.NonPlated]
+        plated = np.flatnonzero(~np.isin(hits.tool, non_plated))
+        for position in positions:
+            # The plated barrel connects all copper within the hole radius
+            unit = layers[position].unit
+            radius = np.nan_to_num(hits.radius(unit)[plated])
+            x, y = hits.coordinates(unit)
+            query, owner = _copper_at(layers[position].copper,
+                                      x[plated], y[plated], radius)
+            a.append(node + query)
+            b.append(offsets[position] + layers[position].component[owner])
+        node += len(plated)
+    a = np.concatenate(a) if a else np.zeros(0, dtype=np.int64)
+    b = np.concatenate(b) if b else np.zeros(0, dtype=np.int64)
+    net = connected_components(node, a, b)
+    return CopperNets(layers, offsets, net, int(net.max(initial=-1)) + 1)
+
+def copper_netlist(nets, netlist):
+    """
+    Build a ColumnarNetlist with the points of a netlist, but with the nets
+    derived from the copper (CopperNets). Top side points are looked up on
+    the first copper layer, bottom side points on the last one and points on
+    both sides on the first one and, if there is no copper, on the last one.
+    Points without copper get no net ($NONE$). The nets are named after
+    the netlist nets (see CopperNets.net_names()).
+    """
+    derived = _point_nets(nets, netlist)
+    names = _net_names(nets, netlist, derived)
+    derived[derived < 0] = NO_NET
+    return ColumnarNetlist(derived, netlist.radius, netlist.x, netlist.y, netlist.side,
+                           netlist.exposure, netlist.flags, netlist.testside,
+                           dict(enumerate(names)), netlist.unit)
+
+def compare_with_netlist(nets, netlist, tolerance=1e-4):
+    """
+    Compare CopperNets with a ColumnarNetlist (see diff_netlists()):
+    opens are netlist nets split into several copper nets,
+    shorts are copper nets joining several netlist nets.
+    """
+    return diff_netlists(netlist, copper_netlist(nets, netlist), tolerance)
+
+def _read_layer_connectivity(directory, layer, polarity):
+    "Read a copper layer and find its connected copper"
+    return layer_connectivity(parse_feature_arrays(read_layer_features(directory, layer)),
+                              layer_polarity=polarity)
+
+def read_copper_nets(directory, layers, workers=None, by="size"):
+    """
+    Derive the nets of a LayerSet from its copper and drill layers.
+    The copper layers are processed in a process pool
+    (see Utils.parallel_map() for workers).
+    Returns (CopperNets, NetlistDiff against the CAD netlist)
+    """
+    stackup = layers.stackup()
+    copper = stackup.copper_layers
+    connectivity = list(parallel_map(_read_layer_connectivity, [directory] * len(copper),
+                                     [layer.name for layer in copper],
+                                     [layer.polarity for layer in copper], workers=workers))
+    drills = [(read_drill_hits(directory, drill.name, by), stackup.span_positions(drill))
+              for drill in stackup.layers.by_type(LayerType.Drill)]
+    nets = connect_layers(connectivity, drills)
+    return nets, compare_with_netlist(nets, read_columnar_netlist(directory))
@@ -12,17 +12,20 @@ from collections import namedtuple
 
 __all__ = ["run_decoder", "run_decoder_on_line", "DecoderOption"]
 
-class DecoderOption(namedtuple("DecoderOption", ["regex", "function"])):
+class DecoderOption(namedtuple("DecoderOption", ["regex", "function", "matcher"],
+                                 defaults=[None])):
     """
     A regex that might match a line and a function to process
-    the match into a tag process. The function is unary and takes only the match
+    the match into a tag process. The function is unary and takes only the match.
+    Instead of a regex, a matcher function taking the line
+    and returning a match or None may be given.
     """
     def run(self, line):
         """
-        Run the decoder option on a string (using re search).
+        Run the decoder option on a string (using the matcher or re search).
         Returns function(match) if there is a match and None else
         """
-        match = self.regex.search(line)
+        match = self.matcher(line) if self.matcher is not None else self.regex.search(line)
         return self.function(match) if match is not None else None
 
 def run_decoder_on_line(line, opts):
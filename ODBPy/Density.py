@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Copper area and density maps on a regular grid of cells
+"""
+from collections import namedtuple
+import numpy as np
+from .Composite import iter_composite_tiles
+from .FeatureArrays import parse_feature_arrays
+from .Layers import copper_layer_types, read_layer_features
+from .Profile import read_profile
+from .Raster import profile_extents
+from .Structures import Polarity
+from .Utils import parallel_map
+
+__all__ = ["DensityMap", "copper_density", "read_copper_density"]
+
+class DensityMap(namedtuple("DensityMap", ["xmin", "ymin", "cell_size", "area"])):
+    """
+    Copper area per grid cell.
+    area = 2D array indexed [row, column] with row 0 at ymin,
+    in square coordinate units
+    """
+    def density(self):
+        "Get the copper fraction (0 .. 1) of every cell"
+        return self.area / self.cell_size ** 2
+
+    def total_area(self):
+        "Get the total copper area"
+        return float(self.area.sum())
+
+    def cell_bounds(self, row, column):
+        "Get (xmin, ymin, xmax, ymax) of a cell"
+        x0 = self.xmin + column * self.cell_size
+        y0 = self.ymin + row * self.cell_size
+        return (x0, y0, x0 + self.cell_size, y0 + self.cell_size)
+
+def copper_density(features, cell_size, resolution, extents=None, workers=None,
+                   tile_pixels=512, layer_polarity=Polarity.Positive):
+    """
+    Compute the DensityMap of FeatureArrays.
+    cell_size, resolution = in coordinate units. The resolution is reduced
+    so that a cell consists of a whole number of pixels.
+    extents = (xmin, ymin, xmax, ymax) to cover (default: the feature extents).
+    See iter_composite_tiles() for workers and layer_polarity.
+    """
+    cell_pixels = max(int(np.ceil(cell_size / resolution)), 1)
+    resolution = cell_size / cell_pixels
+    # Tiles consist of whole cells
+    tile_cells = max(tile_pixels // cell_pixels, 1)
+    results = iter_composite_tiles(features, resolution, tile_cells * cell_pixels,
+                                   extents, workers, layer_polarity=layer_polarity)
+    grid = next(results)
+    area = np.zeros((grid.shape[0] * tile_cells, grid.shape[1] * tile_cells))
+    for (row, column), copper, _ in results:
+        cells = copper.reshape(tile_cells, cell_pixels, tile_cells, cell_pixels).sum(axis=(1, 3))
+        area[row * tile_cells:(row + 1) * tile_cells,
+             column * tile_cells:(column + 1) * tile_cells] = cells * resolution ** 2
+    return DensityMap(grid.xmin, grid.ymin, cell_size, area)
+
+def _layer_density(directory, layer, polarity, cell_size, resolution, profile):
+    "Compute the DensityMap of a single layer, covering the profile if given"
+    features = parse_feature_arrays(read_layer_features(directory, layer))
+    extents = None if profile is None else profile_extents(profile, features.unit)
+    return copper_density(features, cell_size, resolution, extents, workers=1,
+                          layer_polarity=polarity)
+
+def read_copper_density(directory, layers, cell_size, resolution, workers=None):
+    """
+    Compute the DensityMap of every copper layer of the given LayerSet in a
+    process pool (see Utils.parallel_map() for workers).
+    All maps cover the board profile, so their cells line up.
+    Returns a dict layer name => DensityMap
+    """
+    copper = [layer for layer in layers if layer.type in copper_layer_types]
+    names = [layer.name for layer in copper]
+    profile = read_profile(directory)
+    args = [[directory] * len(names), names, [layer.polarity for layer in copper],
+            [cell_size] * len(names), [resolution] * len(names), [profile] * len(names)]
+    return dict(zip(names, list(parallel_map(_layer_density, *args, workers=workers))))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Drill hits of ODB++ drill layers, joined to the layer's drill tools
+"""
+from collections import namedtuple
+import numpy as np
+from .DrillTools import read_drill_tools, tool_size_unit
+from .FeatureArrays import parse_feature_arrays
+from .Layers import LayerType, read_layer_features
+from .StandardSymbols import parse_standard_symbol, Round, Square, Hole
+from .Structures import PointArray
+from .Units import symbol_unit, to_mil, to_mm, to_inch
+
+__all__ = ["DrillHits", "join_drill_hits", "read_drill_hits", "read_all_drill_hits"]
+
+class DrillHits(namedtuple("DrillHits", ["layer", "x", "y", "diameter", "tool", "tools", "unit"],
+                           defaults=["INCH"])):
+    """
+    The hits of a drill layer.
+    x, y = hit coordinates (in the layer unit, INCH or MM)
+    diameter = hole diameter in mil (NaN for non-round symbols)
+    tool = index into tools for every hit (-1 if no tool matches)
+    tools = list of DrillTool, sorted by tool number
+    """
+    def __len__(self):
+        return len(self.x)
+
+    def locations(self):
+        "Get the hit locations as a PointArray"
+        return PointArray.from_xy(self.x, self.y)
+
+    def coordinates(self, unit):
+        "Get the (x, y) hit columns converted to the given coordinate unit"
+        scale = to_mm(1., self.unit) / to_mm(1., unit)
+        return self.x * scale, self.y * scale
+
+    def hits_per_tool(self):
+        "Get a dict tool number => number of hits"
+        counts = np.bincount(self.tool[self.tool >= 0], minlength=len(self.tools))
+        return {tool.num: int(count) for tool, count in zip(self.tools, counts)}
+
+    def radius(self, unit):
+        "Get the hole radii in the given coordinate unit (INCH or MM)"
+        if unit.upper() == "MM":
+            return to_mm(self.diameter, "MIL") / 2.
+        return to_inch(self.diameter, "MIL") / 2.
+
+    def unmatched(self):
+        "Get the indices of all hits without a matching tool"
+        return np.flatnonzero(self.tool < 0)
+
+    def drill_time(self, seconds_per_hit=1., seconds_per_tool_change=30.):
+        """
+        Estimate the drilling time in seconds: the time per hit (a number
+        or a dict tool number => seconds, which skips hits without a tool)
+        times the hits plus one tool change per tool in use.
+        """
+        counts = self.hits_per_tool()
+        tool_changes = sum(1 for count in counts.values() if count)
+        if isinstance(seconds_per_hit, dict):
+            hit_time = sum(seconds_per_hit[num] * count for num, count in counts.items() if count)
+        else:
+            hit_time = seconds_per_hit * len(self)
+        return hit_time + seconds_per_tool_change * tool_changes
+
+    def plating_counts(self):
+        "Get a dict HolePlating => number of hits (hits without a tool are not counted)"
+        counts = self.hits_per_tool()
+        result = {}
+        for tool in self.tools:
+            result[tool.type] = result.get(tool.type, 0) + counts[tool.num]
+        return result
+
+    def density(self, bins=10, extents=None):
+        """
+        Compute a 2D hit histogram with the given number of bins
+        (an int or (xbins, ybins)) over the given (xmin, ymin, xmax, ymax)
+        or the hit extents. Returns (histogram, xedges, yedges)
+        like numpy.histogram2d(), histogram[i, j] counting the hits
+        of x bin i and y bin j.
+        """
+        value_range = None
+        if extents is not None:
+            xmin, ymin, xmax, ymax = extents
+            value_range = ((xmin, xmax), (ymin, ymax))
+        return np.histogram2d(self.x, self.y, bins=bins, range=value_range)
+
+def _symbol_diameter(name):
+    "Get the hole diameter of a symbol name (in symbol units) or NaN"
+    symbol = parse_standard_symbol(name) if name is not None else None
+    if isinstance(symbol, (Round, Hole)):
+        return symbol.diameter
+    if isinstance(symbol, Square):
+        return symbol.side
+    return np.nan
+
+def _match_by_size(diameters, sizes, tolerance):
+    "Index of the tool with the closest size for every diameter or -1"
+    if len(sizes) == 0:
+        return np.full(len(diameters), -1, dtype=np.int64)
+    order = np.argsort(sizes, kind="stable")
+    sorted_sizes = sizes[order]
+    # Compare to the neighbours on both sides of the insertion point
+    pos = np.searchsorted(sorted_sizes, diameters)
+    lower = np.clip(pos - 1, 0, len(sizes) - 1)
+    upper = np.clip(pos, 0, len(sizes) - 1)
+    use_upper = np.abs(sorted_sizes[upper] - diameters) < np.abs(sorted_sizes[lower] - diameters)
+    best = np.where(use_upper, upper, lower)
+    found = np.abs(sorted_sizes[best] - diameters) <= tolerance
+    return np.where(found, order[best], -1)
+
+def _match_by_number(symbols, tools, offset):
+    "Index of the tool with number symbol + offset for every hit or -1"
+    lut = {tool.num - offset: i for i, tool in enumerate(tools)}
+    return np.array([lut.get(symbol, -1) for symbol in symbols.tolist()], dtype=np.int64)
+
+def join_drill_hits(layer, features, toolset, by="size", tolerance=0.1, number_offset=1):
+    """
+    Join the pads of parsed FeatureArrays of a drill layer to a DrillToolSet.
+    by="size": Match the symbol diameter to the closest tool size
+        at most tolerance (in mil) away
+    by="number": Match symbol number n to tool number n + number_offset.
+        The file format does not link the two numberings; tools are
+        numbered from 1 and symbols from 0, so exporters that write
+        one symbol per tool in the same order use an offset of 1.
+    """
+    tools = sorted(toolset.tools.values(), key=lambda tool: tool.num) \
+            if toolset is not None else []
+    sizes = to_mil(np.array([float(tool.size) for tool in tools], dtype=float),
+                   tool_size_unit(toolset)) if tools else np.zeros(0)
+    pads = features.pads
+    symbol_diameters = {
+        num: to_mil(_symbol_diameter(name), symbol_unit(features.unit))
+        for num, name in features.symbols.items()
+    }
+    diameter = np.array([symbol_diameters.get(num, np.nan) for num in pads.symbol.tolist()],
+                        dtype=float)
+    if by == "size":
+        tool = _match_by_size(diameter, sizes, tolerance)
+    elif by == "number":
+        tool = _match_by_number(pads.symbol, tools, number_offset)
+    else:
+        raise ValueError("Invalid drill tool matching: {}".format(by))
+    return DrillHits(layer, pads.x, pads.y, diameter, tool, tools, features.unit)
+
+def read_drill_hits(directory, layer, by="size", tolerance=0.1, number_offset=1):
+    """
+    Read the hits of a drill layer (by name) of the given ODB++ directory
+    and join them to the tools of that layer
+    """
+    features = parse_feature_arrays(read_layer_features(directory, layer))
+    try:
+        toolset = read_drill_tools(directory, layer)
+    except FileNotFoundError:
+        toolset = None
+    return join_drill_hits(layer, features, toolset, by, tolerance, number_offset)
+
+def read_all_drill_hits(directory, layers, by="size", tolerance=0.1, number_offset=1):
+    """
+    Read the hits of every drill layer of the given LayerSet.
+    Returns a dict layer name => DrillHits
+    """
+    return {
+        layer.name: read_drill_hits(directory, layer.name, by, tolerance, number_offset)
+        for layer in layers.by_type(LayerType.Drill)
+    }
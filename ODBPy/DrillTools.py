@@ -7,14 +7,16 @@ import gzip
 from collections import namedtuple, defaultdict
 import os.path
 from enum import Enum
-from .Utils import readFileLines 
+from .Utils import readFileLines, step_directory
 from .StructuredTextParser import read_structured_text
 from .Structures import HolePlating
+from .Units import symbol_unit
 
-__all__ = ["DrillToolSet", "DrillTool", "DrillToolType", "parse_drill_tools", "read_drill_tools"]
+__all__ = ["DrillToolSet", "DrillTool", "DrillToolType", "parse_drill_tools", "read_drill_tools",
+           "tool_size_unit"]
 
 DrillToolSet = namedtuple("DrillToolSet", ["metadata", "tools"])
-DrillTool = namedtuple("DrillTool", ["num", "type", "tooltype", "size", "info"]) # size in mil
+DrillTool = namedtuple("DrillTool", ["num", "type", "tooltype", "size", "info"]) # size: see tool_size_unit()
 
 _drill_plating_map = {
     "VIA": HolePlating.Via,
@@ -59,7 +61,14 @@ def parse_drill_tools(structured_text):
     }
     return DrillToolSet(metadata, toolmap)
 
-def read_drill_tools(odbpath):
-    "Read the drill tools from a given ODB++ directory"
-    stext = read_structured_text(os.path.join(odbpath, "steps/pcb/layers/through_drill/tools"))
+def tool_size_unit(toolset):
+    """
+    Get the unit of the tool sizes of a DrillToolSet: "UM" if its UNITS are MM,
+    "MIL" for INCH (the default if UNITS is missing)
+    """
+    return symbol_unit(str(toolset.metadata.get("UNITS", "INCH")))
+
+def read_drill_tools(odbpath, layer="through_drill", step="pcb"):
+    "Read the drill tools of a drill layer (by default through_drill) from a given ODB++ directory"
+    stext = read_structured_text(os.path.join(step_directory(odbpath, step), "layers", layer, "tools"))
     return parse_drill_tools(stext)
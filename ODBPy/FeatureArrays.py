@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar decoding of ODB++ layer feature files
+"""
+from collections import namedtuple
+import numpy as np
+from .Decoder import run_decoder
+from .Features import parse_symbol_names
+from .PolygonParser import polygon_decoder_options, polygon_treeify_rules
+from .SurfaceParser import surface_decoder_options, surface_treeify_rules
+from .Structures import Polarity, Mirror, PointArray
+from .Treeifier import treeify
+from .Units import find_unit
+
+__all__ = ["FeatureArrays", "PadArrays", "LineArrays", "ArcArrays",
+           "parse_feature_arrays"]
+
+class PadArrays(namedtuple("PadArrays", [
+        "order", "x", "y", "symbol", "resize", "polarity", "dcode", "mirror", "angle"])):
+    """
+    Pad columns. symbol = symbol number, polarity = Polarity values,
+    mirror = Mirror values, angle in degrees
+    """
+    def __len__(self):
+        return len(self.order)
+
+    def locations(self):
+        "Get the pad locations as a PointArray"
+        return PointArray.from_xy(self.x, self.y)
+
+class LineArrays(namedtuple("LineArrays", [
+        "order", "xs", "ys", "xe", "ye", "symbol", "polarity", "dcode"])):
+    """Line columns. polarity = Polarity values"""
+    def __len__(self):
+        return len(self.order)
+
+class ArcArrays(namedtuple("ArcArrays", [
+        "order", "xs", "ys", "xe", "ye", "xc", "yc", "symbol", "polarity",
+        "dcode", "clockwise"])):
+    """Arc columns. polarity = Polarity values, clockwise = bool"""
+    def __len__(self):
+        return len(self.order)
+
+class FeatureArrays(namedtuple("FeatureArrays", [
+        "unit", "symbols", "pads", "lines", "arcs", "surfaces"])):
+    """
+    All features of a layer feature file.
+    unit = coordinate unit ("INCH" or "MM")
+    symbols = dict of symbol number => symbol name
+    surfaces = list of (order, Surface)
+    """
+    def polarities(self, layer_polarity=Polarity.Positive):
+        """
+        Get the Polarity values of all features indexed by feature order
+        (0 for orders that are no feature, like polygon lines of surfaces).
+        The features of a negative layer (see Layer.polarity) are drawn
+        on a copper background, so their polarities are flipped.
+        """
+        surface_orders = [order for order, _ in self.surfaces]
+        size = max([int(arrays.order.max()) for arrays in (self.pads, self.lines, self.arcs)
+                    if len(arrays)] + surface_orders + [-1]) + 1
+        result = np.zeros(size, dtype=np.int8)
+        for arrays in (self.pads, self.lines, self.arcs):
+            result[arrays.order] = arrays.polarity
+        for order, surface in self.surfaces:
+            result[order] = surface.polarity.value
+        if layer_polarity == Polarity.Negative:
+            flipped = Polarity.Positive.value + Polarity.Negative.value - result
+            result = np.where(result > 0, flipped, 0).astype(np.int8)
+        return result
+
+# Old style pad orientation codes 0..7 => (mirror, angle)
+_old_orientations = {
+    str(code): (Mirror.No.value if code < 4 else Mirror.MirrorX.value, 90. * (code % 4))
+    for code in range(8)
+}
+_mirror_codes = {"8": Mirror.No.value, "9": Mirror.MirrorX.value}
+_polarity_codes = {"P": Polarity.Positive.value, "N": Polarity.Negative.value}
+
+def _split_pad(order, tokens):
+    "(order, x, y, symbol, resize, polarity, dcode, mirror, angle) of a P record"
+    if tokens[3] == "-1": # Long aperture syntax: -1 <sym> <resize factor>
+        symbol, resize, rest = tokens[4], tokens[5], tokens[6:]
+    else:
+        symbol, resize, rest = tokens[3], 1., tokens[4:]
+    polarity, dcode, orient = rest[0], rest[1], rest[2]
+    if orient in _mirror_codes:
+        mirror, angle = _mirror_codes[orient], rest[3]
+    else:
+        mirror, angle = _old_orientations[orient]
+    return (order, tokens[1], tokens[2], symbol, resize,
+            _polarity_codes[polarity], dcode, mirror, angle)
+
+def _split_line(order, tokens):
+    "(order, xs, ys, xe, ye, symbol, polarity, dcode) of a L record"
+    return (order, tokens[1], tokens[2], tokens[3], tokens[4], tokens[5],
+            _polarity_codes[tokens[6]], tokens[7])
+
+def _split_arc(order, tokens):
+    "(order, xs, ys, xe, ye, xc, yc, symbol, polarity, dcode, clockwise) of an A record"
+    return (order, tokens[1], tokens[2], tokens[3], tokens[4], tokens[5], tokens[6],
+            tokens[7], _polarity_codes[tokens[8]], tokens[9], tokens[10] == "Y")
+
+# dtype of every column (in namedtuple field order)
+_pad_dtypes = (np.int64, float, float, np.int64, float, np.int8, np.int64, np.int8, float)
+_line_dtypes = (np.int64, float, float, float, float, np.int64, np.int8, np.int64)
+_arc_dtypes = (np.int64, float, float, float, float, float, float, np.int64, np.int8,
+               np.int64, bool)
+
+def _columns(cls, rows, dtypes):
+    "Build a column namedtuple from a list of row tuples"
+    columns = list(zip(*rows)) or [()] * len(dtypes)
+    return cls(*(np.array(column, dtype=dtype) for column, dtype in zip(columns, dtypes)))
+
+def _decode_surface(lines):
+    "Decode the lines of a single S ... SE block into a Surface"
+    options = surface_decoder_options + polygon_decoder_options
+    tree = treeify(run_decoder(lines, options), surface_treeify_rules + polygon_treeify_rules)
+    return tree[0]
+
+def parse_feature_arrays(linerecords):
+    """
+    Decode the "Layer features" section of a feature linerecord dict into FeatureArrays.
+    The unit is taken from the "U MM" or "UNITS=MM" line preceding the features
+    and defaults to INCH if the file has no unit line.
+    """
+    unit = find_unit(line for section, lines in linerecords.items()
+                     if section != "Layer features" for line in lines)
+    pads, lines, arcs, surfaces = [], [], [], []
+    surface_lines = None
+    for order, line in enumerate(linerecords.get("Layer features", [])):
+        if surface_lines is not None: # Inside a S ... SE block
+            surface_lines.append(line)
+            if line.startswith("SE"):
+                surfaces.append((surface_start, _decode_surface(surface_lines)))
+                surface_lines = None
+            continue
+        tokens = line.partition(";")[0].split()
+        if not tokens:
+            continue
+        kind = tokens[0]
+        if kind == "P":
+            pads.append(_split_pad(order, tokens))
+        elif kind == "L":
+            lines.append(_split_line(order, tokens))
+        elif kind == "A":
+            arcs.append(_split_arc(order, tokens))
+        elif kind == "S":
+            surface_start, surface_lines = order, [line]
+    return FeatureArrays(unit, parse_symbol_names(linerecords),
+                         _columns(PadArrays, pads, _pad_dtypes),
+                         _columns(LineArrays, lines, _line_dtypes),
+                         _columns(ArcArrays, arcs, _arc_dtypes),
+                         surfaces)
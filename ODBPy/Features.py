@@ -5,7 +5,7 @@ ODB++ feature info parser
 """
 from collections import namedtuple
 
-__all__ = ["FeatureInfo", "parse_feature_info"]
+__all__ = ["FeatureInfo", "parse_feature_info", "parse_symbol_names"]
 
 class FeatureInfo(namedtuple("FeatureInfo", ["symbol_names", "attribute_names", "strings"])):
     def apply(self, attributes):
@@ -30,3 +30,15 @@ def parse_feature_info(linerecords):
         parse_feature_map(linerecords["Feature attribute names"]),
         parse_feature_map(linerecords["Feature attribute text strings"])
     )
+
+def parse_symbol_names(linerecords):
+    """
+    Parse only the symbol name table ($0 r40 ...) of a feature linerecord dict.
+    Returns a dict of symbol number => symbol name.
+    Works also for files without a "Feature symbol names" section header,
+    in which case the table is taken from the headerless lines.
+    """
+    if "Feature symbol names" in linerecords:
+        return parse_feature_map(linerecords["Feature symbol names"])
+    return parse_feature_map(
+        line for line in linerecords.get(None, []) if line.startswith("$"))
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized geometry helpers for decoded layer features
+"""
+import functools
+import math
+from collections import namedtuple
+import numpy as np
+from .PolygonParser import PolygonCircle, CircleDirection, PolygonType
+from .SpatialIndex import GridIndex, expand_ranges
+from .StandardSymbols import parse_standard_symbol, Round, Square, Rectangle, Oval, Hole, \
+     Ellipse, Diamond, Octagon, HorizontalHexagon, VerticalHexagon, Triangle, HalfOval, \
+     Butterfly, SquareButterfly, RoundDonut, SquareDonut, SquareRoundDonut, RectangleDonut, \
+     OvalDonut, RoundThermalRounded, RoundThermalSquared, SquareThermal, \
+     SquareThermalOpenCorners, SquareRoundThermal, RectangularThermal, \
+     RectangularThermalOpenCorners, OvalThermal, OvalThermalOpenCorners
+
+__all__ = ["SHAPE_OTHER", "SHAPE_ROUND", "SHAPE_RECT", "SHAPE_OVAL",
+           "symbol_shape", "symbol_shapes", "symbol_areas", "symbol_outlines", "shape_areas", "pad_shapes",
+           "pad_areas", "distance_inside", "rotate",
+           "point_segment_distance", "segment_distance", "arc_sweeps", "tessellate_arcs",
+           "points_in_edges", "surface_edges", "polygon_edges", "box_outlines",
+           "Primitives", "PolygonLocator", "inside_outlines", "outlines_containing",
+           "primitives_inside", "step_area_length",
+           "polygons_area", "outlines_area"]
+
+SHAPE_OTHER = -1 # Symbols without a simple shape (donuts, thermals, user symbols...)
+SHAPE_ROUND = 0
+SHAPE_RECT = 1
+SHAPE_OVAL = 2
+
+class Primitives(namedtuple("Primitives", [
+        "owner", "x0", "y0", "x1", "y1", "radius", "outline"])):
+    """
+    Distance primitives: segments with a radius (capsules, or points for
+    zero length segments) and radius-free outline edges of filled polygons.
+    owner = feature order (see FeatureArrays),
+    outline = True for outline edges
+    """
+    def __len__(self):
+        return len(self.owner)
+
+    @classmethod
+    def capsules(cls, owner, x0, y0, x1, y1, radius):
+        "Build capsule primitives"
+        return cls(owner, x0, y0, x1, y1, radius, np.zeros(len(owner), dtype=bool))
+
+    @classmethod
+    def edges(cls, owner, x0, y0, x1, y1):
+        "Build outline primitives from closed edge sets"
+        return cls(owner, x0, y0, x1, y1, np.zeros(len(x0)), np.ones(len(x0), dtype=bool))
+
+    @classmethod
+    def outlines(cls, owner, vertices):
+        "Build outline primitives from an (N, K, 2) array of polygons with the given owners"
+        polygon, x0, y0, x1, y1 = polygon_edges(vertices)
+        return cls.edges(owner[polygon], x0, y0, x1, y1)
+
+    @classmethod
+    def concatenate(cls, parts):
+        "Concatenate Primitives and sort them by owner"
+        columns = [np.concatenate(column) for column in zip(*parts)]
+        columns[0] = columns[0].astype(np.int64)
+        order = np.argsort(columns[0], kind="stable")
+        return cls(*(column[order] for column in columns))
+
+    def extents(self):
+        "Get the (xmin, ymin, xmax, ymax) arrays of every primitive"
+        return (np.minimum(self.x0, self.x1) - self.radius,
+                np.minimum(self.y0, self.y1) - self.radius,
+                np.maximum(self.x0, self.x1) + self.radius,
+                np.maximum(self.y0, self.y1) + self.radius)
+
+@functools.lru_cache(maxsize=None)
+def symbol_shape(name):
+    """
+    Get (shape code, width, height) of a symbol name (in symbol units).
+    Symbols without a simple shape yield (SHAPE_OTHER, NaN, NaN).
+    """
+    symbol = parse_standard_symbol(name) if name is not None else None
+    if isinstance(symbol, (Round, Hole)):
+        return SHAPE_ROUND, symbol.diameter, symbol.diameter
+    if isinstance(symbol, Square):
+        return SHAPE_RECT, symbol.side, symbol.side
+    if isinstance(symbol, Rectangle):
+        return SHAPE_RECT, symbol.width, symbol.height
+    if isinstance(symbol, Oval):
+        return SHAPE_OVAL, symbol.width, symbol.height
+    return SHAPE_OTHER, np.nan, np.nan
+
+def symbol_shapes(features, symbols):
+    """
+    Get (shape, half_width, half_height) columns for an array of symbol numbers
+    of FeatureArrays. The half extents are in coordinate units
+    and refer to the unrotated symbol.
+    """
+    # Lookup tables indexed by symbol number, with a trailing entry for unknown symbols
+    size = max(max(features.symbols, default=-1),
+               int(symbols.max()) if len(symbols) else -1) + 1
+    shape = np.full(size + 1, SHAPE_OTHER, dtype=np.int8)
+    width = np.full(size + 1, np.nan)
+    height = np.full(size + 1, np.nan)
+    for num, name in features.symbols.items():
+        shape[num], width[num], height[num] = symbol_shape(name)
+    symbols = np.where(symbols >= 0, symbols, size)
+    # Symbols are sized in 1/1000 of the coordinate unit (mil or micron)
+    return shape[symbols], width[symbols] / 2000., height[symbols] / 2000.
+
+def shape_areas(shape, half_width, half_height):
+    "Get the areas of (shape, half_width, half_height) columns. NaN for SHAPE_OTHER."
+    corner = np.minimum(half_width, half_height)
+    return np.select([shape == SHAPE_ROUND, shape == SHAPE_RECT, shape == SHAPE_OVAL],
+                     [np.pi * half_width ** 2, 4 * half_width * half_height,
+                      4 * half_width * half_height - (4 - np.pi) * corner ** 2], np.nan)
+
+def symbol_areas(features, symbols):
+    """
+    Get the area (in square coordinate units) for an array of symbol numbers
+    of FeatureArrays. NaN for symbols without a simple shape.
+    """
+    return shape_areas(*symbol_shapes(features, symbols))
+
+def _arc_points(cx, cy, rx, ry, start, stop, max_angle):
+    "Points of an elliptic arc from start to stop degrees (counter-clockwise for stop > start)"
+    count = max(int(math.ceil(abs(stop - start) / max_angle)), 1)
+    t = np.radians(np.linspace(start, stop, count + 1))
+    return np.stack((cx + rx * np.cos(t), cy + ry * np.sin(t)), axis=1)
+
+def _ellipse(width, height, max_angle):
+    return _arc_points(0., 0., width / 2, height / 2, 0., 360., max_angle)[:-1]
+
+def _box(width, height):
+    return _box_corners * [width / 2, height / 2]
+
+def _stadium(width, height, max_angle):
+    "Oval outline, round at the ends of the longer axis"
+    radius = min(width, height) / 2
+    if width >= height:
+        core = width / 2 - radius
+        return np.concatenate((_arc_points(core, 0., radius, radius, -90., 90., max_angle),
+                               _arc_points(-core, 0., radius, radius, 90., 270., max_angle)))
+    core = height / 2 - radius
+    return np.concatenate((_arc_points(0., core, radius, radius, 0., 180., max_angle),
+                           _arc_points(0., -core, radius, radius, 180., 360., max_angle)))
+
+def _ray_distances(outline, angles):
+    "Distances from the origin to a convex counter-clockwise outline around it along rays"
+    edge = np.roll(outline, -1, axis=0) - outline
+    nx, ny = edge[:, 1], -edge[:, 0] # Outward normals
+    reach = outline[:, 0] * nx + outline[:, 1] * ny
+    rad = np.radians(angles)[:, None]
+    toward = np.cos(rad) * nx + np.sin(rad) * ny
+    ahead = toward > 1e-12
+    return np.where(ahead, reach / np.where(ahead, toward, 1.), np.inf).min(axis=1)
+
+def _sector(outline, start, stop):
+    "Points of a convex outline around the origin from the ray at start to the one at stop degrees"
+    corners = (np.degrees(np.arctan2(outline[:, 1], outline[:, 0])) - start) % 360.
+    corners = np.sort(corners[(corners > 0) & (corners < stop - start)])
+    angles = np.concatenate(([0.], corners, [stop - start])) + start
+    distance = _ray_distances(outline, angles)
+    rad = np.radians(angles)
+    return np.stack((distance * np.cos(rad), distance * np.sin(rad)), axis=1)
+
+def _thermal(outer, inner, angle, spokes, gap):
+    """
+    Outlines of the ring between two convex outlines, cut by straight gaps
+    of the given width at the spoke angles (rounded gap ends are not modelled)
+    """
+    spokes = int(spokes)
+    if spokes < 1:
+        return [outer, inner[::-1]]
+    step = 360. / spokes
+    spoke_angles = angle + step * np.arange(spokes + 1)
+    def half_gaps(outline):
+        "Half angle of the gaps where they cut the outline"
+        distance = _ray_distances(outline, spoke_angles)
+        return np.degrees(np.arcsin(np.minimum(gap / 2 / np.maximum(distance, 1e-12), 1.)))
+    outer_gap, inner_gap = half_gaps(outer), half_gaps(inner)
+    result = []
+    for k in range(spokes):
+        a0, a1 = spoke_angles[k], spoke_angles[k + 1]
+        if a0 + outer_gap[k] >= a1 - outer_gap[k + 1]:
+            continue
+        points = _sector(outer, a0 + outer_gap[k], a1 - outer_gap[k + 1])
+        if a0 + inner_gap[k] < a1 - inner_gap[k + 1]:
+            back = _sector(inner, a0 + inner_gap[k], a1 - inner_gap[k + 1])[::-1]
+        else: # The gaps meet before reaching the inner outline
+            middle = np.radians((a0 + a1) / 2)
+            reach = gap / 2 / max(math.sin(math.radians(step / 2)), 1e-12)
+            back = np.array([[reach * math.cos(middle), reach * math.sin(middle)]])
+        result.append(np.concatenate((points, back)))
+    return result
+
+@functools.lru_cache(maxsize=None)
+def symbol_outlines(name, max_angle=10.):
+    """
+    Get the outlines of a standard symbol (in symbol units, centered on the
+    origin) as a list of (K, 2) vertex arrays, filled with the even-odd rule.
+    Islands are counter-clockwise, holes clockwise. Curves are tessellated
+    with chords spanning at most max_angle degrees.
+    None for user symbols, moires and symbols with rounded corners.
+    """
+    symbol = parse_standard_symbol(name) if name is not None else None
+    if isinstance(symbol, (Round, Hole)):
+        return [_ellipse(symbol.diameter, symbol.diameter, max_angle)]
+    if isinstance(symbol, Square):
+        return [_box(symbol.side, symbol.side)]
+    if isinstance(symbol, Rectangle):
+        return [_box(symbol.width, symbol.height)]
+    if isinstance(symbol, Oval):
+        return [_stadium(symbol.width, symbol.height, max_angle)]
+    if isinstance(symbol, Ellipse):
+        return [_ellipse(symbol.width, symbol.height, max_angle)]
+    if isinstance(symbol, Diamond):
+        w, h = symbol.width / 2, symbol.height / 2
+        return [np.array([[w, 0.], [0., h], [-w, 0.], [0., -h]])]
+    if isinstance(symbol, Octagon):
+        w, h, c = symbol.width / 2, symbol.height / 2, symbol.corner_size
+        return [np.array([[w, c - h], [w, h - c], [w - c, h], [c - w, h],
+                          [-w, h - c], [-w, c - h], [c - w, -h], [w - c, -h]])]
+    if isinstance(symbol, HorizontalHexagon):
+        w, h, c = symbol.width / 2, symbol.height / 2, symbol.corner_size
+        return [np.array([[w, 0.], [w - c, h], [c - w, h], [-w, 0.], [c - w, -h], [w - c, -h]])]
+    if isinstance(symbol, VerticalHexagon):
+        w, h, c = symbol.width / 2, symbol.height / 2, symbol.corner_size
+        return [np.array([[0., h], [-w, h - c], [-w, c - h], [0., -h], [w, c - h], [w, h - c]])]
+    if isinstance(symbol, Triangle):
+        b, h = symbol.base / 2, symbol.height / 2
+        return [np.array([[-b, -h], [b, -h], [0., h]])]
+    if isinstance(symbol, HalfOval):
+        w, h = symbol.width / 2, symbol.height / 2
+        arc = _arc_points(w - h, 0., h, h, -90., 90., max_angle)
+        return [np.concatenate(([[-w, -h]], arc, [[-w, h]]))]
+    if isinstance(symbol, Butterfly):
+        r = symbol.diameter / 2
+        return [np.concatenate(([[0., 0.]], _arc_points(0., 0., r, r, start, start + 90., max_angle)))
+                for start in (0., 180.)]
+    if isinstance(symbol, SquareButterfly):
+        s = symbol.size / 2
+        return [np.array([[0., 0.], [s, 0.], [s, s], [0., s]]),
+                np.array([[0., 0.], [-s, 0.], [-s, -s], [0., -s]])]
+    if isinstance(symbol, RoundDonut):
+        return [_ellipse(symbol.outer_diameter, symbol.outer_diameter, max_angle),
+                _ellipse(symbol.inner_diameter, symbol.inner_diameter, max_angle)[::-1]]
+    if isinstance(symbol, SquareDonut):
+        return [_box(symbol.outer_diameter, symbol.outer_diameter),
+                _box(symbol.inner_diameter, symbol.inner_diameter)[::-1]]
+    if isinstance(symbol, SquareRoundDonut):
+        return [_box(symbol.outer_diameter, symbol.outer_diameter),
+                _ellipse(symbol.inner_diameter, symbol.inner_diameter, max_angle)[::-1]]
+    # Rectangle and oval donuts: width x height x line width
+    if isinstance(symbol, RectangleDonut):
+        w, h, line = symbol
+        return [_box(w, h), _box(w - 2 * line, h - 2 * line)[::-1]]
+    if isinstance(symbol, OvalDonut):
+        w, h, line = symbol
+        return [_stadium(w, h, max_angle), _stadium(w - 2 * line, h - 2 * line, max_angle)[::-1]]
+    if isinstance(symbol, (RoundThermalRounded, RoundThermalSquared)):
+        return _thermal(_ellipse(symbol.outer_diameter, symbol.outer_diameter, max_angle),
+                        _ellipse(symbol.inner_diameter, symbol.inner_diameter, max_angle),
+                        symbol.angle, symbol.num_spokes, symbol.gap)
+    if isinstance(symbol, SquareThermal):
+        return _thermal(_box(symbol.outer_size, symbol.outer_size),
+                        _box(symbol.inner_size, symbol.inner_size),
+                        symbol.angle, symbol.num_spokes, symbol.gap)
+    if isinstance(symbol, SquareThermalOpenCorners):
+        return _thermal(_box(symbol.outer_diameter, symbol.outer_diameter),
+                        _box(symbol.inner_diameter, symbol.inner_diameter),
+                        symbol.angle, symbol.num_spokes, symbol.gap)
+    if isinstance(symbol, SquareRoundThermal):
+        return _thermal(_box(symbol.outer_size, symbol.outer_size),
+                        _ellipse(symbol.inner_diameter, symbol.inner_diameter, max_angle),
+                        symbol.angle, symbol.num_spokes, symbol.gap)
+    if isinstance(symbol, (RectangularThermal, RectangularThermalOpenCorners)):
+        w, h, line = symbol.outer_width, symbol.outer_height, symbol.air_gap
+        return _thermal(_box(w, h), _box(w - 2 * line, h - 2 * line),
+                        symbol.angle, symbol.num_spokes, symbol.gap)
+    if isinstance(symbol, (OvalThermal, OvalThermalOpenCorners)):
+        w, h, line = symbol.outer_width, symbol.outer_height, symbol.line_width
+        return _thermal(_stadium(w, h, max_angle),
+                        _stadium(w - 2 * line, h - 2 * line, max_angle),
+                        symbol.angle, symbol.num_spokes, symbol.gap)
+    return None
+
+def pad_shapes(features):
+    """
+    Get (shape, half_width, half_height) columns for the pads of FeatureArrays,
+    scaled by their resize factors. Mirroring (applied before the rotation)
+    does not change the symmetric simple shapes.
+    """
+    shape, half_width, half_height = symbol_shapes(features, features.pads.symbol)
+    resize = features.pads.resize
+    return shape, half_width * resize, half_height * resize
+
+def pad_areas(features):
+    "Get the areas of the pads of FeatureArrays (see pad_shapes()). NaN for SHAPE_OTHER."
+    return shape_areas(*pad_shapes(features))
+
+def rotate(x, y, angle):
+    "Rotate vectors clockwise (like ODB++ feature rotations) by angle degrees"
+    rad = np.radians(angle)
+    cos, sin = np.cos(rad), np.sin(rad)
+    return x * cos + y * sin, y * cos - x * sin
+
+def distance_inside(shape, half_width, half_height, angle, dx, dy):
+    """
+    For points at offset (dx, dy) from pad centers, get the distance to the
+    pad outline, positive inside the pad and negative outside
+    (exact for round pads and for points inside rectangles and ovals).
+    angle is the clockwise pad rotation in degrees. NaN for SHAPE_OTHER.
+    """
+    x, y = rotate(dx, dy, -angle) # Undo the pad rotation
+    x, y = np.abs(x), np.abs(y)
+    round_ = half_width - np.hypot(dx, dy)
+    rect = np.minimum(half_width - x, half_height - y)
+    # Oval: distance to the center segment along the longer axis
+    horizontal = half_width >= half_height
+    radius = np.minimum(half_width, half_height)
+    along = np.where(horizontal, x, y)
+    across = np.where(horizontal, y, x)
+    core = np.abs(half_width - half_height)
+    oval = radius - np.hypot(np.maximum(along - core, 0.), across)
+    return np.select([shape == SHAPE_ROUND, shape == SHAPE_RECT, shape == SHAPE_OVAL],
+                     [round_, rect, oval], np.nan)
+
+def point_segment_distance(px, py, x0, y0, x1, y1):
+    """
+    Distance from points to segments (arrays of equal length).
+    Returns (distance, closest x, closest y) with the closest point on the segment.
+    """
+    dx, dy = x1 - x0, y1 - y0
+    length2 = dx * dx + dy * dy
+    degenerate = length2 == 0
+    t = ((px - x0) * dx + (py - y0) * dy) / np.where(degenerate, 1., length2)
+    t = np.where(degenerate, 0., np.clip(t, 0., 1.))
+    cx, cy = x0 + t * dx, y0 + t * dy
+    return np.hypot(px - cx, py - cy), cx, cy
+
+def segment_distance(ax0, ay0, ax1, ay1, bx0, by0, bx1, by1):
+    """
+    Minimum distance between the segments a and b (arrays of equal length).
+    Returns (distance, ax, ay, bx, by) with the closest points on a and b.
+    """
+    # Without an intersection, one of the four endpoints is a closest point
+    d1, cx1, cy1 = point_segment_distance(ax0, ay0, bx0, by0, bx1, by1)
+    d2, cx2, cy2 = point_segment_distance(ax1, ay1, bx0, by0, bx1, by1)
+    d3, cx3, cy3 = point_segment_distance(bx0, by0, ax0, ay0, ax1, ay1)
+    d4, cx4, cy4 = point_segment_distance(bx1, by1, ax0, ay0, ax1, ay1)
+    distances = np.stack((d1, d2, d3, d4))
+    best = np.argmin(distances, axis=0)
+    choose = lambda *options: np.choose(best, options)
+    distance = choose(d1, d2, d3, d4)
+    pax, pay = choose(ax0, ax1, cx3, cx4), choose(ay0, ay1, cy3, cy4)
+    pbx, pby = choose(cx1, cx2, bx0, bx1), choose(cy1, cy2, by0, by1)
+    # Proper intersections
+    o1 = (ax1 - ax0) * (by0 - ay0) - (ay1 - ay0) * (bx0 - ax0)
+    o2 = (ax1 - ax0) * (by1 - ay0) - (ay1 - ay0) * (bx1 - ax0)
+    o3 = (bx1 - bx0) * (ay0 - by0) - (by1 - by0) * (ax0 - bx0)
+    o4 = (bx1 - bx0) * (ay1 - by0) - (by1 - by0) * (ax1 - bx0)
+    crossing = (o1 * o2 < 0) & (o3 * o4 < 0)
+    t = o3 / np.where(crossing, o3 - o4, 1.)
+    ix, iy = ax0 + t * (ax1 - ax0), ay0 + t * (ay1 - ay0)
+    return (np.where(crossing, 0., distance),
+            np.where(crossing, ix, pax), np.where(crossing, iy, pay),
+            np.where(crossing, ix, pbx), np.where(crossing, iy, pby))
+
+def arc_sweeps(xs, ys, xe, ye, xc, yc, clockwise):
+    """
+    Get (start angle, radius, sweep) arrays of arcs (start, end, center,
+    direction arrays). Angles are in radians, the sweep is negative for
+    clockwise arcs. Arcs with identical start and end are full circles.
+    """
+    a0 = np.arctan2(ys - yc, xs - xc)
+    a1 = np.arctan2(ye - yc, xe - xc)
+    radius = np.hypot(xs - xc, ys - yc)
+    full = 2 * np.pi
+    sweep = np.where(clockwise, -np.mod(a0 - a1, full), np.mod(a1 - a0, full))
+    sweep = np.where(sweep == 0, np.where(clockwise, -full, full), sweep)
+    return a0, radius, sweep
+
+def tessellate_arcs(xs, ys, xe, ye, xc, yc, clockwise, max_angle=10.):
+    """
+    Approximate arcs (start, end, center, direction arrays) by chords
+    spanning at most max_angle degrees. Arcs with identical start and end
+    are full circles. Returns (arc index, x0, y0, x1, y1) chord arrays.
+    """
+    a0, radius, sweep = arc_sweeps(xs, ys, xe, ye, xc, yc, clockwise)
+    counts = np.maximum(np.ceil(np.abs(sweep) / np.radians(max_angle)), 1).astype(np.int64)
+    owner, local = expand_ranges(np.zeros(len(counts), dtype=np.int64), counts)
+    t0 = a0[owner] + sweep[owner] * local / counts[owner]
+    t1 = a0[owner] + sweep[owner] * (local + 1) / counts[owner]
+    x0, y0 = xc[owner] + radius[owner] * np.cos(t0), yc[owner] + radius[owner] * np.sin(t0)
+    x1, y1 = xc[owner] + radius[owner] * np.cos(t1), yc[owner] + radius[owner] * np.sin(t1)
+    # Use the exact end points to avoid gaps to the neighbouring features
+    first = local == 0
+    last = local == counts[owner] - 1
+    x0[first], y0[first] = xs[owner[first]], ys[owner[first]]
+    x1[last], y1[last] = xe[owner[last]], ye[owner[last]]
+    return owner, x0, y0, x1, y1
+
+def points_in_edges(px, py, x0, y0, x1, y1, starts, stops):
+    """
+    Even-odd point in polygon test: Is (px[i], py[i]) inside the closed
+    edge set x0[starts[i]:stops[i]], ... (islands and holes may be mixed)?
+    Returns a boolean array.
+    """
+    owner, edges = expand_ranges(starts, stops)
+    x, y = px[owner], py[owner]
+    ey0, ey1 = y0[edges], y1[edges]
+    crosses = (ey0 > y) != (ey1 > y)
+    slope = (x1[edges] - x0[edges]) / np.where(crosses, ey1 - ey0, 1.)
+    hit = crosses & (x < x0[edges] + (y - ey0) * slope)
+    return np.bincount(owner[hit], minlength=len(px)) % 2 == 1
+
+def inside_outlines(primitives, px, py, owners):
+    """
+    Is the point (px[i], py[i]) inside the outline of feature owners[i]?
+    primitives = Primitives sorted by owner. False for features without
+    outline primitives (and for owners without any primitives).
+    """
+    features, starts = np.unique(primitives.owner, return_index=True)
+    stops = np.append(starts[1:], len(primitives))
+    position = np.minimum(np.searchsorted(features, owners), max(len(features) - 1, 0))
+    known = (features[position] == owners) if len(features) else np.zeros(len(owners), dtype=bool)
+    outline = known.copy()
+    outline[known] = primitives.outline[starts[position[known]]]
+    result = np.zeros(len(owners), dtype=bool)
+    result[outline] = points_in_edges(
+        px[outline], py[outline], primitives.x0, primitives.y0, primitives.x1, primitives.y1,
+        starts[position[outline]], stops[position[outline]])
+    return result
+
+def _outline_boxes(primitives, outline):
+    "Get the feature orders and (xmin, ymin, xmax, ymax) extents of the selected outlines"
+    owners, owner = np.unique(primitives.owner[outline], return_inverse=True)
+    xmin, ymin, xmax, ymax = (column[outline] for column in primitives.extents())
+    boxes = [np.full(len(owners), np.inf), np.full(len(owners), np.inf),
+             np.full(len(owners), -np.inf), np.full(len(owners), -np.inf)]
+    np.minimum.at(boxes[0], owner, xmin)
+    np.minimum.at(boxes[1], owner, ymin)
+    np.maximum.at(boxes[2], owner, xmax)
+    np.maximum.at(boxes[3], owner, ymax)
+    return owners, boxes
+
+def outlines_containing(primitives, x, y):
+    """
+    Find the features with outline primitives (surfaces, rectangular pads...)
+    containing the query points. Returns (query index, feature order) pairs.
+    """
+    owners, boxes = _outline_boxes(primitives, primitives.outline)
+    query, items = GridIndex(*boxes).query_pairs(x, y, x, y)
+    inside = inside_outlines(primitives, x[query], y[query], owners[items])
+    return query[inside], owners[items[inside]]
+
+def primitives_inside(inner, outer, limit=0.):
+    """
+    Find the inner Primitives lying entirely inside a feature of the outer
+    Primitives (sorted by owner), i.e. inside one of its capsules or inside
+    its filled outline. Returns (inner index, outer feature order, margin)
+    arrays, one entry per pair, where margin is the distance from the inner
+    primitive to the boundary of the outer feature, but at most limit.
+    """
+    items, found, margins = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+    if len(inner) == 0 or len(outer) == 0:
+        return items[0], found[0], margins[0]
+    xmin, ymin, xmax, ymax = inner.extents()
+    # Capsules: both end points far enough from the capsule segment
+    capsule = np.flatnonzero(~outer.outline)
+    if len(capsule):
+        index = GridIndex(*(column[capsule] for column in outer.extents()))
+        item, other = index.query_pairs(xmin, ymin, xmax, ymax)
+        other = capsule[other]
+        reach = np.maximum(
+            point_segment_distance(inner.x0[item], inner.y0[item], outer.x0[other],
+                                   outer.y0[other], outer.x1[other], outer.y1[other])[0],
+            point_segment_distance(inner.x1[item], inner.y1[item], outer.x0[other],
+                                   outer.y0[other], outer.x1[other], outer.y1[other])[0])
+        margin = outer.radius[other] - reach - inner.radius[item]
+        keep = margin > 0
+        items.append(item[keep])
+        found.append(outer.owner[other[keep]])
+        margins.append(np.minimum(margin[keep], limit))
+    # Outlines: both end points inside and no edge within the radius
+    outline = np.flatnonzero(outer.outline)
+    if len(outline):
+        owners, boxes = _outline_boxes(outer, outline)
+        item, other = GridIndex(*boxes).query_pairs(xmin, ymin, xmax, ymax)
+        other = owners[other]
+        inside = inside_outlines(outer, inner.x0[item], inner.y0[item], other) & \
+                 inside_outlines(outer, inner.x1[item], inner.y1[item], other)
+        item, other = item[inside], other[inside]
+        edges = GridIndex(*(column[outline] for column in outer.extents()))
+        near, edge = edges.query_pairs(xmin - limit, ymin - limit, xmax + limit, ymax + limit)
+        edge = outline[edge]
+        distance = segment_distance(inner.x0[near], inner.y0[near], inner.x1[near],
+                                    inner.y1[near], outer.x0[edge], outer.y0[edge],
+                                    outer.x1[edge], outer.y1[edge])[0] - inner.radius[near]
+        # Closest edge of every (inner primitive, outer feature) pair
+        keys = near * len(owners) + np.searchsorted(owners, outer.owner[edge])
+        unique, inverse = np.unique(keys, return_inverse=True)
+        closest = np.full(len(unique), np.inf)
+        np.minimum.at(closest, inverse, distance)
+        candidates = item * len(owners) + np.searchsorted(owners, other)
+        position = np.minimum(np.searchsorted(unique, candidates), max(len(unique) - 1, 0))
+        margin = np.full(len(item), np.inf)
+        if len(unique):
+            matched = unique[position] == candidates
+            margin[matched] = closest[position[matched]]
+        keep = margin > 0
+        items.append(item[keep])
+        found.append(other[keep])
+        margins.append(np.minimum(margin[keep], limit))
+    item, other, margin = (np.concatenate(column) for column in (items, found, margins))
+    # The largest margin of every pair
+    order = np.lexsort((-margin, other, item))
+    item, other, margin = item[order], other[order], margin[order]
+    first = np.ones(len(item), dtype=bool)
+    first[1:] = (item[1:] != item[:-1]) | (other[1:] != other[:-1])
+    return item[first], other[first], margin[first]
+
+class PolygonLocator(object):
+    """
+    Even-odd point in polygon test for many points against one fixed
+    closed edge set (islands and holes may be mixed, edges must not cross).
+    The plane is cut into horizontal slabs at the edge end points. Within a
+    slab, the crossing edges keep their left to right order, so every point
+    is located with a binary search over the edges of its slab.
+    """
+    def __init__(self, x0, y0, x1, y1):
+        # Horizontal edges never cross a horizontal ray
+        keep = y0 != y1
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+        self.slabs = np.unique(np.concatenate((y0, y1)))
+        low, high = np.minimum(y0, y1), np.maximum(y0, y1)
+        edge, slab = expand_ranges(np.searchsorted(self.slabs, low),
+                                   np.searchsorted(self.slabs, high))
+        # Order the edges of every slab by their x in the middle of the slab
+        middle = (self.slabs[slab] + self.slabs[slab + 1]) / 2
+        x = x0[edge] + (middle - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+        order = np.lexsort((x, slab))
+        self._edges = edge[order]
+        self._offsets = np.searchsorted(slab[order], np.arange(len(self.slabs) + 1))
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+
+    def contains(self, px, py):
+        "Is every point inside? Returns a boolean array."
+        px = np.asarray(px, dtype=float)
+        py = np.asarray(py, dtype=float)
+        # Points below the lowest slab get slab -1 without edges
+        slab = np.searchsorted(self.slabs, py, side="right") - 1
+        first = np.where(slab >= 0, self._offsets[np.maximum(slab, 0)], 0)
+        lo, hi = first, np.where(slab >= 0, self._offsets[slab + 1], 0)
+        # Binary search: number of slab edges crossing the ray left of the point
+        while np.any(lo < hi):
+            active = lo < hi
+            mid = (lo + hi) // 2
+            edge = self._edges[np.where(active, mid, 0)]
+            x = self.x0[edge] + (py - self.y0[edge]) * (self.x1[edge] - self.x0[edge]) / \
+                (self.y1[edge] - self.y0[edge])
+            left = active & (x < px)
+            lo = np.where(left, mid + 1, lo)
+            hi = np.where(active & ~left, mid, hi)
+        return (lo - first) % 2 == 1
+
+_box_corners = np.array([[1., 1.], [-1., 1.], [-1., -1.], [1., -1.]])
+
+def box_outlines(x, y, half_width, half_height, angle):
+    "Get the (N, 4, 2) counter-clockwise corner arrays of boxes rotated clockwise by angle"
+    cx, cy = rotate(_box_corners[:, 0] * half_width[:, None],
+                    _box_corners[:, 1] * half_height[:, None], angle[:, None])
+    return np.stack((x[:, None] + cx, y[:, None] + cy), axis=2)
+
+def polygon_edges(vertices):
+    """
+    Get the closed outline edges of polygons given as an (N, K, 2) vertex array.
+    Returns (polygon index, x0, y0, x1, y1) edge arrays.
+    """
+    count, corners = vertices.shape[:2]
+    following = np.roll(vertices, -1, axis=1)
+    return (np.repeat(np.arange(count), corners),
+            vertices[:, :, 0].ravel(), vertices[:, :, 1].ravel(),
+            following[:, :, 0].ravel(), following[:, :, 1].ravel())
+
+def surface_edges(surfaces, max_angle=10.):
+    """
+    Get the outline edges of all polygons (islands and holes) of a list of
+    (order, Surface). Circular polygon steps are tessellated (see tessellate_arcs()).
+    Returns (order, x0, y0, x1, y1) edge arrays.
+    """
+    segments, arcs = [], []
+    for order, surface in surfaces:
+        for polygon in surface.polygons:
+            for step in polygon.steps:
+                if isinstance(step, PolygonCircle):
+                    arcs.append((order, step.start.x, step.start.y, step.end.x, step.end.y,
+                                 step.center.x, step.center.y,
+                                 step.direction == CircleDirection.Clockwise))
+                else:
+                    segments.append((order, step.start.x, step.start.y,
+                                     step.end.x, step.end.y))
+    segments = [np.array(column) for column in zip(*segments)] or [np.zeros(0)] * 5
+    if arcs:
+        owner, xs, ys, xe, ye, xc, yc, clockwise = (np.array(column) for column in zip(*arcs))
+        arc, x0, y0, x1, y1 = tessellate_arcs(xs, ys, xe, ye, xc, yc, clockwise, max_angle)
+        chords = [owner[arc], x0, y0, x1, y1]
+        segments = [np.concatenate(pair) for pair in zip(segments, chords)]
+    order, x0, y0, x1, y1 = segments
+    return order.astype(np.int64), x0, y0, x1, y1
+
+def step_area_length(step):
+    """
+    Get (signed area contribution, length) of a polygon step.
+    The area contributions of a closed polygon add up to its signed area
+    (positive for counter-clockwise polygons).
+    """
+    (xs, ys), (xe, ye) = step.start, step.end
+    if not isinstance(step, PolygonCircle):
+        return (xs * ye - xe * ys) / 2, math.hypot(xe - xs, ye - ys)
+    xc, yc = step.center
+    radius = math.hypot(xs - xc, ys - yc)
+    sweep = math.atan2(ye - yc, xe - xc) - math.atan2(ys - yc, xs - xc)
+    if step.direction == CircleDirection.Clockwise:
+        sweep = -((-sweep) % (2 * math.pi) or 2 * math.pi)
+    else:
+        sweep = sweep % (2 * math.pi) or 2 * math.pi
+    # Chord from the center to the end points plus the circular sector
+    area = (xc * (ye - ys) - yc * (xe - xs)) / 2 + radius * radius * sweep / 2
+    return area, radius * abs(sweep)
+
+def polygons_area(polygons):
+    "Get the exact area of a list of polygons (islands minus holes)"
+    area = 0.
+    for polygon in polygons:
+        polygon_area = abs(sum(step_area_length(step)[0] for step in polygon.steps))
+        area += polygon_area if polygon.type == PolygonType.Island else -polygon_area
+    return area
+
+def outlines_area(outlines):
+    """
+    Get the area of a list of (K, 2) vertex arrays like symbol_outlines()
+    returns (counter-clockwise islands minus clockwise holes)
+    """
+    return sum(float(np.dot(outline[:, 0], np.roll(outline[:, 1], -1)) -
+                     np.dot(np.roll(outline[:, 0], -1), outline[:, 1])) / 2
+               for outline in outlines)
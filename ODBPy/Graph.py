@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized graph algorithms on edge arrays.
+"""
+import numpy as np
+
+__all__ = ["connected_components", "propagate_labels"]
+
+def connected_components(count, a, b):
+    """
+    Find the connected components of the undirected graph with count nodes
+    and the edges (a[i], b[i]).
+    Uses a vectorized union-find: every root is hooked to the smallest
+    connected label, followed by pointer jumping until nothing changes.
+    Returns an array of component numbers (0 .. components - 1, numbered
+    in order of the smallest node of each component) for every node.
+    """
+    labels = np.arange(count)
+    a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+    while True:
+        la, lb = labels[a], labels[b]
+        different = la != lb
+        if not different.any():
+            break
+        la, lb = la[different], lb[different]
+        smaller = np.minimum(la, lb)
+        np.minimum.at(labels, la, smaller)
+        np.minimum.at(labels, lb, smaller)
+        # Pointer jumping: make every node point to its root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+def propagate_labels(labels, a, b):
+    """
+    Spread the labels (>= 0) of some nodes along the undirected edges
+    (a[i], b[i]) to the unlabelled nodes (-1), one edge per round, so every
+    node gets the label of one of the closest labelled nodes.
+    Nodes without a path to a labelled node keep -1. Returns a new array.
+    """
+    labels = np.array(labels, dtype=np.int64)
+    a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+    source, target = np.concatenate((a, b)), np.concatenate((b, a))
+    while True:
+        spread = (labels[source] >= 0) & (labels[target] < 0)
+        if not spread.any():
+            return labels
+        labels[target[spread]] = labels[source[spread]]
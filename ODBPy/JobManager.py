@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental (re-)loading of an ODB++ job directory
+"""
+import os.path
+import threading
+from collections import namedtuple
+from .ComponentStore import ComponentCollection, read_component_side
+from .ColumnarNetlist import read_columnar_netlist
+from .DrillTools import read_drill_tools
+from .FeatureArrays import parse_feature_arrays
+from .Layers import read_layers, read_layer_features, layer_file_path
+from .Profile import read_profile
+from .Utils import step_directory, file_digest
+
+__all__ = ["FileFingerprint", "JobManager", "JobWatcher"]
+
+class FileFingerprint(namedtuple("FileFingerprint", ["size", "mtime_ns", "digest"])):
+    """
+    Fingerprint of a file: size, modification time in ns and hex content digest.
+    """
+
+class _Artifact(namedtuple("_Artifact", ["digests", "value", "bases"])):
+    """
+    A parsed artifact, the dict path => digest (None = missing) of the files
+    it was parsed from (directly or through its bases) and the set of keys
+    of the artifacts it was built from
+    """
+
+class JobManager(object):
+    """
+    Lazily parsed, incrementally refreshed view of an ODB++ job.
+
+    Artifacts are identified by keys: a tuple of the name of the method
+    returning it and its arguments, e.g. ("features", "top") or ("netlist",).
+    Artifacts built from other artifacts (e.g. feature_arrays from features)
+    depend on the files of their bases as these were when the bases were parsed.
+    All methods are thread-safe.
+    """
+    def __init__(self, directory, step="pcb", netlist="cadnet"):
+        self.directory = directory
+        self.step = step
+        self.netlist_name = netlist
+        self._artifacts = {}
+        self._fingerprints = {}
+        # The sets of base keys of the artifacts being parsed
+        self._parsing = []
+        self.errors = {}
+        self._lock = threading.RLock()
+
+    def _digest(self, path):
+        "Get the content digest of a file (None if it does not exist)"
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._fingerprints.pop(path, None)
+            return None
+        fingerprint = self._fingerprints.get(path)
+        if fingerprint is None or fingerprint[:2] != (stat.st_size, stat.st_mtime_ns):
+            fingerprint = FileFingerprint(stat.st_size, stat.st_mtime_ns, file_digest(path))
+            self._fingerprints[path] = fingerprint
+        return fingerprint.digest
+
+    def _get(self, key, paths, parse):
+        """
+        Get the artifact with the given key, calling parse() if it is not loaded.
+        The files are fingerprinted before parsing, so a file modified
+        while being parsed is picked up by the next refresh().
+        """
+        with self._lock:
+            artifact = self._artifacts.get(key)
+            if artifact is None:
+                digests = {path: self._digest(path) for path in paths}
+                self._parsing.append(set())
+                try:
+                    value = parse()
+                finally:
+                    bases = self._parsing.pop()
+                # A (possibly outdated) base artifact overrides the current digests
+                for base in bases:
+                    digests.update(self._artifacts[base].digests)
+                artifact = _Artifact(digests, value, frozenset(bases))
+                self._artifacts[key] = artifact
+            if self._parsing:
+                self._parsing[-1].add(key)
+            return artifact.value
+
+    def _matrix_path(self):
+        return os.path.join(self.directory, "matrix", "matrix")
+
+    def _layer_path(self, layer, filename):
+        return layer_file_path(self.directory, layer, filename, self.step)
+
+    def layers(self):
+        "Get the LayerSet of the matrix"
+        return self._get(("layers",), [self._matrix_path()],
+                         lambda: read_layers(self.directory))
+
+    def stackup(self):
+        "Get the StackupIndex of the matrix"
+        return self._get(("stackup",), [self._matrix_path()],
+                         lambda: self.layers().stackup())
+
+    def features(self, layer):
+        "Get the feature linerecords of a layer given by name"
+        return self._get(("features", layer), [self._layer_path(layer, "features.Z")],
+                         lambda: read_layer_features(self.directory, layer, self.step))
+
+    def feature_arrays(self, layer):
+        "Get the FeatureArrays of a layer given by name"
+        return self._get(("feature_arrays", layer), [self._layer_path(layer, "features.Z")],
+                         lambda: parse_feature_arrays(self.features(layer)))
+
+    def layer_components(self, layer):
+        """
+        Get the components of a component layer given by name
+        as (dict of component index => Component, ToeprintArrays, unit)
+        """
+        path = self._layer_path(layer, "components.Z")
+        return self._get(("layer_components", layer), [path],
+                         lambda: read_component_side(path))
+
+    def components(self):
+        "Get the ComponentCollection of the top and bottom component layers"
+        sides = self.layers().component_layers() or (None, None)
+        paths = [self._matrix_path()] + [self._layer_path(layer.name, "components.Z")
+                                         for layer in sides if layer is not None]
+        def parse():
+            return ComponentCollection.from_sides(*[
+                self.layer_components(layer.name) if layer is not None else None
+                for layer in sides])
+        return self._get(("components",), paths, parse)
+
+    def netlist(self):
+        "Get the ColumnarNetlist of the netlist given to the constructor"
+        path = os.path.join(step_directory(self.directory, self.step),
+                            "netlists", self.netlist_name, "netlist")
+        return self._get(("netlist",), [path], lambda: read_columnar_netlist(
+            self.directory, self.netlist_name, self.step))
+
+    def profile(self):
+        "Get the Profile of the step"
+        path = os.path.join(step_directory(self.directory, self.step), "profile")
+        return self._get(("profile",), [path],
+                         lambda: read_profile(self.directory, self.step))
+
+    def tools(self, layer="through_drill"):
+        "Get the DrillToolSet of a drill layer given by name"
+        return self._get(("tools", layer), [self._layer_path(layer, "tools")],
+                         lambda: read_drill_tools(self.directory, layer, self.step))
+
+    def artifact(self, key):
+        "Get an artifact by its key"
+        name, *args = key
+        return getattr(self, name)(*args)
+
+    def loaded(self):
+        "Get the keys of all loaded artifacts"
+        with self._lock:
+            return list(self._artifacts)
+
+    def fingerprints(self, key):
+        "Get the dict path => FileFingerprint (None = missing) of a loaded artifact"
+        with self._lock:
+            return {path: self._fingerprints.get(path)
+                    for path in self._artifacts[key].digests}
+
+    def changed(self):
+        "Get the keys of all loaded artifacts whose files changed on disk"
+        with self._lock:
+            return [key for key, artifact in self._artifacts.items()
+                    if any(self._digest(path) != digest
+                           for path, digest in artifact.digests.items())]
+
+    def _dependents(self, keys):
+        "Get the given keys and the keys of all loaded artifacts built from them"
+        keys = set(keys)
+        while True:
+            more = {key for key, artifact in self._artifacts.items()
+                    if artifact.bases & keys} - keys
+            if not more:
+                return keys
+            keys |= more
+
+    def invalidate(self, keys=None):
+        """
+        Forget the given artifacts (by default all) and the artifacts built
+        from them so they are parsed again on access
+        """
+        with self._lock:
+            for key in (list(self._artifacts) if keys is None else self._dependents(keys)):
+                self._artifacts.pop(key, None)
+
+    def refresh(self):
+        """
+        Reparse all loaded artifacts whose files changed and reuse all others.
+        Artifacts whose files were deleted are forgotten instead.
+        An artifact failing to reparse (or built from one that failed) keeps
+        its previous value and stays changed, errors is set to the dict
+        key => exception of these artifacts.
+        Returns the keys of the reparsed and forgotten artifacts.
+        """
+        with self._lock:
+            changed = self.changed()
+            previous = {key: self._artifacts.pop(key) for key in changed}
+            errors = {}
+            for key in changed:
+                # Reparsing an artifact also reparses the changed artifacts it is built from
+                if key in self._artifacts:
+                    continue
+                try:
+                    self.artifact(key)
+                except FileNotFoundError:
+                    pass
+                except Exception as error:
+                    errors[key] = error
+            # Artifacts built from a failed one fail as well. A failed base may
+            # still have been reparsed for a later artifact.
+            errors = {key: error for key, error in errors.items() if key not in self._artifacts}
+            for key in errors:
+                self._artifacts[key] = previous[key]
+            self.errors = errors
+            return [key for key in changed if key not in errors]
+
+class JobWatcher(object):
+    """
+    Background thread refreshing a JobManager every interval seconds.
+    callback (if given) is called with the list of changed keys after
+    every refresh that changed anything. An exception raised by refresh()
+    or by reparsing an artifact (e.g. for a half-written file, see
+    JobManager.errors) is stored in error and the watcher keeps polling.
+    Use as a context manager or call start() / stop().
+    """
+    def __init__(self, manager, interval=1., callback=None):
+        self.manager = manager
+        self.interval = interval
+        self.callback = callback
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.manager.refresh()
+            except Exception as error:
+                self.error = error
+                continue
+            self.error = next(iter(self.manager.errors.values()), None)
+            if changed and self.callback is not None:
+                self.callback(changed)
+
+    def start(self):
+        "Start polling in a daemon thread"
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        "Stop polling and wait for the thread to finish"
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Layer comparison between two revisions of a job
+"""
+from collections import namedtuple
+import hashlib
+import os.path
+import numpy as np
+from .FeatureArrays import parse_feature_arrays
+from .Features import parse_feature_map
+from .Geometry import surface_edges
+from .Graph import connected_components
+from .Layers import layer_file_path
+from .LineRecordParser import read_linerecords
+from .NetlistDiff import mix_keys
+from .SpatialIndex import GridIndex
+from .Utils import file_digest, parallel_map
+
+__all__ = ["FEATURE_PAD", "FEATURE_LINE", "FEATURE_ARC", "FEATURE_SURFACE",
+           "FeatureKeys", "FeatureChanges", "MovedFeatures", "ChangeClusters", "LayerDiff",
+           "feature_keys", "diff_feature_keys", "diff_layer_features", "read_layer_diffs"]
+
+# Feature kind codes
+FEATURE_PAD = 0
+FEATURE_LINE = 1
+FEATURE_ARC = 2
+FEATURE_SURFACE = 3
+
+class FeatureKeys(namedtuple("FeatureKeys", ["unit", "order", "kind", "x", "y", "shape", "key"])):
+    """
+    Canonical hashes of the features of a layer.
+    order = feature order (see FeatureArrays), kind = FEATURE_... code,
+    x, y = feature location (pad center, middle between line or arc
+    end points, center of the surface extents),
+    shape = uint64 hash of everything but the location, key = full uint64 hash
+    """
+    def __len__(self):
+        return len(self.order)
+
+class FeatureChanges(namedtuple("FeatureChanges", ["order", "kind", "x", "y", "cluster"])):
+    """
+    Removed or added features. order = feature order in their revision,
+    cluster = index into the ChangeClusters
+    """
+    def __len__(self):
+        return len(self.order)
+
+class MovedFeatures(namedtuple("MovedFeatures", [
+        "reference_order", "revised_order", "kind", "dx", "dy", "cluster"])):
+    """
+    Features that only changed their location by (dx, dy).
+    cluster = index into the ChangeClusters
+    """
+    def __len__(self):
+        return len(self.kind)
+
+class ChangeClusters(namedtuple("ChangeClusters", ["xmin", "ymin", "xmax", "ymax", "count"])):
+    """Extents and number of changes of every group of nearby changes"""
+    def __len__(self):
+        return len(self.count)
+
+class LayerDiff(namedtuple("LayerDiff", ["removed", "added", "moved", "clusters"])):
+    """
+    Differences between two revisions of a layer.
+    removed = FeatureChanges of the reference, added = FeatureChanges of the revision,
+    moved = MovedFeatures, clusters = ChangeClusters
+    """
+    def __len__(self):
+        return len(self.removed) + len(self.added) + len(self.moved)
+
+    def counts(self):
+        "Get a dict FEATURE_... code => (removed, added, moved) counts"
+        return {kind: (int(np.count_nonzero(self.removed.kind == kind)),
+                       int(np.count_nonzero(self.added.kind == kind)),
+                       int(np.count_nonzero(self.moved.kind == kind)))
+                for kind in (FEATURE_PAD, FEATURE_LINE, FEATURE_ARC, FEATURE_SURFACE)}
+
+def _string_keys(strings):
+    "Get uint64 hashes of strings that are the same in every process"
+    return np.array([int.from_bytes(hashlib.blake2b(string.encode("utf-8"), digest_size=8)
+                                    .digest(), "little") for string in strings], dtype=np.uint64)
+
+def _combine(*columns):
+    "Hash int columns (or scalars) into uint64 keys. The column order matters."
+    sizes = [np.size(column) for column in columns if np.ndim(column)]
+    size = sizes[0] if sizes else 1
+    keys = np.zeros(size, dtype=np.uint64)
+    for column in columns:
+        column = np.broadcast_to(np.asarray(column).astype(np.int64).astype(np.uint64), size)
+        keys = mix_keys(keys ^ column)
+    return keys
+
+def _attribute_keys(linerecords):
+    """
+    Get a uint64 hash of the attributes of every feature order
+    (attribute numbers resolved to their names, sorted by name; 0 without attributes).
+    Attribute values are compared as written.
+    """
+    names = parse_feature_map(linerecords.get("Feature attribute names", []))
+    texts = [line.partition(";")[2].strip() for line in linerecords.get("Layer features", [])]
+    unique, inverse = np.unique(np.array(texts + [""], dtype=str), return_inverse=True)
+    canonical = []
+    for text in unique.tolist():
+        pairs = (attr.strip().partition("=") for attr in text.split(",") if attr.strip())
+        canonical.append(",".join(sorted(
+            "{}={}".format(names.get(int(num), num) if num.isdigit() else num, value)
+            for num, _, value in pairs)))
+    keys = _string_keys(canonical)
+    keys[np.array(canonical) == ""] = 0
+    return keys[inverse[:-1]]
+
+def _symbol_keys(features, symbols):
+    "Get the hash of the symbol name for an array of symbol numbers"
+    size = max(max(features.symbols, default=-1),
+               int(symbols.max()) if len(symbols) else -1) + 1
+    table = _string_keys([features.symbols.get(num, "#{}".format(num)) for num in range(size)])
+    return table[symbols] if size else np.zeros(0, dtype=np.uint64)
+
+def _extents(owner, count, x0, y0, x1, y1):
+    "Get the (xmin, ymin, xmax, ymax) of the edges of every owner"
+    low = np.iinfo(x0.dtype).min if x0.dtype.kind == "i" else -np.inf
+    high = np.iinfo(x0.dtype).max if x0.dtype.kind == "i" else np.inf
+    xmin, ymin = np.full(count, high, dtype=x0.dtype), np.full(count, high, dtype=x0.dtype)
+    xmax, ymax = np.full(count, low, dtype=x0.dtype), np.full(count, low, dtype=x0.dtype)
+    np.minimum.at(xmin, owner, np.minimum(x0, x1))
+    np.minimum.at(ymin, owner, np.minimum(y0, y1))
+    np.maximum.at(xmax, owner, np.maximum(x0, x1))
+    np.maximum.at(ymax, owner, np.maximum(y0, y1))
+    return xmin, ymin, xmax, ymax
+
+def _surface_keys(features, attributes, quantize, max_angle):
+    "Get (order, x, y, shape, key) of the surfaces"
+    order, x0, y0, x1, y1 = surface_edges(features.surfaces, max_angle)
+    orders, owner = np.unique(order, return_inverse=True)
+    qx0, qy0, qx1, qy1 = quantize(x0), quantize(y0), quantize(x1), quantize(y1)
+    qxmin, qymin, _, _ = _extents(owner, len(orders), qx0, qy0, qx1, qy1)
+    # Edges relative to the surface extents, end points in a fixed order
+    rx0, ry0 = qx0 - qxmin[owner], qy0 - qymin[owner]
+    rx1, ry1 = qx1 - qxmin[owner], qy1 - qymin[owner]
+    swap = (rx0 > rx1) | ((rx0 == rx1) & (ry0 > ry1))
+    rx0, rx1 = np.where(swap, rx1, rx0), np.where(swap, rx0, rx1)
+    ry0, ry1 = np.where(swap, ry1, ry0), np.where(swap, ry0, ry1)
+    # Order independent set hash: sum of mixed edge keys plus mixed count
+    edges = np.zeros(len(orders), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        np.add.at(edges, owner, _combine(rx0, ry0, rx1, ry1))
+        edges += mix_keys(np.bincount(owner, minlength=len(orders)))
+    polarity = {order: surface.polarity.value for order, surface in features.surfaces}
+    polarities = np.array([polarity[order] for order in orders.tolist()], dtype=np.int64)
+    shape = _combine(FEATURE_SURFACE, polarities, attributes[orders], edges)
+    xmin, ymin, xmax, ymax = _extents(owner, len(orders), x0, y0, x1, y1)
+    return orders, (xmin + xmax) / 2, (ymin + ymax) / 2, shape, _combine(shape, qxmin, qymin)
+
+def feature_keys(linerecords, tolerance=1e-4, max_angle=10.):
+    """
+    Compute the FeatureKeys of a layer feature linerecord dict.
+    Coordinates are quantized to tolerance (in coordinate units),
+    pad angles to 1/1000 degree.
+    """
+    features = parse_feature_arrays(linerecords)
+    attributes = _attribute_keys(linerecords)
+    def quantize(values):
+        return np.round(np.asarray(values) / tolerance).astype(np.int64)
+    parts = []
+    # Pads
+    pads = features.pads
+    angle = np.round(np.mod(pads.angle, 360.) * 1000.)
+    shape = _combine(FEATURE_PAD, _symbol_keys(features, pads.symbol), pads.polarity,
+                     pads.mirror, angle, np.round(pads.resize * 1000.), attributes[pads.order])
+    parts.append((pads.order, FEATURE_PAD, pads.x, pads.y, shape,
+                  _combine(shape, quantize(pads.x), quantize(pads.y))))
+    # Lines: start at the smaller end point
+    lines = features.lines
+    qxs, qys, qxe, qye = quantize(lines.xs), quantize(lines.ys), quantize(lines.xe), quantize(lines.ye)
+    swap = (qxs > qxe) | ((qxs == qxe) & (qys > qye))
+    qxs, qxe = np.where(swap, qxe, qxs), np.where(swap, qxs, qxe)
+    qys, qye = np.where(swap, qye, qys), np.where(swap, qys, qye)
+    shape = _combine(FEATURE_LINE, _symbol_keys(features, lines.symbol), lines.polarity,
+                     attributes[lines.order], qxe - qxs, qye - qys)
+    parts.append((lines.order, FEATURE_LINE, (lines.xs + lines.xe) / 2, (lines.ys + lines.ye) / 2,
+                  shape, _combine(shape, qxs, qys)))
+    # Arcs: counter-clockwise arcs are turned into clockwise ones
+    arcs = features.arcs
+    qxs, qys, qxe, qye = quantize(arcs.xs), quantize(arcs.ys), quantize(arcs.xe), quantize(arcs.ye)
+    qxc, qyc = quantize(arcs.xc), quantize(arcs.yc)
+    swap = ~arcs.clockwise
+    qxs, qxe = np.where(swap, qxe, qxs), np.where(swap, qxs, qxe)
+    qys, qye = np.where(swap, qye, qys), np.where(swap, qys, qye)
+    shape = _combine(FEATURE_ARC, _symbol_keys(features, arcs.symbol), arcs.polarity,
+                     attributes[arcs.order], qxs - qxc, qys - qyc, qxe - qxc, qye - qyc)
+    parts.append((arcs.order, FEATURE_ARC, (arcs.xs + arcs.xe) / 2, (arcs.ys + arcs.ye) / 2,
+                  shape, _combine(shape, qxc, qyc)))
+    # Surfaces
+    order, x, y, shape, key = _surface_keys(features, attributes, quantize, max_angle)
+    parts.append((order, FEATURE_SURFACE, x, y, shape, key))
+    order, kind, x, y, shape, key = zip(*parts)
+    kind = [np.full(len(orders), code, dtype=np.int8) for orders, code in zip(order, kind)]
+    return FeatureKeys(features.unit, *(np.concatenate(column) for column in
+                                        (order, kind, x, y, shape, key)))
+
+def _unmatched(keys_a, keys_b):
+    """
+    Multiset difference: Get the sorted indices of the keys_a elements
+    without an equal keys_b element (every element matches only once)
+    """
+    order = np.argsort(keys_a, kind="stable")
+    sorted_a, sorted_b = keys_a[order], np.sort(keys_b)
+    # Position of every element among the equal ones
+    rank = np.arange(len(sorted_a)) - np.searchsorted(sorted_a, sorted_a, side="left")
+    available = np.searchsorted(sorted_b, sorted_a, side="right") - \
+        np.searchsorted(sorted_b, sorted_a, side="left")
+    return np.sort(order[rank >= available])
+
+def _first(values):
+    "Get a mask of the first occurrence of every value"
+    mask = np.zeros(len(values), dtype=bool)
+    mask[np.unique(values, return_index=True)[1]] = True
+    return mask
+
+def _pair_by_shape(a, b, max_move):
+    """
+    Pair the features of two FeatureKeys with equal shape hashes at most
+    max_move apart, closest pairs first. Returns (indices into a, indices into b).
+    """
+    index = GridIndex.from_points(b.x, b.y)
+    pair_a, pair_b = index.query_pairs(a.x - max_move, a.y - max_move,
+                                       a.x + max_move, a.y + max_move)
+    distance = np.hypot(b.x[pair_b] - a.x[pair_a], b.y[pair_b] - a.y[pair_a])
+    keep = (a.shape[pair_a] == b.shape[pair_b]) & (distance <= max_move)
+    pair_a, pair_b, distance = pair_a[keep], pair_b[keep], distance[keep]
+    source, target = [], []
+    # Pair the features that are each other's closest candidate until none are
+    # left (the closest remaining pair always is)
+    while len(pair_a):
+        order = np.lexsort((pair_b, pair_a, distance))
+        pair_a, pair_b, distance = pair_a[order], pair_b[order], distance[order]
+        mutual = _first(pair_a) & _first(pair_b)
+        source.append(pair_a[mutual])
+        target.append(pair_b[mutual])
+        left = ~(np.isin(pair_a, pair_a[mutual]) | np.isin(pair_b, pair_b[mutual]))
+        pair_a, pair_b, distance = pair_a[left], pair_b[left], distance[left]
+    source = np.concatenate(source) if source else np.zeros(0, dtype=np.int64)
+    target = np.concatenate(target) if target else np.zeros(0, dtype=np.int64)
+    order = np.argsort(source, kind="stable")
+    return source[order], target[order]
+
+def _subset(keys, indices):
+    "Get the FeatureKeys at the given indices"
+    return FeatureKeys(keys.unit, *(column[indices] for column in keys[1:]))
+
+def _cluster(x, y, distance):
+    "Group points closer than distance. Returns (labels, ChangeClusters)"
+    if len(x) == 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), ChangeClusters(
+            empty, empty, empty, empty, np.zeros(0, dtype=np.int64))
+    index = GridIndex.from_points(x, y, distance or None)
+    a, b = index.query_pairs(x - distance, y - distance, x + distance, y + distance)
+    keep = (a < b) & (np.hypot(x[a] - x[b], y[a] - y[b]) <= distance)
+    labels = connected_components(len(x), a[keep], b[keep])
+    count = int(labels.max()) + 1
+    return labels, ChangeClusters(*_extents(labels, count, x, y, x, y),
+                                  np.bincount(labels, minlength=count))
+
+def diff_feature_keys(reference, revised, cluster_distance=1., max_move=1.):
+    """
+    Compare the FeatureKeys of two revisions of a layer.
+    Removed and added features with the same shape at most max_move apart
+    are paired as moved, nearest first. Changes at most cluster_distance apart
+    (moved features at their new location) are grouped into clusters.
+    Returns a LayerDiff.
+    """
+    if reference.unit != revised.unit:
+        raise ValueError("Can't compare layers with different units: {} and {}".format(
+            reference.unit, revised.unit))
+    removed = _subset(reference, _unmatched(reference.key, revised.key))
+    added = _subset(revised, _unmatched(revised.key, reference.key))
+    source, target = _pair_by_shape(removed, added, max_move)
+    dx, dy = added.x[target] - removed.x[source], added.y[target] - removed.y[source]
+    moved = _subset(removed, source), _subset(added, target)
+    removed = _subset(removed, np.setdiff1d(np.arange(len(removed)), source))
+    added = _subset(added, np.setdiff1d(np.arange(len(added)), target))
+    labels, clusters = _cluster(np.concatenate((removed.x, added.x, moved[1].x)),
+                                np.concatenate((removed.y, added.y, moved[1].y)), cluster_distance)
+    bounds = np.cumsum([len(removed), len(added)])
+    return LayerDiff(
+        FeatureChanges(removed.order, removed.kind, removed.x, removed.y, labels[:bounds[0]]),
+        FeatureChanges(added.order, added.kind, added.x, added.y, labels[bounds[0]:bounds[1]]),
+        MovedFeatures(moved[0].order, moved[1].order, moved[0].kind, dx, dy, labels[bounds[1]:]),
+        clusters)
+
+def diff_layer_features(reference, revised, tolerance=1e-4, cluster_distance=1.,
+                        max_move=1., max_angle=10.):
+    """
+    Compare two layer feature linerecord dicts (see feature_keys() and
+    diff_feature_keys()). Returns a LayerDiff.
+    """
+    return diff_feature_keys(feature_keys(reference, tolerance, max_angle),
+                             feature_keys(revised, tolerance, max_angle),
+                             cluster_distance, max_move)
+
+def _features_digest(directory, layer, step):
+    "Get the digest of the feature file of a layer (None if there is none)"
+    path = layer_file_path(directory, layer, "features.Z", step)
+    return file_digest(path) if os.path.exists(path) else None
+
+def _read_features_or_empty(directory, layer, step):
+    "Read the feature file of a layer (an empty dict if there is none)"
+    path = layer_file_path(directory, layer, "features.Z", step)
+    return read_linerecords(path) if os.path.exists(path) else {}
+
+def _diff_layer(reference_directory, revised_directory, layer, step, options):
+    "Read and compare one layer of two jobs"
+    return diff_layer_features(_read_features_or_empty(reference_directory, layer, step),
+                               _read_features_or_empty(revised_directory, layer, step),
+                               **options)
+
+def read_layer_diffs(reference_directory, revised_directory, layers, tolerance=1e-4,
+                     cluster_distance=1., max_move=1., workers=None, step="pcb"):
+    """
+    Compare the layers (a LayerSet or list of layer names) of two revisions of a job.
+    Layers whose feature files have the same digest are not parsed.
+    The other layers are compared in a process pool
+    (see Utils.parallel_map() for workers).
+    Returns a dict layer name => LayerDiff (None for unchanged layers).
+    """
+    names = [getattr(layer, "name", layer) for layer in layers]
+    changed = [name for name in names
+               if _features_digest(reference_directory, name, step) !=
+               _features_digest(revised_directory, name, step)]
+    options = {"tolerance": tolerance, "cluster_distance": cluster_distance,
+               "max_move": max_move}
+    args = [[reference_directory] * len(changed), [revised_directory] * len(changed),
+            changed, [step] * len(changed), [options] * len(changed)]
+    result = dict.fromkeys(names)
+    result.update(zip(changed, list(parallel_map(_diff_layer, *args, workers=workers))))
+    return result
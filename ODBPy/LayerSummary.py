@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Summary-only scan of ODB++ layer feature files
+"""
+from collections import namedtuple, Counter
+import numpy as np
+from .Features import parse_symbol_names
+from .Layers import read_layer_features
+from .Structures import polarity_map
+from .Utils import parallel_map
+
+__all__ = ["LayerSummary", "summarize_features", "summarize_layers"]
+
+class LayerSummary(namedtuple("LayerSummary", [
+        "record_counts", "extents", "symbols", "polarities"])):
+    """
+    Statistics for a single layer feature file.
+    record_counts = Counter of record keyword (P, L, A, T, B, S, OB, OS, OC, OE, SE) => count
+    extents = (xmin, ymin, xmax, ymax) of all coordinates or None for empty layers
+    symbols = Counter of symbol name (or number if the name is unknown) => usage count
+    polarities = Counter of Polarity => feature count
+    """
+
+# Token indices of the coordinate fields for every record keyword
+_coordinate_tokens = {
+    "P": ((1, 2),),
+    "L": ((1, 2), (3, 4)),
+    "A": ((1, 2), (3, 4), (5, 6)),
+    "T": ((1, 2),),
+    "B": ((1, 2),),
+    "OB": ((1, 2),),
+    "OS": ((1, 2),),
+    "OC": ((1, 2), (3, 4)),
+}
+
+# Token index of the polarity field for every record keyword except pads
+_polarity_token = {"L": 6, "A": 8, "T": 4, "B": 5, "S": 1}
+# Token index of the symbol number field for lines and arcs
+_symbol_token = {"L": 5, "A": 7}
+
+def summarize_features(linerecords):
+    """
+    Scan the "Layer features" section of a layer feature linerecord dict
+    and compute a LayerSummary.
+    Only the tokens of each line are inspected, no feature objects are built.
+    """
+    kinds = Counter()
+    symbols = Counter()
+    polarities = Counter()
+    xs, ys = [], []
+    for line in linerecords.get("Layer features", []):
+        tokens = line.partition(";")[0].split()
+        if not tokens:
+            continue
+        kind = tokens[0]
+        kinds[kind] += 1
+        for xi, yi in _coordinate_tokens.get(kind, ()):
+            xs.append(tokens[xi])
+            ys.append(tokens[yi])
+        if kind == "P":
+            # Long aperture syntax: "-1 <sym> <resize factor>"
+            if tokens[3] == "-1":
+                symbols[tokens[4]] += 1
+                polarities[tokens[6]] += 1
+            else:
+                symbols[tokens[3]] += 1
+                polarities[tokens[4]] += 1
+            continue
+        if kind in _symbol_token:
+            symbols[tokens[_symbol_token[kind]]] += 1
+        if kind in _polarity_token:
+            polarities[tokens[_polarity_token[kind]]] += 1
+    # Resolve the aggregated keys only, not every single record
+    symbol_names = parse_symbol_names(linerecords)
+    symbol_counts = Counter()
+    for symnum, count in symbols.items():
+        symnum = int(symnum)
+        symbol_counts[symbol_names.get(symnum, symnum)] += count
+    polarity_counts = Counter({
+        polarity_map[polarity]: count for polarity, count in polarities.items()
+    })
+    if xs:
+        x = np.array(xs, dtype=float)
+        y = np.array(ys, dtype=float)
+        extents = (float(x.min()), float(y.min()), float(x.max()), float(y.max()))
+    else:
+        extents = None
+    return LayerSummary(kinds, extents, symbol_counts, polarity_counts)
+
+def _summarize_layer(directory, layer):
+    "Read and summarize a single layer. Returns None if it has no feature file."
+    try:
+        return summarize_features(read_layer_features(directory, layer))
+    except FileNotFoundError:
+        return None
+
+def summarize_layers(directory, layers, workers=None):
+    """
+    Summarize every layer of the given LayerSet (or list of layer names)
+    in a process pool (see Utils.parallel_map() for workers).
+    Returns a dict of layer name => LayerSummary
+    (None for layers without a feature file).
+    """
+    names = [getattr(layer, "name", layer) for layer in layers]
+    summaries = list(parallel_map(_summarize_layer, [directory] * len(names), names,
+                                  workers=workers))
+    return dict(zip(names, summaries))
@@ -3,28 +3,31 @@
 """
 Parser for the ODB++ PCB matrix file
 """
+import numbers
 import os.path
 from collections import namedtuple
 from .StructuredTextParser import read_structured_text
 from .LineRecordParser import read_linerecords
 from .Structures import polarity_map
+from .Utils import step_directory
 from enum import Enum
 
 __all__ = ["Layer", "LayerSet", "LayerType", "parse_layers", "read_layers",
-           "read_layer_components", "read_layer_features"]
+           "read_layer_components", "read_layer_features", "layer_file_path",
+           "StackupIndex", "copper_layer_types"]
 
 class Layer(namedtuple("Layer", ["name", "type", "polarity", "index", "start", "end"])):
     """
     A layer reference in a ODB++ dataset
     start,end = start and end layer name
     """
-    def read_features(self, directory):
+    def read_features(self, directory, step="pcb"):
         """Read the layer feature file for the current layer from the given directory"""
-        return read_layer_features(directory, self.name)
+        return read_layer_features(directory, self.name, step)
 
-    def read_components(self, directory):
+    def read_components(self, directory, step="pcb"):
         """Read the layer components file for the current layer from the given directory"""
-        return read_layer_components(directory, self.name)
+        return read_layer_components(directory, self.name, step)
 
 class LayerSet(list):
     """
@@ -58,6 +61,10 @@ class LayerSet(list):
         """Get all signal layers"""
         return self.by_type(LayerType.Signal)
 
+    def stackup(self):
+        """Build a StackupIndex for the current layers"""
+        return StackupIndex(self)
+
     def top_components(self):
         """Get the top component layer, if any"""
         return self.component_layers()[0]
@@ -82,7 +89,8 @@ class LayerType(Enum):
     Document = 8
     Mixed = 9 # Mixed plane & signal
     Mask = 10 # GenFlex additional information
-    
+    PowerGround = 11
+
 _layer_type_map = { # See ODB++ 7.0 spec page 38
     "COMPONENT": LayerType.Component,
     "SILK_SCREEN": LayerType.SilkScreen,
@@ -93,9 +101,92 @@ _layer_type_map = { # See ODB++ 7.0 spec page 38
     "ROUT": LayerType.Route,
     "DOCUMENT": LayerType.Document,
     "MIXED": LayerType.Mixed,
-    "MASK": LayerType.Mask
+    "MASK": LayerType.Mask,
+    "POWER_GROUND": LayerType.PowerGround
 }
 
+# Layer types that carry copper
+copper_layer_types = (LayerType.Signal, LayerType.PowerGround, LayerType.Mixed)
+
+class StackupIndex(object):
+    """
+    Precomputed lookup tables for the layer stackup of a LayerSet.
+
+    layers: All layers sorted by matrix row
+    copper_layers: The copper layers (see copper_layer_types) sorted by row.
+        Copper layers are referred to either by name or by their
+        position in this list.
+    """
+    def __init__(self, layers):
+        self.layers = LayerSet(sorted(layers, key=lambda layer: layer.index))
+        self._position = {layer.name.lower(): i for i, layer in enumerate(self.layers)}
+        self._row_position = {layer.index: i for i, layer in enumerate(self.layers)}
+        self.copper_layers = LayerSet(
+            layer for layer in self.layers if layer.type in copper_layer_types)
+        self._copper_position = {
+            layer.name.lower(): i for i, layer in enumerate(self.copper_layers)}
+        # Drill layer => spanned copper positions and the inverse mapping
+        self._spans = {}
+        self._drills_on = [[] for _ in self.copper_layers]
+        for layer in self.layers.by_type(LayerType.Drill):
+            span = self._resolve_span(layer)
+            self._spans[layer.name.lower()] = span
+            for position in span:
+                self._drills_on[position].append(layer.name)
+
+    def _resolve_span(self, drill):
+        """
+        Get the positions of the copper layers between the start and end layer
+        of a drill. Drills without start/end layer span the entire stackup.
+        Raises ValueError if the start or end layer does not exist.
+        """
+        for name in (drill.start, drill.end):
+            if name and name not in self._position:
+                raise ValueError("Drill layer {} spans unknown layer {}".format(drill.name, name))
+        start = self._position.get(drill.start) if drill.start else None
+        end = self._position.get(drill.end) if drill.end else None
+        first = self.layers[start].index if start is not None else -float("inf")
+        last = self.layers[end].index if end is not None else float("inf")
+        first, last = min(first, last), max(first, last)
+        return [i for i, layer in enumerate(self.copper_layers)
+                if first <= layer.index <= last]
+
+    def _copper_index(self, layer):
+        "Get the copper position of a copper layer given by name or position"
+        if isinstance(layer, numbers.Integral):
+            return int(layer)
+        return self._copper_position[layer.lower()]
+
+    def layer(self, name):
+        "Get a layer by name (case-insensitive) or None"
+        position = self._position.get(name.lower())
+        return self.layers[position] if position is not None else None
+
+    def position_of(self, name):
+        "Get the position of a layer given by name in the row-ordered layers or None"
+        return self._position.get(name.lower())
+
+    def position_of_row(self, row):
+        "Get the position of the layer with the given matrix row or None"
+        return self._row_position.get(row)
+
+    def copper_position(self, name):
+        "Get the position of a copper layer given by name in copper_layers or None"
+        return self._copper_position.get(name.lower())
+
+    def span(self, drill):
+        "Get the names of the copper layers spanned by a drill layer, top to bottom"
+        return [self.copper_layers[i].name for i in self.span_positions(drill)]
+
+    def span_positions(self, drill):
+        "Get the copper positions spanned by a drill layer, top to bottom"
+        return self._spans[getattr(drill, "name", drill).lower()]
+
+    def drills_on(self, layer):
+        "Get the names of all drill layers touching a copper layer given by name or position"
+        return self._drills_on[self._copper_index(layer)]
+
+
 def parse_layers(matrix):
     layers = LayerSet()
     for array in matrix.arrays:
@@ -115,13 +206,15 @@ def read_layers(directory):
     matrix = read_structured_text(os.path.join(directory, "matrix/matrix"))
     return parse_layers(matrix)
 
-def read_layer_components(directory, layer):
-    return read_linerecords(os.path.join(
-        directory, "steps", "pcb", "layers", layer, "components.Z"))
+def layer_file_path(directory, layer, filename, step="pcb"):
+    "Get the path of a file (e.g. features.Z) in the given layer directory of a step"
+    return os.path.join(step_directory(directory, step), "layers", layer, filename)
+
+def read_layer_components(directory, layer, step="pcb"):
+    return read_linerecords(layer_file_path(directory, layer, "components.Z", step))
 
-def read_layer_features(directory, layer):
-    return read_linerecords(os.path.join(
-        directory, "steps", "pcb", "layers", layer, "features.Z"))
+def read_layer_features(directory, layer, step="pcb"):
+    return read_linerecords(layer_file_path(directory, layer, "features.Z", step))
 
 
 if __name__ == "__main__":
@@ -129,6 +222,17 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("directory", help="The ODB++ directory")
+    parser.add_argument("-s", "--summary", action="store_true",
+        help="Print feature statistics for every layer")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+        help="Number of worker processes for --summary (default: one per CPU)")
     args = parser.parse_args()
     #Perform check
-    print(read_layers(args.directory))
+    layers = read_layers(args.directory)
+    if args.summary:
+        from .LayerSummary import summarize_layers
+        summaries = summarize_layers(args.directory, layers, workers=args.jobs)
+        for name, summary in summaries.items():
+            print("{}: {}".format(name, summary))
+    else:
+        print(layers)
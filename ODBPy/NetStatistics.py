@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-net statistics: routed length per layer, via count and copper area
+"""
+from collections import namedtuple
+import numpy as np
+from .ColumnarNetlist import read_columnar_netlist
+from .Connectivity import layer_connectivity, connect_layers
+from .DrillHits import read_drill_hits
+from .FeatureArrays import parse_feature_arrays
+from .Geometry import SHAPE_ROUND, SHAPE_RECT, symbol_shapes, pad_areas, arc_sweeps, \
+     polygons_area
+from .Layers import LayerType, read_layer_features
+from .Structures import Polarity, HolePlating
+from .Utils import parallel_map
+
+__all__ = ["FeatureMeasures", "NetTotals", "NetStatistics", "feature_measures",
+           "via_hits", "net_statistics", "read_net_statistics"]
+
+class FeatureMeasures(namedtuple("FeatureMeasures", ["order", "length", "area"])):
+    """
+    Length and area of the features adding copper to a layer.
+    order = feature order (see FeatureArrays),
+    length = routed length (lines and arcs, 0 for pads and surfaces),
+    area = drawn area of the feature in square coordinate units
+    (0 for pads and lines with other than round, rectangular or oval symbols)
+    """
+    def __len__(self):
+        return len(self.order)
+
+NetTotals = namedtuple("NetTotals", ["length", "area", "vias"])
+
+class NetStatistics(namedtuple("NetStatistics", ["names", "layers", "length", "area", "vias"])):
+    """
+    Statistics for every net.
+    names = net names, layers = layer names,
+    length = (nets, layers) array of routed lengths,
+    area = (nets, layers) array of copper areas, i.e. the sums of the
+        drawn feature areas (see feature_measures()),
+    vias = via hits of every net
+    """
+    def __len__(self):
+        return len(self.names)
+
+    def total_length(self):
+        "Get the routed length of every net over all layers"
+        return self.length.sum(axis=1)
+
+    def total_area(self):
+        "Get the copper area of every net over all layers"
+        return self.area.sum(axis=1)
+
+    def table(self):
+        """
+        Get a dict net name => NetTotals with length and area
+        as dicts layer name => value
+        """
+        return {
+            name: NetTotals(dict(zip(self.layers, length)), dict(zip(self.layers, area)), vias)
+            for name, length, area, vias in zip(
+                self.names, self.length.tolist(), self.area.tolist(), self.vias.tolist())
+        }
+
+def _line_measures(features, keep):
+    "Get (length, area) of the selected lines"
+    lines = features.lines
+    dx = lines.xe[keep] - lines.xs[keep]
+    dy = lines.ye[keep] - lines.ys[keep]
+    length = np.hypot(dx, dy)
+    shape, half_width, half_height = symbol_shapes(features, lines.symbol[keep])
+    # Round pens sweep a capsule, square pens an octagon (box plus swept sides)
+    area = np.select([shape == SHAPE_ROUND, shape == SHAPE_RECT],
+                     [2 * half_width * length + np.pi * half_width ** 2,
+                      4 * half_width * half_height + 2 * half_width * np.abs(dy) +
+                      2 * half_height * np.abs(dx)], 0.)
+    return length, area
+
+def _arc_measures(features, keep):
+    "Get (length, area) of the selected arcs"
+    arcs = features.arcs
+    _, radius, sweep = arc_sweeps(arcs.xs[keep], arcs.ys[keep], arcs.xe[keep], arcs.ye[keep],
+                                  arcs.xc[keep], arcs.yc[keep], arcs.clockwise[keep])
+    length = radius * np.abs(sweep)
+    _, half_width, _ = symbol_shapes(features, arcs.symbol[keep])
+    area = np.nan_to_num(2 * half_width * length + np.pi * half_width ** 2)
+    return length, area
+
+def feature_measures(features, layer_polarity=Polarity.Positive):
+    """
+    Compute the FeatureMeasures of the features of FeatureArrays that add
+    copper, i.e. the negative features on a negative layer (see
+    Layer.polarity). The copper area is the sum of the drawn feature areas:
+    overlaps are counted repeatedly, the copper removed by clearing features
+    is not subtracted and the plane of a negative layer is not measured.
+    Arc areas are exact as long as the pen radius does not exceed the arc radius.
+    """
+    copper = Polarity.Negative if layer_polarity == Polarity.Negative else Polarity.Positive
+    pads, lines, arcs = features.pads, features.lines, features.arcs
+    keep = pads.polarity == copper.value
+    orders, lengths, areas = [pads.order[keep]], [np.zeros(np.count_nonzero(keep))], \
+        [np.nan_to_num(pad_areas(features)[keep])]
+    for arrays, measure in ((lines, _line_measures), (arcs, _arc_measures)):
+        keep = arrays.polarity == copper.value
+        length, area = measure(features, keep)
+        orders.append(arrays.order[keep])
+        lengths.append(length)
+        areas.append(area)
+    surfaces = [(order, surface) for order, surface in features.surfaces
+                if surface.polarity == copper]
+    orders.append(np.array([order for order, _ in surfaces], dtype=np.int64))
+    lengths.append(np.zeros(len(surfaces)))
+    areas.append(np.array([polygons_area(surface.polygons) for _, surface in surfaces]))
+    order = np.concatenate(orders)
+    sort = np.argsort(order, kind="stable")
+    return FeatureMeasures(order[sort], np.concatenate(lengths)[sort],
+                           np.concatenate(areas)[sort])
+
+def via_hits(hits):
+    "Get the indices of the hits of DrillHits drilled with via tools"
+    vias = [i for i, tool in enumerate(hits.tools) if tool.type == HolePlating.Via]
+    return np.flatnonzero(np.isin(hits.tool, vias))
+
+def net_statistics(layers, measures, feature_nets, names, via_nets=None):
+    """
+    Sum FeatureMeasures per net and layer.
+    layers = layer names, measures = FeatureMeasures per layer,
+    feature_nets = net index of every feature order per layer (-1 = no net),
+    names = name of every net index (nets with the same name are merged),
+    via_nets = net index of every via hit (-1 = no net).
+    Returns NetStatistics.
+    """
+    unique = {}
+    group = np.array([unique.setdefault(name, len(unique)) for name in names] + [-1],
+                     dtype=np.int64) # Index -1 (no net) picks the trailing -1
+    length = np.zeros((len(unique), len(layers)))
+    area = np.zeros((len(unique), len(layers)))
+    for column, (measure, nets) in enumerate(zip(measures, feature_nets)):
+        net = group[np.asarray(nets)[measure.order]]
+        keep = net >= 0
+        length[:, column] = np.bincount(net[keep], weights=measure.length[keep],
+                                        minlength=len(unique))
+        area[:, column] = np.bincount(net[keep], weights=measure.area[keep],
+                                      minlength=len(unique))
+    vias = np.zeros(len(unique), dtype=np.int64)
+    if via_nets is not None:
+        net = group[np.asarray(via_nets, dtype=np.int64)]
+        vias = np.bincount(net[net >= 0], minlength=len(unique))
+    return NetStatistics(list(unique), list(layers), length, area, vias)
+
+def _read_layer_measures(directory, layer, polarity):
+    "Read a copper layer, find its connected copper and measure its features"
+    features = parse_feature_arrays(read_layer_features(directory, layer))
+    return layer_connectivity(features, layer_polarity=polarity), \
+        feature_measures(features, polarity)
+
+def read_net_statistics(directory, layers, workers=None, by="size"):
+    """
+    Compute the NetStatistics of a LayerSet. Nets are derived from the copper
+    (see the Connectivity module) and named after the CAD netlist nets.
+    The copper layers are processed in a process pool
+    (see Utils.parallel_map() for workers).
+    """
+    stackup = layers.stackup()
+    copper = stackup.copper_layers
+    names = [layer.name for layer in copper]
+    results = list(parallel_map(_read_layer_measures, [directory] * len(names), names,
+                                [layer.polarity for layer in copper], workers=workers))
+    connectivity = [connected for connected, _ in results]
+    drills = [(read_drill_hits(directory, drill.name, by), stackup.span_positions(drill))
+              for drill in stackup.layers.by_type(LayerType.Drill)]
+    nets = connect_layers(connectivity, drills)
+    # Vias are located on the first copper layer they span
+    via_nets = [np.zeros(0, dtype=np.int64)]
+    for hits, positions in drills:
+        vias = via_hits(hits)
+        if len(positions) and len(vias):
+            position = positions[0]
+            unit = connectivity[position].unit
+            radius = np.nan_to_num(hits.radius(unit)[vias])
+            x, y = hits.coordinates(unit)
+            via_nets.append(nets.nets_at(position, x[vias], y[vias], radius))
+    return net_statistics(names, [measure for _, measure in results],
+                          [nets.feature_nets(layer) for layer in range(len(names))],
+                          nets.net_names(read_columnar_netlist(directory)),
+                          np.concatenate(via_nets))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hash based netlist comparison between two ColumnarNetlists
+"""
+from collections import namedtuple, defaultdict
+import numpy as np
+from .SpatialIndex import expand_ranges
+
+__all__ = ["NetlistDiff", "MovedPoints", "diff_netlists", "quantize_locations", "mix_keys"]
+
+NetlistDiff = namedtuple("NetlistDiff", [
+        "opens", "shorts", "renamed", "moved", "removed_nets", "added_nets"])
+MovedPoints = namedtuple("MovedPoints", ["reference_net", "revised_net", "removed", "added"])
+
+def quantize_locations(x, y, tolerance):
+    """
+    Map coordinates to int64 keys so that locations on the same
+    tolerance grid point get the same key.
+    """
+    qx = np.round(np.asarray(x) / tolerance).astype(np.int64)
+    qy = np.round(np.asarray(y) / tolerance).astype(np.int64)
+    return (qx << 32) + (qy & 0xffffffff)
+
+def mix_keys(keys):
+    "splitmix64 finalizer: spread int64 keys over the full uint64 range"
+    z = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+class _CanonicalNetlist(object):
+    """
+    The unique (net, location key) pairs of the regular nets of a netlist
+    (with coordinates in the given unit), sorted by net, together with a
+    set hash per net.
+    """
+    def __init__(self, netlist, tolerance, unit):
+        self.names = netlist.names
+        regular = netlist.netid >= 0 # Skip tooling holes and $NONE$ points
+        nets = netlist.net_index[regular]
+        x, y = (column[regular] for column in netlist.coordinates(unit))
+        keys = quantize_locations(x, y, tolerance)
+        coords = np.column_stack((x, y))
+        # Unique (net, key) pairs, sorted by net then key
+        order = np.lexsort((keys, nets))
+        nets, keys, coords = nets[order], keys[order], coords[order]
+        unique = np.ones(len(nets), dtype=bool)
+        unique[1:] = (nets[1:] != nets[:-1]) | (keys[1:] != keys[:-1])
+        self.nets, self.keys, self.coords = nets[unique], keys[unique], coords[unique]
+        # Order independent set hash: sum of mixed keys plus mixed size
+        self.net_ids, starts, counts = np.unique(
+            self.nets, return_index=True, return_counts=True)
+        with np.errstate(over="ignore"):
+            sums = np.add.reduceat(mix_keys(self.keys), starts) if len(starts) \
+                   else np.zeros(0, dtype=np.uint64)
+            self.signatures = sums + mix_keys(counts)
+
+    def subset(self, keep_nets):
+        "Get (nets, keys, coords) only for the given net indices"
+        mask = np.isin(self.nets, keep_nets)
+        return self.nets[mask], self.keys[mask], self.coords[mask]
+
+def _match_identical(ref, rev):
+    """
+    Match nets with identical point sets via their signatures.
+    Returns (reference net ids, revised net ids) of the matches.
+    """
+    if len(rev.signatures) == 0:
+        return ref.net_ids[:0], rev.net_ids[:0]
+    order = np.argsort(rev.signatures, kind="stable")
+    sorted_sigs = rev.signatures[order]
+    pos = np.minimum(np.searchsorted(sorted_sigs, ref.signatures), len(order) - 1)
+    found = sorted_sigs[pos] == ref.signatures
+    ref_ids, rev_ids = ref.net_ids[found], rev.net_ids[order[pos[found]]]
+    # Identical revised signatures must only be matched once
+    _, first = np.unique(rev_ids, return_index=True)
+    return ref_ids[first], rev_ids[first]
+
+def _join_on_keys(keys_a, keys_b):
+    """
+    Sort-merge join two key arrays.
+    Returns index arrays (ia, ib) of all pairs with keys_a[ia] == keys_b[ib].
+    """
+    order = np.argsort(keys_a, kind="stable")
+    sorted_a = keys_a[order]
+    lo = np.searchsorted(sorted_a, keys_b, side="left")
+    hi = np.searchsorted(sorted_a, keys_b, side="right")
+    ib, entries = expand_ranges(lo, hi)
+    return order[entries], ib
+
+def _join_near(keys_a, coords_a, coords_b, tolerance):
+    """
+    Join two point sets on their location keys (see quantize_locations()),
+    including the points in neighbouring grid cells closer than tolerance.
+    Returns unique index arrays (ia, ib) of all matching pairs.
+    """
+    ia, ib = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            keys = quantize_locations(coords_b[:, 0] + dx * tolerance,
+                                      coords_b[:, 1] + dy * tolerance, tolerance)
+            a, b = _join_on_keys(keys_a, keys)
+            if dx or dy:
+                near = np.hypot(*(coords_a[a] - coords_b[b]).T) <= tolerance
+                a, b = a[near], b[near]
+            ia.append(a)
+            ib.append(b)
+    pairs = np.unique(np.column_stack((np.concatenate(ia), np.concatenate(ib))), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+def _group_links(sources, targets):
+    "Given unique links, return {source: [targets]} for sources with more than one target"
+    order = np.lexsort((targets, sources))
+    sources, targets = sources[order], targets[order]
+    ids, starts, counts = np.unique(sources, return_index=True, return_counts=True)
+    return {
+        src: targets[start:start + count].tolist()
+        for src, start, count in zip(ids.tolist(), starts.tolist(), counts.tolist())
+        if count > 1
+    }
+
+def diff_netlists(reference, revised, tolerance=1e-4):
+    """
+    Compare two ColumnarNetlists. Point locations snapped to the same point
+    of a tolerance grid (in units of the reference netlist) or closer than
+    tolerance are considered identical. The revised netlist is converted to
+    the unit of the reference netlist, which all reported points use.
+
+    Returns a NetlistDiff of lists:
+        opens: (reference net, [revised nets]) for reference nets split into several nets
+        shorts: (revised net, [reference nets]) for revised nets joining several nets
+        renamed: (reference net, revised net) for nets that correspond 1:1 but
+            have different names
+        moved: MovedPoints for 1:1 corresponding nets with points that exist in
+            only one of the netlists, with (N, 2) arrays of the removed and added points
+        removed_nets, added_nets: nets whose points all vanished or are all new
+    """
+    ref = _CanonicalNetlist(reference, tolerance, reference.unit)
+    rev = _CanonicalNetlist(revised, tolerance, reference.unit)
+    same_ref, same_rev = _match_identical(ref, rev)
+    renamed = [(ref.names[a], rev.names[b])
+               for a, b in zip(same_ref.tolist(), same_rev.tolist())
+               if ref.names[a] != rev.names[b]]
+    # Only the remaining nets need a point level comparison
+    nets_a, keys_a, coords_a = ref.subset(np.setdiff1d(ref.net_ids, same_ref))
+    nets_b, keys_b, coords_b = rev.subset(np.setdiff1d(rev.net_ids, same_rev))
+    ia, ib = _join_near(keys_a, coords_a, coords_b, tolerance)
+    links = np.unique(np.column_stack((nets_a[ia], nets_b[ib])), axis=0) \
+            if len(ia) else np.zeros((0, 2), dtype=np.int64)
+    splits = _group_links(links[:, 0], links[:, 1])
+    joins = _group_links(links[:, 1], links[:, 0])
+    opens = [(ref.names[a], [rev.names[b] for b in bs]) for a, bs in splits.items()]
+    shorts = [(rev.names[b], [ref.names[a] for a in as_]) for b, as_ in joins.items()]
+    # Nets that correspond one to one
+    one_to_one = {}
+    for a, b in links.tolist():
+        if a not in splits and b not in joins:
+            one_to_one[a] = b
+            if ref.names[a] != rev.names[b]:
+                renamed.append((ref.names[a], rev.names[b]))
+    # Points without any counterpart
+    removed = np.ones(len(keys_a), dtype=bool)
+    removed[ia] = False
+    added = np.ones(len(keys_b), dtype=bool)
+    added[ib] = False
+    removed_by_net = defaultdict(list)
+    for net, coord in zip(nets_a[removed].tolist(), coords_a[removed]):
+        removed_by_net[net].append(coord)
+    added_by_net = defaultdict(list)
+    for net, coord in zip(nets_b[added].tolist(), coords_b[added]):
+        added_by_net[net].append(coord)
+    linked_a, linked_b = set(links[:, 0].tolist()), set(links[:, 1].tolist())
+    removed_nets = [ref.names[a] for a in removed_by_net if a not in linked_a]
+    added_nets = [rev.names[b] for b in added_by_net if b not in linked_b]
+    moved = []
+    empty = np.zeros((0, 2))
+    for a, b in one_to_one.items():
+        if a in removed_by_net or b in added_by_net:
+            moved.append(MovedPoints(ref.names[a], rev.names[b],
+                np.array(removed_by_net.get(a, empty)).reshape(-1, 2),
+                np.array(added_by_net.get(b, empty)).reshape(-1, 2)))
+    return NetlistDiff(opens, shorts, renamed, moved, removed_nets, added_nets)
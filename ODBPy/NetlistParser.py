@@ -7,8 +7,9 @@ according to the ODB++ 7.0 specification:
 http://www.odb-sa.com/wp-content/uploads/ODB_Format_Description_v7.pdf
 """
 import re
-from collections import namedtuple, defaultdict
-from .Utils import const_false, not_none, try_parse_number
+import functools
+from collections import namedtuple
+from .Utils import not_none, try_parse_number
 from .Structures import Point
 from enum import Enum
 from .Decoder import DecoderOption
@@ -16,36 +17,97 @@ from .Decoder import DecoderOption
 __all__ = ["is_netlist_optimized", "parse_net_names", "StaggeringParameters",
            "NetlistPointTypeInformation", "NetlistPoint", "TestpointTestSide",
            "NetSide", "NetPointLocation", "NetPointExposure",
-           "netlist_decoder_options", "assign_net_name"]
+           "netlist_decoder_options", "assign_net_name",
+           "split_netlist_point", "parse_netlist_point"]
 
 _h_optimize_re = re.compile(r"^H\s+optimize\s+([YN])\s*$", re.IGNORECASE)
 
 # TODO comment point is not supported as the exact format is not clear
-_netlist_point_re = re.compile(r"^(-?\d+|\$NONE\$)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+(-?[\.\d]+)\s+([TDB])\s+(-?[\.\d]+\s+-?[\.\d]+)?\s*([em])\s+([ecps])\s+(staggered\s+-?[\.\d]+\s+-?[\.\d]+\s+-?[\.\d]+)?\s*([vV]\s+)?([fF]\s+)?([tT]\s+)?([mM]\s*)?(eXtended\s+\S+\s*)?([csban])?")
+# Netlist point format (fields in brackets are optional):
+# <netid> <radius> <x> <y> <side> [<w> <h>] <epoint> <exp> [staggered <sx> <sy> <sr>]
+#   [v] [f] [t] [m] [eXtended <name>] [<testside>]
 # Test cases:
 # Actual
 # 10 0.0236 0.45 -1.2916 B e e staggered 0 0 0
 # 9 0.0069 0.287 -1.312 B e e staggered 0 0 0 v
 # 9 0 0.24 -1.18 T 0.0354 0.0276 e e staggered 0 0 0
-# Presumed
-# TODO
-# Testcase format: _parse_netlist_point(_netlist_point_re.search("10 0.0236 0.45 -1.2916 B e e staggered 0 0 0"))
+# Testcase format: parse_netlist_point("10 0.0236 0.45 -1.2916 B e e staggered 0 0 0")
 
+_point_locations = ("e", "m")
+_point_exposures = ("e", "c", "p", "s")
+_point_sides = ("T", "D", "B")
+_point_testsides = ("c", "s", "b", "a", "n")
+# Single-character flags, in the order they may appear
+_via_chars = ("v", "V")
+_fiducial_chars = ("f", "F")
+_testpoint_chars = ("t", "T")
+_midpoint_chars = ("m", "M")
+# Characters of plain decimal numbers. Checking them rejects exponents, nan and inf,
+# the remaining syntax is checked by float()
+_decimal_chars = frozenset("-.0123456789")
 
-def _generate_boolean_ci_lut(char):
+def split_netlist_point(line):
     """
-    Generate a boolean result map taking char.lower() and char.upper()
-    as True and everything else as False
+    Split a netlist point line into its raw string fields
+    in a single left-to-right pass over its tokens.
+    Returns None if the line is not a netlist point, else a tuple
+        (netid, radius, x, y, side, size, point_location, exposure, staggered,
+         v, f, t, m, extension, testside)
+    where size is a (w, h) tuple, staggered is a (sx, sy, sr) tuple
+    and all optional fields are None if they are not present.
+    Numeric fields are not converted, but may only contain the characters
+    of plain decimal numbers (no exponents, nan or inf).
+    Unknown trailing tokens are ignored.
     """
-    ret = defaultdict(const_false)
-    ret[char.lower()] = True
-    ret[char.upper()] = False
-    return ret
-
-_is_via_lut = _generate_boolean_ci_lut("v")
-_is_fiducial_lut = _generate_boolean_ci_lut("f")
-_is_testpoint_lut = _generate_boolean_ci_lut("t")
-_force_midpoint_testable_lut = _generate_boolean_ci_lut("m")
+    tokens = line.split()
+    ntokens = len(tokens)
+    if ntokens < 7:
+        return None
+    netid = tokens[0]
+    if netid != "$NONE$" and not netid.lstrip("-").isdigit():
+        return None
+    if tokens[4] not in _point_sides:
+        return None
+    numbers = tokens[1] + tokens[2] + tokens[3]
+    # Optional <w> <h>
+    i = 5
+    size = None
+    if tokens[i] not in _point_locations:
+        size = (tokens[i], tokens[i + 1])
+        numbers += size[0] + size[1]
+        i += 2
+    if i + 1 >= ntokens or tokens[i] not in _point_locations \
+            or tokens[i + 1] not in _point_exposures:
+        return None
+    point_location, exposure = tokens[i], tokens[i + 1]
+    i += 2
+    staggered = None
+    if i + 3 < ntokens and tokens[i] == "staggered":
+        staggered = tuple(tokens[i + 1:i + 4])
+        numbers += "".join(staggered)
+        i += 4
+    v = f = t = m = None
+    if i < ntokens and tokens[i] in _via_chars:
+        v = tokens[i]
+        i += 1
+    if i < ntokens and tokens[i] in _fiducial_chars:
+        f = tokens[i]
+        i += 1
+    if i < ntokens and tokens[i] in _testpoint_chars:
+        t = tokens[i]
+        i += 1
+    if i < ntokens and tokens[i] in _midpoint_chars:
+        m = tokens[i]
+        i += 1
+    extension = None
+    if i + 1 < ntokens and tokens[i] == "eXtended":
+        extension = tokens[i + 1]
+        i += 2
+    testside = tokens[i] if i < ntokens and tokens[i] in _point_testsides else None
+    if not _decimal_chars.issuperset(numbers):
+        return None
+    return (netid, tokens[1], tokens[2], tokens[3], tokens[4], size,
+            point_location, exposure, staggered, v, f, t, m, extension, testside)
 
 
 def is_netlist_optimized(linerec):
@@ -85,42 +147,59 @@ NetlistPoint = namedtuple("NetlistPoint", [
         "netid", "radius", "location", "side", "size", "point_location",
         "exposure", "staggered", "point_type"])
 
-def _parse_netlist_point(match):
+@functools.lru_cache(maxsize=1024)
+def _staggering_parameters(sx, sy, sr):
+    "Build (and share) StaggeringParameters. Most exports use the same values for every point."
+    return StaggeringParameters(Point(float(sx), float(sy)), float(sr))
+
+@functools.lru_cache(maxsize=1024)
+def _point_type_information(v, f, t, m, xtension, testside):
+    "Build (and share) the NetlistPointTypeInformation for a flag combination"
+    # Only the lowercase flag characters are set
+    return NetlistPointTypeInformation(
+        v == "v", f == "f", t == "t", m == "m",
+        xtension, _testpoint_test_side_lut[testside])
+
+def _netlist_point_from_fields(fields):
+    """
+    Build a NetlistPoint from the raw fields returned by split_netlist_point().
+    Returns None if any of the numeric fields is invalid.
+    """
+    netid, radius, x, y, side, size, point_location, exposure, staggered, \
+        v, f, t, m, xtension, testside = fields
+    try:
+        # size is only set when radius is 0 (probably a plated slot)
+        if size is not None:
+            size = Point(float(size[0]), float(size[1]))
+        # Staggered is mostly set for DipTrace exports
+        if staggered is not None:
+            staggered = _staggering_parameters(*staggered)
+        location = Point(float(x), float(y))
+        radius = float(radius)
+    except ValueError:
+        return None
     # netid -1 => tooling hole
-    netid, radius, x, y, side, wh, point_location, exposure, staggered, v, f, t, m, xtension, testside = match.groups()
-    # wh is only not None when radius is 0 (probably a plated slot)
-    if wh is not None:
-        w, _, h = wh.partition(" ")
-    # Staggered is mostly set for DipTrace exports
-    if staggered is not None:
-        sx, sy, sr = staggered.split()[1:]
-        staggering_params = StaggeringParameters(
-            Point(float(sx), float(sy)), float(sr))
-    # Extension
-    if xtension is not None:
-        # Format (presumed): "eXtended foobar"
-        # Remove "eXtended"
-        xtension = xtension.partition(" ")[2]
-    # Create return data structure
     return NetlistPoint(
         try_parse_number(netid),
-        float(radius),
-        Point(float(x), float(y)),
+        radius,
+        location,
         _net_side_lut[side],
-        Point(float(w), float(h)) if wh is not None else None,
+        size,
         _net_point_location_lut[point_location],
         _net_point_exposure_lut[exposure],
-        staggering_params if staggered is not None else None,
-        NetlistPointTypeInformation(
-            _is_via_lut[v],
-            _is_fiducial_lut[f],
-            _is_testpoint_lut[t],
-            _force_midpoint_testable_lut[m],
-            xtension,
-            _testpoint_test_side_lut[testside]
-        )
+        staggered,
+        _point_type_information(v, f, t, m, xtension, testside)
     )
 
+def parse_netlist_point(line):
+    """
+    Parse a single netlist point line into a NetlistPoint.
+    Returns None if the line is not a valid netlist point.
+    Runs in linear time regardless of the line content.
+    """
+    fields = split_netlist_point(line)
+    return _netlist_point_from_fields(fields) if fields is not None else None
+
 
 class TestpointTestSide(Enum):
     ComponentSide = 1
@@ -174,9 +253,10 @@ _net_point_exposure_lut = {
 }
 
 netlist_decoder_options = [
-    DecoderOption(_netlist_point_re, _parse_netlist_point)
+    DecoderOption(None, _netlist_point_from_fields, split_netlist_point)
 ]
 
+
 def assign_net_name(netnames, netpoint):
     """Looksup the netpoint netid in the net name map and replace """
     netid = netpoint.netid
@@ -187,3 +267,30 @@ def assign_net_name(netnames, netpoint):
     params = list(netpoint)
     params[0] = netname
     return NetlistPoint(*params)
+
+def _synthetic_netlist_points(count, seed=0):
+    "Generate count random netlist point lines for benchmarking"
+    import random
+    rng = random.Random(seed)
+    suffixes = ["", " v", " t c", " v f t m eXtended foo b"]
+    return ["{} {:.4f} {:.4f} {:.4f} {} e {} staggered 0 0 0{}".format(
+                rng.randrange(count // 8 + 1), rng.uniform(0, 0.05),
+                rng.uniform(-10, 10), rng.uniform(-10, 10), rng.choice("TDB"),
+                rng.choice("ecps"), rng.choice(suffixes))
+            for _ in range(count)]
+
+if __name__ == "__main__":
+    #Parse commandline arguments
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Benchmark the netlist point parser")
+    parser.add_argument("-n", "--points", type=int, default=1000000,
+        help="Number of synthetic netlist points")
+    args = parser.parse_args()
+    #Run benchmark
+    lines = _synthetic_netlist_points(args.points)
+    start = time.perf_counter()
+    points = [parse_netlist_point(line) for line in lines]
+    elapsed = time.perf_counter() - start
+    print("Parsed {} netlist points in {:.2f} s ({:.0f} points/s)".format(
+        len(points), elapsed, len(points) / elapsed))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Net assignment for the pads of the outer copper layers
+"""
+from collections import namedtuple
+import numpy as np
+from .ColumnarNetlist import read_columnar_netlist
+from .FeatureArrays import parse_feature_arrays
+from .Layers import StackupIndex, read_layer_features
+from .NetlistParser import NetSide
+from .SpatialIndex import GridIndex
+
+__all__ = ["PadNets", "assign_pad_nets", "read_pad_nets"]
+
+class PadNets(namedtuple("PadNets", ["side", "point", "net", "distance", "unmatched_points"])):
+    """
+    Net assignment of the pads of one layer.
+    side = NetSide of the layer,
+    point = netlist point index for every pad (-1 if unmatched),
+    net = netlist net index for every pad (-1 if unmatched),
+    distance = distance to the matched point in the coordinate unit
+        of the pads (inf if unmatched),
+    unmatched_points = netlist points of the side without any pad
+    """
+    def __len__(self):
+        return len(self.point)
+
+    def unmatched_pads(self):
+        "Get the indices of the pads without a netlist point"
+        return np.flatnonzero(self.point < 0)
+
+    def net_names(self, netlist):
+        "Get the net name of every pad (None if unmatched)"
+        return [netlist.names[net] if net >= 0 else None for net in self.net.tolist()]
+
+    def pads_of(self, net):
+        "Get the pad indices assigned to a net given by index"
+        return np.flatnonzero(self.net == net)
+
+def assign_pad_nets(features, netlist, side, tolerance=0.001):
+    """
+    Join the pads of FeatureArrays to the netlist points (ColumnarNetlist)
+    on the given NetSide (points on both sides always take part).
+    The netlist points are converted to the coordinate unit of the features,
+    tolerance = maximum distance in that unit.
+    Returns PadNets.
+    """
+    candidates = np.flatnonzero((netlist.side == side.value) |
+                                (netlist.side == NetSide.Both.value))
+    x, y = netlist.coordinates(features.unit)
+    index = GridIndex.from_points(x[candidates], y[candidates])
+    nearest, distance = index.nearest(features.pads.x, features.pads.y, tolerance)
+    # Index -1 picks the appended -1 for unmatched pads
+    point = np.append(candidates, -1)[nearest]
+    net = np.append(netlist.net_index, -1)[point]
+    matched = np.zeros(len(netlist), dtype=bool)
+    matched[point[point >= 0]] = True
+    unmatched = candidates[~matched[candidates]]
+    return PadNets(side, point, net, distance, unmatched)
+
+def read_pad_nets(directory, layers, netlist="cadnet", tolerance=0.001):
+    """
+    Assign nets to the pads of the outermost copper layers of a LayerSet
+    (see assign_pad_nets() for the tolerance).
+    Returns (ColumnarNetlist, dict layer name => PadNets)
+    """
+    netlist = read_columnar_netlist(directory, netlist)
+    copper = StackupIndex(layers).copper_layers
+    if not copper:
+        return netlist, {}
+    sides = [(copper[0], NetSide.Top), (copper[-1], NetSide.Bottom)]
+    return netlist, {
+        layer.name: assign_pad_nets(
+            parse_feature_arrays(read_layer_features(directory, layer.name)),
+            netlist, side, tolerance)
+        for layer, side in sides[:len(copper)]
+    }
@@ -5,19 +5,63 @@ Parser for the ODB++ PCB profile file
 """
 import os.path
 from collections import namedtuple
+import numpy as np
 from .LineRecordParser import *
 from .SurfaceParser import *
 from .PolygonParser import *
 from .Decoder import *
 from .Treeifier import *
 from .Units import *
+from .Geometry import PolygonLocator, surface_edges, step_area_length, polygons_area
+from .Utils import step_directory
 
-__all__ = ["read_profile", "parse_profile", "Profile"]
+__all__ = ["read_profile", "parse_profile", "Profile", "ProfileGeometry"]
 
-Profile = namedtuple("Profile", ["unit", "surfaces"])
+class Profile(namedtuple("Profile", ["unit", "surfaces"])):
+    def geometry(self, max_angle=1.):
+        """Get the (cached) ProfileGeometry of this profile"""
+        cache = self.__dict__.setdefault("_geometry", {})
+        if max_angle not in cache:
+            cache[max_angle] = ProfileGeometry(self, max_angle)
+        return cache[max_angle]
 
-def read_profile(directory):
-    profile = read_linerecords(os.path.join(directory, "steps/pcb/profile"))
+class ProfileGeometry(object):
+    """
+    Board outline geometry of a Profile for batched queries.
+    The outline is tessellated once (circular steps with chords spanning at
+    most max_angle degrees) for contains() and bbox(),
+    area() and perimeter() are exact.
+    """
+    def __init__(self, profile, max_angle=1.):
+        self.unit = profile.unit
+        self.polygons = [polygon for surface in profile.surfaces
+                         for polygon in surface.polygons]
+        _, self.x0, self.y0, self.x1, self.y1 = surface_edges(
+            [(0, surface) for surface in profile.surfaces], max_angle)
+        self._locator = PolygonLocator(self.x0, self.y0, self.x1, self.y1)
+
+    def contains(self, x, y):
+        """Are the given points inside the board (holes excluded)? Returns a boolean array."""
+        return self._locator.contains(x, y)
+
+    def area(self):
+        """Board area in square coordinate units (islands minus holes)"""
+        return polygons_area(self.polygons)
+
+    def perimeter(self):
+        """Total length of all outlines (including holes)"""
+        return sum(step_area_length(step)[1]
+                   for polygon in self.polygons for step in polygon.steps)
+
+    def bbox(self):
+        """Get (xmin, ymin, xmax, ymax) of the outline"""
+        if len(self.x0) == 0:
+            raise ValueError("Profile without outline")
+        return (float(np.minimum(self.x0, self.x1).min()), float(np.minimum(self.y0, self.y1).min()),
+                float(np.maximum(self.x0, self.x1).max()), float(np.maximum(self.y0, self.y1).max()))
+
+def read_profile(directory, step="pcb"):
+    profile = read_linerecords(os.path.join(step_directory(directory, step), "profile"))
     return parse_profile(profile)
 
 def parse_profile(linerecords):
@@ -27,4 +71,6 @@ def parse_profile(linerecords):
 
     decoded = list(run_decoder(linerecords["Layer features"], decoder_options))
     surfaces = treeify(decoded, treeifyer_rules)
-    return Profile(linerecords_unit(linerecords), surfaces)
+    unit = find_unit(line for section, lines in linerecords.items()
+                     if section != "Layer features" for line in lines)
+    return Profile(unit, surfaces)
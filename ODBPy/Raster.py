@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rasterization of layers and the board profile into NumPy bitmaps
+"""
+import numpy as np
+from .Composite import TileGrid, composite_layer, composite_primitives
+from .FeatureArrays import parse_feature_arrays
+from .Geometry import Primitives, surface_edges
+from .Layers import read_layers, read_layer_features
+from .Profile import read_profile
+from .Structures import Polarity
+from .Units import to_mm
+
+__all__ = ["profile_primitives", "profile_extents", "rasterize_profile", "LayerRasterizer"]
+
+def profile_primitives(profile, width=None, max_angle=10.):
+    """
+    Get the Primitives of a Profile (all with owner 0): the filled board
+    outline or, if width is given, only the outline stroked with that width.
+    """
+    order, x0, y0, x1, y1 = surface_edges(
+        [(0, surface) for surface in profile.surfaces], max_angle)
+    if width is None:
+        return Primitives.edges(order, x0, y0, x1, y1)
+    return Primitives.capsules(order, x0, y0, x1, y1, np.full(len(order), width / 2.))
+
+def profile_extents(profile, unit=None):
+    """
+    Get (xmin, ymin, xmax, ymax) of a Profile,
+    optionally converted to the given coordinate unit
+    """
+    scale = 1. if unit is None else to_mm(1., profile.unit) / to_mm(1., unit)
+    return tuple(value * scale for value in profile.geometry().bbox())
+
+def rasterize_profile(profile, grid, width=None, workers=1):
+    """
+    Render a Profile on a TileGrid. See profile_primitives() for width.
+    Returns a CompositeLayer.
+    """
+    polarities = np.array([Polarity.Positive.value], dtype=np.int8)
+    return composite_primitives(profile_primitives(profile, width), polarities, grid, workers)
+
+class LayerRasterizer(object):
+    """
+    Renders the layers of an ODB++ job directory on a common tile grid
+    covering the profile. Rendered layers are cached per (layer, resolution).
+    resolution = pixel size in the coordinate unit of the profile.
+    """
+    def __init__(self, directory, tile_pixels=512, workers=None):
+        self.directory = directory
+        self.tile_pixels = tile_pixels
+        self.workers = workers
+        self._profile = None
+        self._layers = None
+        self._cache = {}
+
+    @property
+    def profile(self):
+        if self._profile is None:
+            self._profile = read_profile(self.directory)
+        return self._profile
+
+    @property
+    def layers(self):
+        if self._layers is None:
+            self._layers = read_layers(self.directory)
+        return self._layers
+
+    def grid(self, resolution):
+        "Get the TileGrid covering the profile at the given resolution"
+        return TileGrid.covering(*profile_extents(self.profile), resolution=resolution,
+                                 tile_pixels=self.tile_pixels)
+
+    def layer(self, name, resolution):
+        "Get the (cached) CompositeLayer of a layer"
+        key = (name, resolution)
+        if key not in self._cache:
+            features = parse_feature_arrays(read_layer_features(self.directory, name))
+            layer = self.layers.by_name(name)
+            # Layers in a different unit than the profile are rendered on the equivalent grid
+            scale = to_mm(1., self.profile.unit) / to_mm(1., features.unit)
+            self._cache[key] = composite_layer(
+                features, resolution * scale, self.tile_pixels,
+                profile_extents(self.profile, features.unit), self.workers,
+                layer_polarity=Polarity.Positive if layer is None else layer.polarity)
+        return self._cache[key]
+
+    def render(self, name, resolution):
+        "Render a layer into a single bitmap (row 0 at the bottom of the profile)"
+        return self.layer(name, resolution).mosaic()
+
+    def render_profile(self, resolution, width=None):
+        "Render the profile into a single bitmap. See profile_primitives() for width."
+        key = (None, resolution, width)
+        if key not in self._cache:
+            self._cache[key] = rasterize_profile(
+                self.profile, self.grid(resolution), width, self.workers)
+        return self._cache[key].mosaic()
+
+    def clear(self, name=None):
+        "Drop the cached renderings of one layer (default: of all layers and the profile)"
+        self._cache = {} if name is None else \
+            {key: value for key, value in self._cache.items() if key[0] != name}
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Solder paste area and volume per component and pin
+"""
+from collections import namedtuple
+import numpy as np
+from .ComponentStore import read_component_collection
+from .FeatureArrays import parse_feature_arrays
+from .Geometry import pad_shapes, shape_areas, surface_edges, polygons_area, \
+    symbol_outlines, outlines_area
+from .Layers import LayerType, StackupIndex, read_layer_features
+from .NetlistParser import NetSide
+from .SpatialIndex import GridIndex
+from .Structures import Polarity
+from .Units import to_mm
+from .Utils import parallel_map
+
+__all__ = ["PasteApertures", "PasteVolumes", "paste_apertures", "join_paste_apertures",
+           "paste_volumes", "paste_layers", "read_paste_volumes"]
+
+class PasteApertures(namedtuple("PasteApertures", [
+        "order", "x", "y", "area", "reach", "unit"])):
+    """
+    Stencil apertures of a solder paste layer.
+    order = feature order (see FeatureArrays), x, y = center,
+    area = aperture area in square coordinate units (NaN for pads with
+    symbols without outline, see Geometry.symbol_outlines()),
+    reach = distance from the center to the farthest aperture point (or more),
+    unit = coordinate unit
+    """
+    def __len__(self):
+        return len(self.order)
+
+    def converted(self, unit):
+        "Get the apertures with coordinates, areas and reaches in the given unit"
+        scale = to_mm(1., self.unit) / to_mm(1., unit)
+        return PasteApertures(self.order, self.x * scale, self.y * scale,
+                              self.area * scale ** 2, self.reach * scale, unit)
+
+class PasteVolumes(namedtuple("PasteVolumes", [
+        "toeprint_area", "component_area", "thickness", "unmatched_area",
+        "toeprint_unresolved"])):
+    """
+    Paste per toeprint and component of a ComponentCollection.
+    toeprint_area, component_area = aperture area per toeprint / component
+        in square component units,
+    thickness = stencil thickness (volumes are area * thickness),
+    unmatched_area = total area of the apertures without a toeprint,
+    toeprint_unresolved = number of apertures of unknown area per toeprint
+        (their area is missing from toeprint_area)
+    """
+    def toeprint_volume(self):
+        "Get the paste volume of every toeprint"
+        return self.toeprint_area * self.thickness
+
+    def component_volume(self):
+        "Get the paste volume of every component"
+        return self.component_area * self.thickness
+
+def _outline_sizes(features, max_angle):
+    """
+    Get (area, reach) lookup tables indexed by symbol number (with a trailing
+    entry for unknown symbols) from the symbol outlines, in symbol units. NaN
+    for symbols without outline.
+    """
+    size = max(features.symbols, default=-1) + 1
+    area, reach = np.full(size + 1, np.nan), np.full(size + 1, np.nan)
+    for num, name in features.symbols.items():
+        outlines = symbol_outlines(name, max_angle)
+        if outlines:
+            area[num] = outlines_area(outlines)
+            reach[num] = max(np.hypot(outline[:, 0], outline[:, 1]).max()
+                             for outline in outlines)
+    return area, reach
+
+def paste_apertures(features, max_angle=10.):
+    """
+    Get the PasteApertures of the positive pads and surfaces of FeatureArrays.
+    Pads with other than round, rectangular or oval symbols are measured
+    on their symbol outlines, tessellated with chords spanning at most
+    max_angle degrees.
+    """
+    pads = features.pads
+    keep = pads.polarity == Polarity.Positive.value
+    shape, half_width, half_height = pad_shapes(features)
+    area = shape_areas(shape, half_width, half_height)
+    reach = np.hypot(half_width, half_height)
+    other = np.isnan(area)
+    if np.any(keep & other):
+        outline_area, outline_reach = _outline_sizes(features, max_angle)
+        symbol = pads.symbol[other]
+        symbol = np.where((symbol >= 0) & (symbol < len(outline_area) - 1),
+                          symbol, len(outline_area) - 1)
+        # Symbols are sized in 1/1000 of the coordinate unit
+        scale = pads.resize[other] / 1000.
+        area[other] = outline_area[symbol] * scale ** 2
+        reach[other] = outline_reach[symbol] * scale
+    area, reach = area[keep], np.nan_to_num(reach[keep])
+    # Surfaces: center and reach of the outline extents
+    surfaces = [(order, surface) for order, surface in features.surfaces
+                if surface.polarity == Polarity.Positive]
+    order, x0, y0, x1, y1 = surface_edges(surfaces)
+    orders, owner = np.unique(order, return_inverse=True)
+    xmin, ymin = np.full(len(orders), np.inf), np.full(len(orders), np.inf)
+    xmax, ymax = np.full(len(orders), -np.inf), np.full(len(orders), -np.inf)
+    np.minimum.at(xmin, owner, np.minimum(x0, x1))
+    np.minimum.at(ymin, owner, np.minimum(y0, y1))
+    np.maximum.at(xmax, owner, np.maximum(x0, x1))
+    np.maximum.at(ymax, owner, np.maximum(y0, y1))
+    areas = {order: polygons_area(surface.polygons) for order, surface in surfaces}
+    columns = (np.concatenate((pads.order[keep], orders)),
+               np.concatenate((pads.x[keep], (xmin + xmax) / 2)),
+               np.concatenate((pads.y[keep], (ymin + ymax) / 2)),
+               np.concatenate((area, [areas[order] for order in orders.tolist()])),
+               np.concatenate((reach, np.hypot(xmax - xmin, ymax - ymin) / 2)))
+    sort = np.argsort(columns[0], kind="stable")
+    return PasteApertures(*(column[sort] for column in columns), features.unit)
+
+def join_paste_apertures(apertures, components, side, tolerance=0.):
+    """
+    Find the toeprint of a ComponentCollection for every aperture:
+    the nearest toeprint on the given NetSide at most the reach of the
+    aperture + tolerance (in component units) away from its center.
+    Returns toeprint indices (-1 if unmatched).
+    """
+    candidates = np.flatnonzero(
+        components.side[components.toeprint_component] == side.value)
+    if len(candidates) == 0 or len(apertures) == 0:
+        return np.full(len(apertures), -1, dtype=np.int64)
+    apertures = apertures.converted(components.unit)
+    index = GridIndex.from_points(components.toeprint_x[candidates],
+                                  components.toeprint_y[candidates])
+    nearest, _ = index.nearest(apertures.x, apertures.y, apertures.reach + tolerance)
+    # Index -1 picks the appended -1 for unmatched apertures
+    return np.append(candidates, -1)[nearest]
+
+def paste_volumes(components, apertures, thickness, tolerance=0.):
+    """
+    Sum the paste of dict NetSide => list of PasteApertures (one per paste
+    layer) per toeprint and component of a ComponentCollection.
+    Apertures of unknown area are counted in PasteVolumes.toeprint_unresolved.
+    Returns PasteVolumes.
+    """
+    toeprint_area = np.zeros(len(components.toeprint_x))
+    toeprint_unresolved = np.zeros(len(toeprint_area), dtype=np.int64)
+    unmatched_area = 0.
+    for side, side_apertures in apertures.items():
+        for layer_apertures in side_apertures:
+            layer_apertures = layer_apertures.converted(components.unit)
+            toeprint = join_paste_apertures(layer_apertures, components, side, tolerance)
+            matched = toeprint >= 0
+            known = ~np.isnan(layer_apertures.area)
+            toeprint_area += np.bincount(
+                toeprint[matched & known], weights=layer_apertures.area[matched & known],
+                minlength=len(toeprint_area))
+            toeprint_unresolved += np.bincount(toeprint[matched & ~known],
+                                               minlength=len(toeprint_area))
+            unmatched_area += float(layer_apertures.area[~matched & known].sum())
+    component_area = np.bincount(components.toeprint_component, weights=toeprint_area,
+                                 minlength=len(components))
+    return PasteVolumes(toeprint_area, component_area, thickness, unmatched_area,
+                        toeprint_unresolved)
+
+def paste_layers(layers):
+    """
+    Get a dict NetSide => list of solder paste Layers of a LayerSet. Paste layers
+    above the first copper layer belong to the top side, all others to the bottom.
+    """
+    stackup = StackupIndex(layers)
+    first_copper = stackup.copper_layers[0].index if stackup.copper_layers else 0
+    sides = {}
+    for layer in stackup.layers.by_type(LayerType.SolderPaste):
+        side = NetSide.Top if layer.index < first_copper else NetSide.Bottom
+        sides.setdefault(side, []).append(layer)
+    return sides
+
+def _read_paste_apertures(directory, layer):
+    "Read the PasteApertures of a single paste layer"
+    return paste_apertures(parse_feature_arrays(read_layer_features(directory, layer)))
+
+def read_paste_volumes(directory, layers, thickness, components=None, tolerance=0.,
+                       workers=None):
+    """
+    Compute the PasteVolumes of the components of a LayerSet
+    (a ComponentCollection, read from the component layers if not given).
+    The paste layers are read in a process pool (see Utils.parallel_map() for workers).
+    Returns (ComponentCollection, PasteVolumes).
+    """
+    if components is None:
+        components = read_component_collection(directory, layers)
+    sides = [(side, layer) for side, side_layers in paste_layers(layers).items()
+             for layer in side_layers]
+    names = [layer.name for _, layer in sides]
+    apertures = {side: [] for side, _ in sides}
+    for (side, _), layer_apertures in zip(sides, parallel_map(
+            _read_paste_apertures, [directory] * len(names), names, workers=workers)):
+        apertures[side].append(layer_apertures)
+    return components, paste_volumes(components, apertures, thickness, tolerance)
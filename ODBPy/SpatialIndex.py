@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Uniform grid spatial index over axis-aligned bounding boxes
+"""
+import numpy as np
+
+__all__ = ["GridIndex", "expand_ranges"]
+
+def expand_ranges(starts, stops):
+    """
+    Given arrays of half-open ranges [start, stop), return
+    (owner, values) where values enumerates all ranges back to back
+    and owner is the index of the range every value belongs to.
+
+    Example:
+        expand_ranges([0, 5], [2, 8]) => ([0, 0, 1, 1, 1], [0, 1, 5, 6, 7])
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.maximum(np.asarray(stops, dtype=np.int64) - starts, 0)
+    owner = np.repeat(np.arange(len(starts)), counts)
+    # Position of every value inside its own range
+    offsets = np.cumsum(counts) - counts
+    local = np.arange(counts.sum()) - np.repeat(offsets, counts)
+    return owner, starts[owner] + local
+
+def _default_cell_size(xmin, ymin, xmax, ymax):
+    "Cell size heuristic: about one item per cell, but no smaller than a typical item"
+    if len(xmin) == 0:
+        return 1.0
+    width = xmax.max() - xmin.min()
+    height = ymax.max() - ymin.min()
+    density_size = np.sqrt(width * height / len(xmin)) if width > 0 and height > 0 \
+                   else max(width, height) / len(xmin)
+    item_size = np.median(np.maximum(xmax - xmin, ymax - ymin))
+    size = max(density_size, item_size)
+    return float(size) if size > 0 else 1.0
+
+class GridIndex(object):
+    """
+    Spatial index assigning every item bounding box to all grid cells it covers.
+    The cell => items mapping is stored in CSR form (sorted cell keys,
+    offsets and item indices).
+    """
+    def __init__(self, xmin, ymin, xmax, ymax, cell_size=None):
+        self.xmin = np.asarray(xmin, dtype=float)
+        self.ymin = np.asarray(ymin, dtype=float)
+        self.xmax = np.asarray(xmax, dtype=float)
+        self.ymax = np.asarray(ymax, dtype=float)
+        self.cell_size = cell_size or _default_cell_size(
+            self.xmin, self.ymin, self.xmax, self.ymax)
+        if len(self.xmin):
+            self.origin = (self.xmin.min(), self.ymin.min())
+            self.shape = (
+                int((self.xmax.max() - self.origin[0]) // self.cell_size) + 1,
+                int((self.ymax.max() - self.origin[1]) // self.cell_size) + 1)
+        else:
+            self.origin, self.shape = (0., 0.), (1, 1)
+        owner, keys = self._cell_keys(self.xmin, self.ymin, self.xmax, self.ymax)
+        order = np.argsort(keys, kind="stable")
+        self._keys, starts = np.unique(keys[order], return_index=True)
+        self._offsets = np.append(starts, len(keys))
+        self._items = owner[order]
+
+    @classmethod
+    def from_points(cls, x, y, cell_size=None):
+        "Build an index over zero-size point items"
+        return cls(x, y, x, y, cell_size)
+
+    def __len__(self):
+        return len(self.xmin)
+
+    def cells(self):
+        "Iterate the item index arrays of all non-empty grid cells"
+        for start, stop in zip(self._offsets[:-1].tolist(), self._offsets[1:].tolist()):
+            yield self._items[start:stop]
+
+    def _cell_range(self, lo, hi, axis):
+        "Clipped integer cell index range for the given coordinates on one axis"
+        first = np.floor((lo - self.origin[axis]) / self.cell_size)
+        last = np.floor((hi - self.origin[axis]) / self.cell_size)
+        limit = self.shape[axis] - 1
+        return (np.clip(first, 0, limit).astype(np.int64),
+                np.clip(last, 0, limit).astype(np.int64))
+
+    def _cell_keys(self, xmin, ymin, xmax, ymax):
+        """
+        Enumerate all cells covered by each box.
+        Returns (box index, cell key) arrays.
+        """
+        ix0, ix1 = self._cell_range(xmin, xmax, 0)
+        iy0, iy1 = self._cell_range(ymin, ymax, 1)
+        width = ix1 - ix0 + 1
+        owner, local = expand_ranges(
+            np.zeros(len(ix0), dtype=np.int64), width * (iy1 - iy0 + 1))
+        cx = ix0[owner] + local % width[owner]
+        cy = iy0[owner] + local // width[owner]
+        return owner, cy * self.shape[0] + cx
+
+    def query_pairs(self, xmin, ymin, xmax, ymax):
+        """
+        Find all (query index, item index) pairs whose bounding boxes overlap.
+        Takes arrays of query boxes. Each pair is reported exactly once,
+        sorted by query index.
+        """
+        xmin, ymin, xmax, ymax = (np.atleast_1d(np.asarray(a, dtype=float))
+                                  for a in (xmin, ymin, xmax, ymax))
+        if len(self._keys) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        query, keys = self._cell_keys(xmin, ymin, xmax, ymax)
+        pos = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        found = self._keys[pos] == keys
+        query, pos = query[found], pos[found]
+        owner, entries = expand_ranges(self._offsets[pos], self._offsets[pos + 1])
+        query, items = query[owner], self._items[entries]
+        # Items covering multiple cells are found once per cell
+        codes = np.unique(query * len(self) + items)
+        query, items = codes // len(self), codes % len(self)
+        # Exact bounding box test
+        overlap = (self.xmin[items] <= xmax[query]) & (self.xmax[items] >= xmin[query]) & \
+                  (self.ymin[items] <= ymax[query]) & (self.ymax[items] >= ymin[query])
+        return query[overlap], items[overlap]
+
+    def query_bbox(self, xmin, ymin, xmax, ymax):
+        "Get the indices of all items overlapping a single box"
+        return self.query_pairs([xmin], [ymin], [xmax], [ymax])[1]
+
+    def nearest(self, x, y, radius):
+        """
+        For every query point, find the item whose bounding box center
+        is nearest and at most radius (a scalar or one per query point) away.
+        Returns (item index array with -1 for no match, distance array).
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)
+        query, items = self.query_pairs(x - radius, y - radius, x + radius, y + radius)
+        dist = np.hypot((self.xmin[items] + self.xmax[items]) / 2 - x[query],
+                        (self.ymin[items] + self.ymax[items]) / 2 - y[query])
+        within = dist <= radius[query]
+        query, items, dist = query[within], items[within], dist[within]
+        # Keep the closest item per query
+        order = np.lexsort((dist, query))
+        query, items, dist = query[order], items[order], dist[order]
+        first = np.unique(query, return_index=True)[1]
+        result = np.full(len(x), -1, dtype=np.int64)
+        distances = np.full(len(x), np.inf)
+        result[query[first]] = items[first]
+        distances[query[first]] = dist[first]
+        return result, distances
@@ -35,7 +35,6 @@ def _parse_allfloat_corners(rgx, constr, s):
     # Assemble args list
     args = list(map(float, groups[:-1]))
     args.append(corners)
-    print(args)
     return constr(*args)
 
 
@@ -192,3 +191,28 @@ class Hole(namedtuple("Hole", ["diameter", "plating", "tolerance_plus", "toleran
             return None
         a, platingStr, b, c = match.groups()
         return Hole(float(a), _plating_map[platingStr], float(b), float(c))
+
+# All standard symbol types, tried in order by parse_standard_symbol()
+standard_symbol_types = [
+    Round, Square, Rectangle, Oval, Diamond, Octagon, RoundDonut, SquareDonut,
+    SquareRoundDonut, RoundedSquareDonut, RectangleDonut, RoundedRectangleDonut,
+    OvalDonut, HorizontalHexagon, VerticalHexagon, Butterfly, SquareButterfly,
+    Triangle, HalfOval, RoundThermalRounded, RoundThermalSquared, SquareThermal,
+    SquareThermalOpenCorners, SquareRoundThermal, RectangularThermal,
+    RectangularThermalOpenCorners, RoundedSquareThermal, RoundedSquareThermalOpenCorners,
+    RoundedRectangleThermal, RoundedRectangleThermalOpenCorners, OvalThermal,
+    OvalThermalOpenCorners, Ellipse, Moire, Hole
+]
+
+@functools.lru_cache(maxsize=None)
+def parse_standard_symbol(name):
+    """
+    Parse a symbol name (e.g. "r40") into the matching standard symbol object.
+    Returns None for user-defined symbols or unknown names.
+    Results are cached as symbol tables repeat the same names in every layer.
+    """
+    for symbol_type in standard_symbol_types:
+        symbol = symbol_type.Parse(name)
+        if symbol is not None:
+            return symbol
+    return None
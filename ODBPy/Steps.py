@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Steps and step-and-repeat (panel) structure of an ODB++ job
+"""
+import os
+from collections import namedtuple
+import numpy as np
+from .FeatureArrays import FeatureArrays, PadArrays, LineArrays, ArcArrays, parse_feature_arrays
+from .Geometry import rotate
+from .LineRecordParser import read_linerecords
+from .PolygonParser import Polygon, PolygonCircle, CircleDirection
+from .StructuredTextParser import read_structured_text
+from .Structures import Mirror, Point
+from .Units import to_mm
+from .Utils import step_directory
+
+__all__ = ["StepRepeat", "StepHeader", "Placements", "parse_step_header",
+           "read_step_header", "list_steps", "transform_features",
+           "concatenate_features", "StepTree"]
+
+class StepRepeat(namedtuple("StepRepeat", [
+        "step", "x", "y", "dx", "dy", "nx", "ny", "angle", "mirror", "flip"])):
+    """
+    A STEP-REPEAT table: nx x ny instances of step, the first one at (x, y),
+    spaced by dx, dy. angle in degrees, mirror / flip = bool
+    (flipped instances are placed on the opposite side, which
+    StepTree.flat_features() does not support)
+    """
+
+class StepHeader(namedtuple("StepHeader", ["name", "datum", "origin", "repeats", "metadata"])):
+    """
+    Parsed stephdr file of a step.
+    datum, origin = Point, repeats = list of StepRepeat
+    """
+    def unit(self):
+        "Get the unit of the header coordinates (UNITS, inch if not given)"
+        return str(self.metadata.get("UNITS", "INCH")).upper()
+
+class Placements(namedtuple("Placements", ["x", "y", "angle", "mirror"])):
+    """
+    Instances of a step inside another step. Every instance maps a child
+    point p to rotate(mirror(p), angle) + (x, y), i.e. x, y already
+    account for the datum of the child step.
+    angle = clockwise degrees, mirror = bool (mirrored in X before rotating)
+    """
+    def __len__(self):
+        return len(self.x)
+
+    @classmethod
+    def identity(cls):
+        "A single untransformed instance"
+        return cls(np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1, dtype=bool))
+
+    @classmethod
+    def concatenate(cls, parts):
+        "Concatenate Placements"
+        return cls(*(np.concatenate(column) for column in zip(*parts)))
+
+    def scaled(self, factor):
+        "Get the Placements with the offsets scaled by factor, e.g. to convert their unit"
+        return Placements(self.x * factor, self.y * factor, self.angle, self.mirror)
+
+    def apply(self, x, y):
+        """
+        Transform points into every instance.
+        Returns (x, y) arrays of shape (instances, points).
+        """
+        x = np.where(self.mirror[:, None], -np.asarray(x, dtype=float), x)
+        y = np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+        x, y = rotate(x, y, self.angle[:, None])
+        return x + self.x[:, None], y + self.y[:, None]
+
+    def apply_angles(self, angle):
+        "Transform clockwise rotations (e.g. of pads) into every instance: (instances, N) array"
+        angle = np.where(self.mirror[:, None], -np.asarray(angle, dtype=float), angle)
+        return np.mod(angle + self.angle[:, None], 360.)
+
+    def compose(self, inner):
+        """
+        Place inner Placements (instances of a grandchild inside a child)
+        into every instance of self. Returns Placements ordered by
+        outer instance, then inner instance.
+        """
+        x, y = self.apply(inner.x, inner.y)
+        return Placements(x.ravel(), y.ravel(), self.apply_angles(inner.angle).ravel(),
+                          (self.mirror[:, None] ^ inner.mirror[None, :]).ravel())
+
+_yes = lambda value: str(value).upper() == "YES"
+
+def parse_step_header(name, structured_text):
+    "Parse the StructuredText of a stephdr file into a StepHeader"
+    metadata, arrays = structured_text
+    repeats = [StepRepeat(str(array.attributes["NAME"]).lower(),
+                          float(array.attributes.get("X", 0)),
+                          float(array.attributes.get("Y", 0)),
+                          float(array.attributes.get("DX", 0)),
+                          float(array.attributes.get("DY", 0)),
+                          int(array.attributes.get("NX", 1)),
+                          int(array.attributes.get("NY", 1)),
+                          float(array.attributes.get("ANGLE", 0)),
+                          _yes(array.attributes.get("MIRROR", "NO")),
+                          _yes(array.attributes.get("FLIP", "NO")))
+               for array in arrays if array.name == "STEP-REPEAT"]
+    datum = Point(float(metadata.get("X_DATUM", 0)), float(metadata.get("Y_DATUM", 0)))
+    origin = Point(float(metadata.get("X_ORIGIN", 0)), float(metadata.get("Y_ORIGIN", 0)))
+    return StepHeader(name, datum, origin, repeats, metadata)
+
+def read_step_header(directory, step="pcb"):
+    "Read the stephdr file of a step"
+    return parse_step_header(step, read_structured_text(
+        os.path.join(step_directory(directory, step), "stephdr")))
+
+def list_steps(directory):
+    "Get the sorted names of all steps of an ODB++ directory"
+    return sorted(os.listdir(os.path.join(directory, "steps")))
+
+def _repeat_placements(repeat, datum):
+    "Get the Placements of a StepRepeat whose child step has the given datum"
+    column, row = np.meshgrid(np.arange(repeat.nx), np.arange(repeat.ny))
+    count = repeat.nx * repeat.ny
+    angle = np.full(count, repeat.angle)
+    mirror = np.full(count, repeat.mirror)
+    # The child datum lands on the repeat position
+    dx, dy = rotate(np.where(mirror, -datum.x, datum.x), np.full(count, datum.y), angle)
+    return Placements(repeat.x + column.ravel() * repeat.dx - dx,
+                      repeat.y + row.ravel() * repeat.dy - dy, angle, mirror)
+
+def _transform_surface(surface, placement):
+    "Transform a Surface by a single placement (Placements of length 1)"
+    def point(p):
+        x, y = placement.apply([p.x], [p.y])
+        return Point(float(x[0, 0]), float(y[0, 0]))
+    mirrored = bool(placement.mirror[0])
+    flipped = {CircleDirection.Clockwise: CircleDirection.CounterClockwise,
+               CircleDirection.CounterClockwise: CircleDirection.Clockwise}
+    polygons = []
+    for polygon in surface.polygons:
+        steps = []
+        for step in polygon.steps:
+            if isinstance(step, PolygonCircle):
+                direction = flipped[step.direction] if mirrored else step.direction
+                steps.append(PolygonCircle(point(step.start), point(step.end),
+                                           point(step.center), direction))
+            else:
+                steps.append(step._replace(start=point(step.start), end=point(step.end)))
+        polygons.append(Polygon(polygon.type, steps))
+    return surface._replace(polygons=polygons)
+
+def transform_features(features, placements):
+    """
+    Get the features of FeatureArrays in every instance of Placements as
+    FeatureArrays. Feature orders become instance * stride + order
+    (with stride = the number of feature orders), so every instance
+    keeps its drawing order. Pads, lines and arcs are transformed
+    on whole columns, surfaces one by one.
+    """
+    stride = len(features.polarities())
+    count = len(placements)
+    orders = lambda order: (np.arange(count)[:, None] * stride + order).ravel()
+    tile = lambda column: np.tile(column, count)
+    pads, lines, arcs = features.pads, features.lines, features.arcs
+    x, y = placements.apply(pads.x, pads.y)
+    mirrored = placements.mirror[:, None]
+    pad_mirror = np.where(mirrored ^ (pads.mirror == Mirror.MirrorX.value),
+                          Mirror.MirrorX.value, Mirror.No.value).astype(np.int8)
+    new_pads = PadArrays(orders(pads.order), x.ravel(), y.ravel(), tile(pads.symbol),
+                         tile(pads.resize), tile(pads.polarity), tile(pads.dcode),
+                         pad_mirror.ravel(), placements.apply_angles(pads.angle).ravel())
+    xs, ys = placements.apply(lines.xs, lines.ys)
+    xe, ye = placements.apply(lines.xe, lines.ye)
+    new_lines = LineArrays(orders(lines.order), xs.ravel(), ys.ravel(), xe.ravel(), ye.ravel(),
+                           tile(lines.symbol), tile(lines.polarity), tile(lines.dcode))
+    arc_xs, arc_ys = placements.apply(arcs.xs, arcs.ys)
+    arc_xe, arc_ye = placements.apply(arcs.xe, arcs.ye)
+    xc, yc = placements.apply(arcs.xc, arcs.yc)
+    new_arcs = ArcArrays(orders(arcs.order), arc_xs.ravel(), arc_ys.ravel(),
+                         arc_xe.ravel(), arc_ye.ravel(), xc.ravel(), yc.ravel(),
+                         tile(arcs.symbol), tile(arcs.polarity), tile(arcs.dcode),
+                         (mirrored ^ arcs.clockwise[None, :]).ravel())
+    surfaces = []
+    for instance in range(count):
+        placement = Placements(*(column[instance:instance + 1] for column in placements))
+        surfaces += [(instance * stride + order, _transform_surface(surface, placement))
+                     for order, surface in features.surfaces]
+    return FeatureArrays(features.unit, features.symbols, new_pads, new_lines, new_arcs, surfaces)
+
+def concatenate_features(parts):
+    """
+    Concatenate FeatureArrays (of the same unit) into one, drawing them one
+    after another. Symbol numbers are merged by symbol name,
+    numbers missing from the symbol table become -1.
+    """
+    if not parts:
+        return parse_feature_arrays({})
+    units = sorted({part.unit for part in parts})
+    if len(units) > 1:
+        # Symbol sizes depend on the unit, so the features can't simply be scaled
+        raise ValueError("Can't concatenate features with different units: {}".format(
+            ", ".join(units)))
+    names = sorted({name for part in parts for name in part.symbols.values()})
+    numbers = {name: number for number, name in enumerate(names)}
+    columns = {"pads": [], "lines": [], "arcs": []}
+    surfaces, offset = [], 0
+    for part in parts:
+        size = max(part.symbols.keys(), default=-1) + 1
+        remap = np.full(size + 1, -1, dtype=np.int64)
+        for number, name in part.symbols.items():
+            remap[number] = numbers[name]
+        for kind, arrays in columns.items():
+            # _replace() does not work with the __len__ of the column namedtuples
+            fields = getattr(part, kind)._asdict()
+            fields["order"] = fields["order"] + offset
+            known = (fields["symbol"] >= 0) & (fields["symbol"] < size)
+            fields["symbol"] = remap[np.where(known, fields["symbol"], size)]
+            arrays.append(type(getattr(part, kind))(**fields))
+        surfaces += [(order + offset, surface) for order, surface in part.surfaces]
+        offset += len(part.polarities())
+    concatenate = lambda arrays: type(arrays[0])(*(np.concatenate(column) for column in zip(*arrays)))
+    return FeatureArrays(parts[0].unit, dict(enumerate(names)),
+                         *(concatenate(columns[kind]) for kind in ("pads", "lines", "arcs")),
+                         surfaces)
+
+class StepTree(object):
+    """
+    The step-and-repeat structure of an ODB++ job.
+    Headers, placements and features are read lazily and cached.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self._headers = {}
+        self._instances = {}
+
+    def header(self, step):
+        "Get the (cached) StepHeader of a step"
+        if step not in self._headers:
+            self._headers[step] = read_step_header(self.directory, step)
+        return self._headers[step]
+
+    def _scale(self, step, unit):
+        "Get the factor converting the header unit of a step to the given unit"
+        return to_mm(1., self.header(step).unit()) / to_mm(1., unit)
+
+    def children(self, step):
+        """
+        Get a dict child step name => Placements of the direct children of a step
+        (in the header unit of the step)
+        """
+        parts = {}
+        unit = self.header(step).unit()
+        for repeat in self.header(step).repeats:
+            datum = self.header(repeat.step).datum
+            scale = self._scale(repeat.step, unit)
+            parts.setdefault(repeat.step, []).append(
+                _repeat_placements(repeat, Point(datum.x * scale, datum.y * scale)))
+        return {child: Placements.concatenate(placements) for child, placements in parts.items()}
+
+    def instances(self, step):
+        """
+        Get a dict step name => Placements of all steps instanced (directly or
+        through nested panels) in a step, including the step itself
+        with a single identity placement (in the header unit of the step)
+        """
+        if step not in self._instances:
+            result = {step: [Placements.identity()]}
+            unit = self.header(step).unit()
+            for child, placements in self.children(step).items():
+                scale = self._scale(child, unit)
+                for descendant, inner in self.instances(child).items():
+                    result.setdefault(descendant, []).append(
+                        placements.compose(inner.scaled(scale)))
+            self._instances[step] = {name: Placements.concatenate(parts)
+                                     for name, parts in result.items()}
+        return self._instances[step]
+
+    def _step_features(self, step, layer):
+        "Read the features of a layer in a single step, None if the step does not have it"
+        path = os.path.join(step_directory(self.directory, step), "layers", layer, "features.Z")
+        if not os.path.exists(path):
+            return None
+        return parse_feature_arrays(read_linerecords(path))
+
+    def flat_features(self, step, layer):
+        """
+        Get the features of a layer in a step including all instanced steps
+        as a single FeatureArrays (see transform_features()).
+        Instanced steps are drawn first (sorted by name), the features
+        of the step itself last. Raises a ValueError if the feature files
+        use different units (see concatenate_features()) or if a step is
+        instanced flipped, as its layers would have to be swapped.
+        """
+        parts = []
+        instances = self.instances(step)
+        flipped = sorted({repeat.step for name in instances
+                          for repeat in self.header(name).repeats if repeat.flip})
+        if flipped:
+            raise ValueError("Flipped step-repeats are not supported: {}".format(
+                ", ".join(flipped)))
+        names = sorted(name for name in instances if name != step) + [step]
+        for name in names:
+            features = self._step_features(name, layer)
+            if features is not None:
+                placements = instances[name].scaled(self._scale(step, features.unit))
+                parts.append(transform_features(features, placements))
+        return concatenate_features(parts)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stroking of line features into outlines
+"""
+from collections import namedtuple
+import numpy as np
+from .Geometry import SHAPE_ROUND, SHAPE_RECT, Primitives, symbol_shapes, box_outlines
+
+__all__ = ["StrokedLines", "round_pen", "box_pen", "stroke_outlines",
+           "stroke_lines", "line_primitives"]
+
+class StrokedLines(namedtuple("StrokedLines", ["order", "polarity", "vertices"])):
+    """
+    Outlines of line features.
+    order = feature order (see FeatureArrays), polarity = Polarity values,
+    vertices = (N, K, 2) counter-clockwise outline polygons
+    """
+    def __len__(self):
+        return len(self.order)
+
+def round_pen(radius, segments=16):
+    """
+    Get (N, segments, 2) counter-clockwise polygons around the origin
+    enclosing circles of the given radii
+    """
+    angles = 2 * np.pi * (np.arange(segments) + 0.5) / segments
+    # Circumscribed polygon, so the outline never undercuts the circle
+    outer = np.asarray(radius, dtype=float)[:, None] / np.cos(np.pi / segments)
+    return np.stack((outer * np.cos(angles), outer * np.sin(angles)), axis=2)
+
+def box_pen(half_width, half_height, vertices=4):
+    """
+    Get (N, vertices, 2) counter-clockwise rectangles around the origin.
+    With more than 4 vertices, the last corner is repeated so that
+    box pens can be mixed with round pens of the same vertex count.
+    """
+    half_width = np.asarray(half_width, dtype=float)
+    zeros = np.zeros(len(half_width))
+    corners = box_outlines(zeros, zeros, half_width, np.asarray(half_height, dtype=float), zeros)
+    return corners[:, np.minimum(np.arange(vertices), 3)]
+
+def stroke_outlines(xs, ys, xe, ye, pens):
+    """
+    Stroke lines with (N, K, 2) convex counter-clockwise pen polygons.
+    Returns the (N, K + 2, 2) counter-clockwise outline polygons.
+    """
+    pen_edges = np.roll(pens, -1, axis=1) - pens
+    direction = np.stack((xe - xs, ye - ys), axis=1)[:, None, :]
+    edges = np.concatenate((pen_edges, direction, -direction), axis=1)
+    # Convex polygon edges are ordered by angle
+    angles = np.arctan2(edges[:, :, 1], edges[:, :, 0])
+    edges = np.take_along_axis(edges, np.argsort(angles, axis=1)[:, :, None], axis=1)
+    vertices = np.cumsum(edges, axis=1)
+    # The rightmost outline point is the rightmost pen point at the rightmost line end
+    # (likewise for the top), which fixes the position of the outline
+    offset_x = pens[:, :, 0].max(axis=1) + np.maximum(xs, xe) - vertices[:, :, 0].max(axis=1)
+    offset_y = pens[:, :, 1].max(axis=1) + np.maximum(ys, ye) - vertices[:, :, 1].max(axis=1)
+    return vertices + np.stack((offset_x, offset_y), axis=1)[:, None, :]
+
+def _line_pens(features, select, segments):
+    "Get (selected line indices, pens) for lines with round or rectangular symbols"
+    lines = features.lines
+    shape, half_width, half_height = symbol_shapes(features, lines.symbol)
+    round_ = select & (shape == SHAPE_ROUND)
+    box = select & (shape == SHAPE_RECT)
+    pens = np.zeros((len(lines), segments, 2))
+    pens[round_] = round_pen(half_width[round_], segments)
+    pens[box] = box_pen(half_width[box], half_height[box], segments)
+    stroked = np.flatnonzero(round_ | box)
+    return stroked, pens[stroked]
+
+def stroke_lines(features, select=None, segments=16):
+    """
+    Stroke the lines of FeatureArrays (optionally only those selected by a
+    boolean mask) into StrokedLines with segments + 2 vertices each.
+    Round pens are approximated by regular polygons with the given number of segments.
+    Lines with other symbols are skipped.
+    """
+    lines = features.lines
+    select = np.ones(len(lines), dtype=bool) if select is None else select
+    stroked, pens = _line_pens(features, select, max(segments, 4))
+    vertices = stroke_outlines(lines.xs[stroked], lines.ys[stroked],
+                               lines.xe[stroked], lines.ye[stroked], pens)
+    return StrokedLines(lines.order[stroked], lines.polarity[stroked], vertices)
+
+def line_primitives(features, select=None):
+    """
+    Get distance Primitives for the lines of FeatureArrays (optionally only
+    those selected by a boolean mask): Capsules for round symbols and
+    exact outlines for rectangular symbols.
+    """
+    lines = features.lines
+    select = np.ones(len(lines), dtype=bool) if select is None else select
+    shape, half_width, half_height = symbol_shapes(features, lines.symbol)
+    round_ = select & (shape == SHAPE_ROUND)
+    box = select & (shape == SHAPE_RECT)
+    capsules = Primitives.capsules(lines.order[round_], lines.xs[round_], lines.ys[round_],
+                                   lines.xe[round_], lines.ye[round_], half_width[round_])
+    outlines = Primitives.outlines(lines.order[box], stroke_outlines(
+        lines.xs[box], lines.ys[box], lines.xe[box], lines.ye[box],
+        box_pen(half_width[box], half_height[box])))
+    return Primitives.concatenate([capsules, outlines])
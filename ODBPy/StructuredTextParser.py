@@ -15,7 +15,7 @@ __all__ = ["StructuredArray", "StructuredText", "parse_structured_text", "read_s
 
 StructuredText = namedtuple("StructuredText", ["metadata", "arrays"])
 StructuredArray = namedtuple("StructuredArray", ["name", "attributes"])
-array_start_re = re.compile(r"(\w+)\s+\{")
+array_start_re = re.compile(r"([\w-]+)\s+\{")
 
 
 def read_structured_text(filename):
@@ -6,8 +6,9 @@ ODB++ common data structures
 from collections import namedtuple
 from enum import Enum
 import numbers
+import numpy as np
 
-__all__ = ["Point", "Polarity", "polarity_map", "Mirror",
+__all__ = ["Point", "PointArray", "Polarity", "polarity_map", "Mirror",
            "mirror_map", "HolePlating", "SymbolReference"]
 
 # Named tuples
@@ -22,24 +23,144 @@ class Point(namedtuple("Point", ["x", "y"])):
             return Point(self.x + op, self.y + op)
         if isinstance(op, Point):
             return Point(self.x + op.x, self.y + op.y)
+        return NotImplemented
 
     def __sub__(self, op):
         if isinstance(op, numbers.Number):
             return Point(self.x - op, self.y - op)
         if isinstance(op, Point):
             return Point(self.x - op.x, self.y - op.y)
+        return NotImplemented
 
     def __mul__(self, op):
         if isinstance(op, numbers.Number):
             return Point(self.x * op, self.y * op)
         if isinstance(op, Point):
             return Point(self.x * op.x, self.y * op.y)
+        return NotImplemented
 
     def __truediv__(self, op):
         if isinstance(op, numbers.Number):
             return Point(self.x / op, self.y / op)
         if isinstance(op, Point):
             return Point(self.x / op.x, self.y / op.y)
+        return NotImplemented
+
+class PointArray(object):
+    """
+    Many X/Y points backed by a (N, 2) float array (attribute xy)
+    for bulk coordinate transforms. Supports the Point operators with
+    numbers, Points, PointArrays and broadcastable arrays on either side.
+    Rotations are clockwise in degrees, like all ODB++ rotations.
+    """
+    __slots__ = ["xy"]
+    # Let NumPy arrays on the left hand side defer to the reflected operators
+    __array_ufunc__ = None
+
+    def __init__(self, xy):
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+
+    @classmethod
+    def from_xy(cls, x, y):
+        "Build a PointArray from separate x and y arrays"
+        return cls(np.stack((np.asarray(x, dtype=float), np.asarray(y, dtype=float)), axis=-1))
+
+    @classmethod
+    def from_points(cls, points):
+        "Build a PointArray from a list of Points"
+        return cls(np.array(points, dtype=float).reshape(-1, 2))
+
+    def to_points(self):
+        "Convert to a list of Points"
+        return [Point(x, y) for x, y in self.xy.tolist()]
+
+    @property
+    def x(self):
+        return self.xy[:, 0]
+
+    @property
+    def y(self):
+        return self.xy[:, 1]
+
+    def __len__(self):
+        return len(self.xy)
+
+    def __iter__(self):
+        return iter(self.to_points())
+
+    def __getitem__(self, index):
+        "A single Point for integer indices, a PointArray for slices and masks"
+        if isinstance(index, numbers.Integral):
+            return Point(*self.xy[index].tolist())
+        return PointArray(self.xy[index])
+
+    def __repr__(self):
+        return "PointArray({})".format(self.xy.tolist())
+
+    @staticmethod
+    def _operand(op):
+        if isinstance(op, PointArray):
+            return op.xy
+        if isinstance(op, (numbers.Number, Point, np.ndarray, list, tuple)):
+            return np.asarray(op, dtype=float)
+        return None
+
+    def _apply(self, op, operator):
+        operand = self._operand(op)
+        if operand is None:
+            return NotImplemented
+        return PointArray(operator(self.xy, operand))
+
+    def __add__(self, op):
+        return self._apply(op, np.add)
+
+    def __radd__(self, op):
+        return self._apply(op, np.add)
+
+    def __sub__(self, op):
+        return self._apply(op, np.subtract)
+
+    def __rsub__(self, op):
+        return self._apply(op, lambda xy, operand: np.subtract(operand, xy))
+
+    def __mul__(self, op):
+        return self._apply(op, np.multiply)
+
+    def __rmul__(self, op):
+        return self._apply(op, np.multiply)
+
+    def __truediv__(self, op):
+        return self._apply(op, np.true_divide)
+
+    def __neg__(self):
+        return PointArray(-self.xy)
+
+    def rotate(self, angle, origin=(0., 0.)):
+        """
+        Rotate clockwise by angle degrees (a number or one angle per point)
+        around the origin
+        """
+        rad = np.radians(np.asarray(angle, dtype=float))
+        cos, sin = np.cos(rad), np.sin(rad)
+        dx, dy = self.x - origin[0], self.y - origin[1]
+        return PointArray.from_xy(origin[0] + dx * cos + dy * sin,
+                                  origin[1] + dy * cos - dx * sin)
+
+    def mirror(self, mirror, origin=(0., 0.)):
+        """
+        Mirror around the origin according to a Mirror value
+        (unspecific mirroring is treated as MirrorX, i.e. x => -x)
+        or an array of booleans (mirror that point in X).
+        """
+        if isinstance(mirror, Mirror):
+            flip_x = mirror in (Mirror.Mirror, Mirror.MirrorX, Mirror.MirrorXY)
+            flip_y = mirror in (Mirror.MirrorY, Mirror.MirrorXY)
+        else:
+            flip_x, flip_y = np.asarray(mirror, dtype=bool), False
+        x = np.where(flip_x, 2 * origin[0] - self.x, self.x)
+        y = np.where(flip_y, 2 * origin[1] - self.y, self.y)
+        return PointArray.from_xy(x, y)
+
 # Enums
 class Polarity(Enum):
     """Polarity of a layer"""
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testpoint coverage analysis for in-circuit test fixture planning
+"""
+from collections import namedtuple
+import numpy as np
+from .ColumnarNetlist import POINT_VIA, POINT_TESTPOINT, POINT_FORCE_MIDPOINT, POINT_MIDPOINT
+from .NetlistParser import NetSide, NetPointExposure, TestpointTestSide
+
+__all__ = ["NetCoverage", "ProbeCandidates", "probe_access", "accessible_testpoints",
+           "net_coverage", "grid_distance", "probe_candidates"]
+
+class NetCoverage(namedtuple("NetCoverage", ["nets", "names", "top", "bottom"])):
+    """
+    Testpoint coverage of the regular nets of a netlist
+    (tooling holes and $NONE$ points are not taken into account).
+    nets = netlist net indices, names = net names,
+    top, bottom = number of testpoints accessible from either side per net
+    """
+    def __len__(self):
+        return len(self.nets)
+
+    def covered(self, side=None):
+        """
+        Get a boolean array: Is the net testable from the given NetSide?
+        None = from any side, NetSide.Both = from both sides.
+        """
+        if side == NetSide.Top:
+            return self.top > 0
+        if side == NetSide.Bottom:
+            return self.bottom > 0
+        if side == NetSide.Both:
+            return (self.top > 0) & (self.bottom > 0)
+        return (self.top > 0) | (self.bottom > 0)
+
+    def uncovered(self, side=None):
+        "Get the netlist net indices of the nets not testable from the given side"
+        return self.nets[~self.covered(side)]
+
+    def fraction(self, side=None):
+        "Get the fraction of the nets testable from the given side"
+        return float(np.mean(self.covered(side))) if len(self) else 1.
+
+class ProbeCandidates(namedtuple("ProbeCandidates", ["net", "point", "distance"])):
+    """
+    The best probe location per net.
+    net = netlist net index, point = netlist point index,
+    distance = distance of the point to the nearest probe grid node
+    """
+    def __len__(self):
+        return len(self.net)
+
+# Exposure values with bare copper on the top and on the bottom side
+_top_exposed = [NetPointExposure.SolderMaskExposed.value,
+                NetPointExposure.SolderMaskCoveredSecondaryBottom.value]
+_bottom_exposed = [NetPointExposure.SolderMaskExposed.value,
+                   NetPointExposure.SolderMaskCoveredPrimaryTop.value]
+# Test side values allowing probing from the top and from the bottom side
+_top_testsides = [TestpointTestSide.ComponentSide.value, TestpointTestSide.BothSides.value,
+                  TestpointTestSide.AnyOneSide.value, TestpointTestSide.Undefined.value]
+_bottom_testsides = [TestpointTestSide.SolderSide.value, TestpointTestSide.BothSides.value,
+                     TestpointTestSide.AnyOneSide.value, TestpointTestSide.Undefined.value]
+
+def probe_access(netlist):
+    """
+    Get (top, bottom) boolean arrays: Can the points of a ColumnarNetlist
+    be probed from the top / bottom side?
+    """
+    testable = ((netlist.flags & POINT_MIDPOINT) == 0) | \
+               ((netlist.flags & POINT_FORCE_MIDPOINT) != 0)
+    top = testable & (netlist.side != NetSide.Bottom.value) & \
+        np.isin(netlist.exposure, _top_exposed)
+    bottom = testable & (netlist.side != NetSide.Top.value) & \
+        np.isin(netlist.exposure, _bottom_exposed)
+    return top, bottom
+
+def accessible_testpoints(netlist):
+    """
+    Get (top, bottom) boolean arrays: Is the point of a ColumnarNetlist
+    a testpoint that can be probed from the top / bottom side?
+    """
+    top, bottom = probe_access(netlist)
+    testpoint = (netlist.flags & POINT_TESTPOINT) != 0
+    return (top & testpoint & np.isin(netlist.testside, _top_testsides),
+            bottom & testpoint & np.isin(netlist.testside, _bottom_testsides))
+
+def net_coverage(netlist):
+    "Count the accessible testpoints of every net of a ColumnarNetlist"
+    top, bottom = accessible_testpoints(netlist)
+    count = len(netlist.nets)
+    top = np.bincount(netlist.net_index[top], minlength=count)
+    bottom = np.bincount(netlist.net_index[bottom], minlength=count)
+    nets = np.flatnonzero(netlist.nets >= 0)
+    return NetCoverage(nets, [netlist.names[net] for net in nets.tolist()],
+                       top[nets], bottom[nets])
+
+def grid_distance(x, y, pitch, origin=(0., 0.)):
+    "Get the distance of every point to the nearest node of a square grid"
+    dx = np.asarray(x, dtype=float) - origin[0]
+    dy = np.asarray(y, dtype=float) - origin[1]
+    return np.hypot(dx - np.round(dx / pitch) * pitch, dy - np.round(dy / pitch) * pitch)
+
+def probe_candidates(netlist, pitch, origin=(0., 0.), side=NetSide.Bottom, nets=None):
+    """
+    Find the via of every net that can be probed from the given side
+    (NetSide.Top or NetSide.Bottom) and lies closest to a probe grid
+    with the given pitch and origin.
+    nets = netlist net indices to consider (default: the nets without
+    a testpoint accessible from that side).
+    Returns ProbeCandidates sorted by net, nets without such a via are left out.
+    """
+    if nets is None:
+        nets = net_coverage(netlist).uncovered(side)
+    top, bottom = probe_access(netlist)
+    access = top if side == NetSide.Top else bottom
+    wanted = np.zeros(len(netlist.nets), dtype=bool)
+    wanted[np.asarray(nets, dtype=np.int64)] = True
+    points = np.flatnonzero(access & ((netlist.flags & POINT_VIA) != 0) &
+                            wanted[netlist.net_index])
+    distance = grid_distance(netlist.x[points], netlist.y[points], pitch, origin)
+    net = netlist.net_index[points]
+    # The closest via comes first for every net
+    order = np.lexsort((distance, net))
+    net, points, distance = net[order], points[order], distance[order]
+    first = np.ones(len(net), dtype=bool)
+    first[1:] = net[1:] != net[:-1]
+    return ProbeCandidates(net[first], points[first], distance[first])
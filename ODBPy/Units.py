@@ -5,9 +5,11 @@ ODB++ unit utilities
 """
 import re
 
-__all__ = ["linerecords_unit", "to_mm", "to_mil", "to_micrometers", "to_inch"]
+__all__ = ["linerecords_unit", "find_unit", "to_mm", "to_mil", "to_micrometers", "to_inch",
+           "symbol_unit"]
 
 _unit_line_re = re.compile(r"U\s+([A-Z]+)")
+_any_unit_line_re = re.compile(r"(?:U\s+|UNITS\s*=\s*)([A-Z]+)\s*$")
 
 def linerecords_unit(linerecords):
     """
@@ -22,6 +24,17 @@ def linerecords_unit(linerecords):
         raise ValueError("Invalid unit line: {}".format(unit_lines[0]))
     return match.group(1)
 
+def find_unit(lines, default="INCH"):
+    """
+    Get the unit of the first unit line ("U MM" or "UNITS=MM") of raw line
+    record lines. ODB++ data without a unit line is in inch.
+    """
+    for line in lines:
+        match = _any_unit_line_re.match(line)
+        if match is not None:
+            return match.group(1)
+    return default
+
 _mm_factors = {
     "MM": 1.0,
     "UM": 0.001,
@@ -45,3 +58,10 @@ def to_micrometers(value, from_unit):
 def to_inch(value, from_unit):
     """Convert a value in unit <from_unit> to inches"""
     return to_mm(value, from_unit) / _mm_factors["IN"]
+
+def symbol_unit(unit):
+    """
+    Get the unit of symbol dimensions for a given coordinate unit:
+    Symbols are sized in mil for inch data and in micrometers for mm data
+    """
+    return "UM" if unit.upper() == "MM" else "MIL"
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from concurrent.futures import ProcessPoolExecutor
+import functools
 import gzip
+import hashlib
+import os.path
 from zipfile import ZipFile
 
 __all__ = ["readFileLines", "readGZIPFileLines", "readZIPFileLines", "try_parse_number",
-           "not_none", "const_false"]
+           "not_none", "const_false", "step_directory", "file_digest", "parallel_map"]
 
 def try_parse_number(s):
     """
@@ -51,3 +55,26 @@ def not_none(x):
 def const_false():
     "Always return False. Used in place of a lambda."
     return False
+
+def step_directory(directory, step="pcb"):
+    "Get the directory of a step (by default pcb) in the given ODB++ directory"
+    return os.path.join(directory, "steps", step)
+
+def file_digest(filepath, algorithm="sha256", chunk_size=1 << 20):
+    "Get the hex digest of the contents of a file, read in chunks"
+    digest = hashlib.new(algorithm)
+    with open(filepath, "rb") as fin:
+        for chunk in iter(functools.partial(fin.read, chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def parallel_map(fn, *iterables, workers=None):
+    """
+    Lazily map fn over the iterables in a process pool with the given number
+    of workers (None = one per CPU, 1 = run in the current process).
+    """
+    if workers == 1:
+        yield from map(fn, *iterables)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(fn, *iterables)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.AnnularRing import *
+from ODBPy.DrillHits import DrillHits
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+
+testCopper = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 s1000
+$2 oval2000x1000
+$3 r3000
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+P 5.0 0.0 1 P 0 8 45
+P 0.0 5.0 2 P 0 8 0
+P 10.0 10.0 3 N 0 8 0
+"""
+
+def _hits():
+    # 0.5 mm holes
+    x = np.array([0.0, 0.1, 5.0, 0.5, 10.0])
+    y = np.array([0.0, 0.0, 0.0, 5.0, 10.0])
+    return DrillHits("through_drill", x, y, np.full(5, 0.5 / 0.0254), np.zeros(5, dtype=int), [],
+                     "MM")
+
+class TestAnnularRing(object):
+    def test_annular_rings(self):
+        copper = parse_feature_arrays(read_linerecords(StringIO(testCopper)))
+        rings = annular_rings(_hits(), [(0, copper), (3, copper)])
+        assert_equal(10, len(rings))
+        assert_equal([0, 1, 2, 3, 4] * 2, rings.drill.tolist())
+        assert_equal([0] * 5 + [3] * 5, rings.layer.tolist())
+        assert_equal([0, 0, 1, 2, -1], rings.pad[:5].tolist())
+        assert_true(np.allclose([0.25, 0.15, 0.25, 0.25], rings.ring[:4]))
+        # Negative pads are no pads
+        assert_equal([4, 9], rings.missing().tolist())
+        assert_equal([1, 4, 6, 9], rings.violations(0.2).tolist())
+
+    def test_resized_pads(self):
+        # Pad 0 drawn at twice its symbol size
+        copper = parse_feature_arrays(read_linerecords(StringIO(
+            testCopper.replace("P 0.0 0.0 0 P 0 8 0", "P 0.0 0.0 -1 0 2.0 P 0 8 0"))))
+        rings = annular_rings(_hits(), [(0, copper)])
+        assert_true(np.allclose([0.75, 0.65], rings.ring[:2]))
+
+    def test_no_layers(self):
+        assert_equal(0, len(annular_rings(_hits(), [])))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.Clearance import *
+from ODBPy.ColumnarNetlist import parse_columnar_netlist
+from ODBPy.Connectivity import netlist_feature_nets
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+from ODBPy.Structures import Polarity
+
+testCopper = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r200
+$2 s1000
+$3 r500
+$4 s200
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+P 1.25 0.0 0 P 0 8 0
+L 0.0 3.0 5.0 3.0 1 P 0
+P 2.5 3.8 2 P 0 8 0
+P 0.0 0.3 1 P 0 8 0
+S P 0
+OB 10.0 0.0 I
+OS 14.0 0.0
+OS 14.0 4.0
+OS 10.0 4.0
+OS 10.0 0.0
+OE
+SE
+P 12.0 2.0 3 P 0 8 0
+P 15.0 2.0 3 P 0 8 0
+A 21.0 0.0 21.0 0.0 20.0 0.0 1 P 0 Y
+P 20.0 0.5 1 P 0 8 0
+L 0.0 20.0 4.0 20.0 4 P 0
+P 4.3 20.0 1 P 0 8 0
+P 4.3 21.0 1 N 0 8 0
+"""
+
+# A via in the antipad of a pour and a via on the pour
+testAntipad = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r400
+
+#
+#Layer features
+#
+S P 0
+OB 0.0 0.0 I
+OS 10.0 0.0
+OS 10.0 10.0
+OS 0.0 10.0
+OS 0.0 0.0
+OE
+SE
+P 5.0 5.0 0 N 0 8 0
+P 5.0 5.0 1 P 0 8 0
+P 2.0 2.0 1 P 0 8 0
+"""
+
+def _features():
+    return parse_feature_arrays(read_linerecords(StringIO(testCopper)))
+
+class TestClearance(object):
+    def test_check_clearance(self):
+        violations = check_clearance(_features(), 0.8, workers=1)
+        pairs = list(zip(violations.feature_a.tolist(), violations.feature_b.tolist()))
+        assert_equal([(17, 18), (2, 3), (0, 1), (15, 16), (1, 4), (5, 14)], pairs)
+        assert_true(np.allclose([0.1, 0.2, 0.25, 0.3, np.hypot(1.25, 0.3) - 0.6, 0.75],
+                                violations.distance, atol=0.01))
+        # Location in the middle of the gap
+        assert_true(np.isclose(3.2, violations.y[1]))
+        assert_true(np.allclose([0.625, 0.0], [violations.x[2], violations.y[2]]))
+
+    def test_nets(self):
+        nets = np.full(20, -1)
+        nets[[0, 1]] = 0
+        nets[4] = 1
+        nets[[2, 3]] = 2
+        violations = check_clearance(_features(), 0.8, workers=1, nets=nets)
+        pairs = list(zip(violations.feature_a.tolist(), violations.feature_b.tolist()))
+        # The overlapping pads 0 and 4 are a short, same-net pairs are no violations
+        assert_equal([(0, 4), (17, 18), (15, 16), (1, 4), (5, 14)], pairs)
+        assert_equal(0., violations.distance[0])
+
+    def test_netlist_nets(self):
+        # The small pad 4 on the edge of pad 0 belongs to another net
+        netlist = parse_columnar_netlist({
+            None: ["UNITS=MM"],
+            "Nets names": ["$0 A", "$1 B"],
+            "Netlist points": ["0 0.02 0.0 0.0 T e e", "1 0.02 0.0 0.3 T e e"]})
+        nets = netlist_feature_nets(_features(), netlist, 0, 1)
+        assert_equal([0, -1, -1, -1, 1], nets[:5].tolist())
+        violations = check_clearance(_features(), 0.8, workers=1, nets=nets)
+        assert_equal((0, 4, 0.), (violations.feature_a[0], violations.feature_b[0],
+                                  violations.distance[0]))
+
+    def test_tiles(self):
+        untiled = check_clearance(_features(), 1.0, workers=1)
+        tiled = check_clearance(_features(), 1.0, tile_size=2.0, workers=1)
+        assert_equal(untiled.feature_a.tolist(), tiled.feature_a.tolist())
+        assert_equal(untiled.feature_b.tolist(), tiled.feature_b.tolist())
+        assert_true(np.allclose(untiled.distance, tiled.distance))
+
+    def test_primitives(self):
+        primitives = feature_primitives(_features())
+        # Negative pads are skipped
+        assert_false(19 in primitives.owner.tolist())
+        # Square pads, square lines and surfaces are outlines
+        assert_equal(4, (primitives.owner == 3).sum())
+        assert_equal(6, (primitives.owner == 17).sum())
+        assert_true(primitives.outline[primitives.owner == 5].all())
+        assert_false(primitives.outline[primitives.owner == 0].any())
+
+    def test_symbol_outlines(self):
+        # A thermal pad (drawn from its symbol outline) and a user symbol
+        features = parse_feature_arrays(read_linerecords(StringIO(testCopper.replace(
+            "$4 s200", "$4 s200\n$5 thr1000x600x45x4x100\n$6 my_symbol") +
+            "P 30.0 0.0 5 P 0 8 0\nP 32.0 0.0 6 P 0 8 0\nP 30.0 0.7 1 P 0 8 0\n")))
+        assert_equal(["my_symbol"], unsupported_symbols(features))
+        primitives = feature_primitives(features)
+        assert_true(primitives.outline[primitives.owner == 20].all())
+        assert_false(21 in primitives.owner.tolist())
+        # The small pad above the thermal faces its ring between the spokes
+        violations = check_clearance(features, 0.2, workers=1)
+        found = violations.feature_a == 20
+        assert_equal([22], violations.feature_b[found].tolist())
+        assert_true(np.isclose(0.1, violations.distance[found][0]))
+
+    @raises(ValueError)
+    def test_strict_symbols(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(testCopper.replace(
+            "$4 s200", "$4 s200\n$5 my_symbol") + "P 30.0 0.0 5 P 0 8 0\n")))
+        feature_primitives(features, strict=True)
+
+    def test_negative_layer(self):
+        # On a negative layer, only the negative pad is copper
+        primitives = feature_primitives(_features(), layer_polarity=Polarity.Negative)
+        assert_equal([19], np.unique(primitives.owner).tolist())
+
+    def test_antipad(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(testAntipad)))
+        # The antipad leaves a gap of 0.3 around the via instead of a short
+        assert_equal(0, len(check_clearance(features, 0.2, workers=1).feature_a))
+        violations = check_clearance(features, 0.4, workers=1)
+        assert_equal([(0, 9)], list(zip(violations.feature_a.tolist(),
+                                        violations.feature_b.tolist())))
+        assert_true(np.isclose(0.3, violations.distance[0]))
+        nets = np.zeros(11, dtype=np.int64)
+        nets[9] = 1
+        assert_equal(0, len(check_clearance(features, 0.2, workers=1, nets=nets).feature_a))
+        # The other via far inside the pour is a short
+        nets[10] = 1
+        violations = check_clearance(features, 0.2, workers=1, nets=nets)
+        assert_equal([(0, 10, 0.)], list(zip(violations.feature_a.tolist(),
+                                             violations.feature_b.tolist(),
+                                             violations.distance.tolist())))
+
+    def test_negative_plane(self):
+        # A via (drawn negative) in a clearance of the plane (order 2)
+        features = parse_feature_arrays(read_linerecords(StringIO(
+            testAntipad.split("S P 0")[0] + "P 5.0 5.0 0 P 0 8 0\nP 5.0 5.0 1 N 0 8 0\n")))
+        violations = check_clearance(features, 0.4, workers=1,
+                                     layer_polarity=Polarity.Negative)
+        assert_equal([(1, 2)], list(zip(violations.feature_a.tolist(),
+                                        violations.feature_b.tolist())))
+        assert_true(np.allclose([0.3, 5., 5.], [violations.distance[0], violations.x[0],
+                                                violations.y[0]]))
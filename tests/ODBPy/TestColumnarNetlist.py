@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from ODBPy.ColumnarNetlist import *
+from ODBPy.NetlistParser import NetSide
+from ODBPy.NetlistParser import TestpointTestSide as PointTestSide
+
+testNetlist = {
+    None: ["H optimize n"],
+    "Nets names": ["$0 GND", "$1 VCC"],
+    "Netlist points": [
+        "0 0.0236 0.45 -1.2916 B e e staggered 0 0 0",
+        "1 0.0069 0.287 -1.312 B e e staggered 0 0 0 v",
+        "0 0 0.24 -1.18 T 0.0354 0.0276 e e staggered 0 0 0",
+        "-1 0.05 2.0 2.0 D e c t c",
+        "not a netlist point"
+    ]
+}
+
+class TestColumnarNetlist(object):
+    def test_parse(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        assert_equal(4, len(netlist))
+        assert_equal([-1, 0, 1], netlist.nets.tolist())
+        assert_equal([-1, "GND", "VCC"], netlist.names)
+        assert_equal([0, 2], netlist.points_by_name("GND").tolist())
+        assert_equal([1], netlist.points_by_name("VCC").tolist())
+        assert_equal(0, len(netlist.points_by_name("FOO")))
+        assert_equal([NetSide.Both.value, NetSide.Both.value, NetSide.Top.value, NetSide.Bottom.value],
+            netlist.side.tolist())
+        assert_equal([0, POINT_VIA, 0, POINT_TESTPOINT], netlist.flags.tolist())
+        assert_equal(PointTestSide.ComponentSide.value, netlist.testside[3])
+        assert_equal(netlist.x.tolist(), netlist.locations().x.tolist())
+
+    def test_nets_at(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        nets = netlist.nets_at([0.45, 0.29, 5.0], [-1.29, -1.31, 5.0], 0.01)
+        assert_equal(["GND", "VCC", None],
+            [netlist.names[net] if net >= 0 else None for net in nets])
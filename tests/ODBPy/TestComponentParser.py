@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+from ODBPy.ComponentParser import *
+from ODBPy.ComponentStore import ComponentCollection
+from ODBPy.LineRecordParser import *
+from ODBPy.Structures import *
+
+testComponents = """
+#
+#CMP 0
+#
+CMP 0 -31.75 3.81 0 N C1 EEUFR1H470;0=1
+PRP Name 'EEUFR1H470'
+PRP Value '47 uF'
+TOP 0 -32.9595 3.8107 0 N 3 0 1
+TOP 1 -30.5405 3.8107 0 N 1 0 2
+
+#
+#CMP 1
+#
+CMP 1 -10 5 90 M R1 10k
+TOP 0 -10 4 90 M 1 0 1
+"""
+
+class TestComponentParser(object):
+    def test_parse_components(self):
+        components = parse_components(read_linerecords(StringIO(testComponents)))
+        assert_equal("C1", components[0].name)
+        assert_equal({0: 1}, components[0].attributes)
+        assert_equal({"Name": "EEUFR1H470", "Value": "47 uF"}, components[0].properties)
+        assert_equal(Mirror.Mirror, components[1].mirror)
+        assert_equal(ToeprintRecord(0, Point(-10, 4), 90., Mirror.Mirror, 1, 0, 1),
+            components[1].toeprints[0])
+
+    def test_streaming_equals_sections(self):
+        expected = parse_components(read_linerecords(StringIO(testComponents)))
+        actual = parse_components_streaming(read_raw_linerecords(StringIO(testComponents)))
+        assert_equal(expected, actual)
+
+    def test_streaming_ignores_other_records(self):
+        lines = read_raw_linerecords(StringIO("U MM\n@0 .comp_height\n" + testComponents))
+        assert_equal(2, len(parse_components_streaming(lines)))
+
+    def test_component_id(self):
+        text = testComponents.replace("10k\n", "10k ;0=1;ID=55\n")
+        for components in (parse_components(read_linerecords(StringIO(text))),
+                           parse_components_streaming(read_raw_linerecords(StringIO(text)))):
+            assert_equal({0: 1}, components[1].attributes)
+            assert_equal(1, len(components[1].toeprints))
+
+    @raises(ValueError)
+    def test_streaming_invalid_component(self):
+        # The toeprint of R1 must not be attached to C1
+        text = testComponents.replace("CMP 1 -10 5", "CMP 1 -10 x")
+        parse_components_streaming(read_raw_linerecords(StringIO(text)))
+
+    def test_streaming_columnar(self):
+        components, toeprints = parse_components_streaming(
+            read_raw_linerecords(StringIO(testComponents)), columnar_toeprints=True)
+        assert_equal([], components[0].toeprints)
+        assert_equal([0, 0, 1], toeprints.component.tolist())
+        assert_equal([3, 1, 1], toeprints.net_num.tolist())
+        assert_equal([False, False, True], toeprints.mirrored.tolist())
+        assert_equal([1, 2, 1], toeprints.toeprint_name)
+
+    def test_collection_from_columnar(self):
+        lines = read_raw_linerecords(StringIO(testComponents))
+        expected = ComponentCollection(parse_components_streaming(lines))
+        components, toeprints = parse_components_streaming(lines, columnar_toeprints=True)
+        actual = ComponentCollection(components, top_toeprints=toeprints)
+        assert_equal(expected.toeprint_component.tolist(), actual.toeprint_component.tolist())
+        assert_equal(expected.toeprint_x.tolist(), actual.toeprint_x.tolist())
+        assert_equal(expected.toeprint_net.tolist(), actual.toeprint_net.tolist())
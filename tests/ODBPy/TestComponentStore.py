@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.ComponentStore import *
+from ODBPy.ComponentParser import Component, ToeprintRecord
+from ODBPy.NetlistParser import NetSide
+from ODBPy.Structures import *
+
+def _component(name, part, x, y, pins):
+    toeprints = [ToeprintRecord(i, Point(px, py), 0., Mirror.No, net, 0, str(i))
+                 for i, (px, py, net) in enumerate(pins)]
+    return Component(name, part, Point(x, y), 0., Mirror.No, {}, {}, toeprints)
+
+def _collection():
+    return ComponentCollection(
+        {0: _component("R1", "10k", 1., 1., [(0.5, 1., 0), (1.5, 1., 1)]),
+         1: _component("R2", "10k", 5., 1., [(4.5, 1., 1), (5.5, 1., 2)])},
+        [_component("C1", "100n", 1., 1., [(0.8, 1., 0), (1.2, 1., 2)])])
+
+testComponents = """
+UNITS=MM
+#
+#CMP 0
+#
+CMP 0 -31.75 3.81 0 N C1 EEUFR1H470;0=1
+PRP Name 'EEUFR1H470'
+TOP 0 -32.9595 3.8107 0 N 3 0 1
+TOP 1 -30.5405 3.8107 0 N 1 0 2
+"""
+
+class TestComponentCollection(object):
+    def test_indexes(self):
+        collection = _collection()
+        assert_equal(3, len(_collection()))
+        assert_equal("R2", collection.by_name("R2").name)
+        assert_is_none(collection.by_name("R3"))
+        assert_equal(["R1", "R2"], [c.name for c in collection.by_part("10k")])
+        assert_equal([], collection.by_part("1M"))
+        assert_equal([NetSide.Top.value] * 2 + [NetSide.Bottom.value], collection.side.tolist())
+
+    def test_nets(self):
+        collection = _collection()
+        toeprints = collection.toeprints_on_net(1)
+        assert_equal([0, 1], collection.toeprint_component[toeprints].tolist())
+        assert_equal([1, 0], collection.toeprint_pin[toeprints].tolist())
+        assert_equal(0, len(collection.toeprints_on_net(7)))
+
+    def test_spatial(self):
+        collection = _collection()
+        assert_equal([0, 2], collection.components_in_bbox(0, 0, 2, 2).tolist())
+        assert_equal([2], collection.components_in_bbox(0, 0, 2, 2, NetSide.Bottom).tolist())
+        assert_equal([1], collection.components_in_bbox(5.4, 0, 6, 2).tolist())
+        toeprints, _ = collection.nearest_toeprints([4.6, 10.], [1., 10.], 0.2)
+        assert_equal([2, -1], toeprints.tolist())
+
+    def test_locations(self):
+        collection = _collection()
+        assert_equal([Point(1., 1.), Point(5., 1.), Point(1., 1.)],
+                     collection.locations().to_points())
+        assert_equal(Point(4.5, 1.), collection.toeprint_locations()[2])
+
+    def test_toeprint_transforms(self):
+        # Toeprint records are board coordinates: the pin at (1, 0) of the
+        # component is mirrored to (-1, 0) and rotated clockwise to (0, 1)
+        rotated = _component("U1", "IC", 10., 20., [(10., 21., 0), (12., 20., 1)])
+        rotated = rotated._replace(rotation=90., mirror=Mirror.Mirror)
+        collection = ComponentCollection([rotated])
+        local = collection.toeprint_local_locations()
+        assert_true(np.allclose([[1., 0.], [0., 2.]], local.xy))
+        assert_true(local is collection.toeprint_local_locations())
+
+    def test_units(self):
+        top = read_component_side(StringIO(testComponents))
+        assert_equal("MM", top[2])
+        assert_equal(2, len(top[1].x))
+        collection = ComponentCollection.from_sides(top, None)
+        assert_equal("MM", collection.unit)
+        assert_equal(["C1"], [c.name for c in collection])
+        assert_equal("INCH", ComponentCollection.from_sides().unit)
+        inch = read_component_side(StringIO(testComponents.replace("UNITS=MM", "")))
+        assert_equal("INCH", inch[2])
+
+    @raises(ValueError)
+    def test_mixed_units(self):
+        top = read_component_side(StringIO(testComponents))
+        bottom = read_component_side(StringIO(testComponents.replace("MM", "INCH")))
+        ComponentCollection.from_sides(top, bottom)
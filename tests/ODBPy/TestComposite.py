@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.Composite import *
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.Graph import connected_components, propagate_labels
+from ODBPy.LineRecordParser import *
+from ODBPy.Structures import Polarity
+
+# A square surface with a negative pad in the middle,
+# a smaller positive pad inside the resulting hole and one on the surface
+testLayer = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r2000
+$1 r1000
+
+#
+#Layer features
+#
+S P 0
+OB 0.0 0.0 I
+OS 4.0 0.0
+OS 4.0 4.0
+OS 0.0 4.0
+OS 0.0 0.0
+OE
+SE
+P 2.0 2.0 0 N 0 8 0
+P 2.0 2.0 1 P 0 8 0
+P 3.5 3.5 1 P 0 8 0
+"""
+
+def _composite(**kwargs):
+    features = parse_feature_arrays(read_linerecords(StringIO(testLayer)))
+    return composite_layer(features, 0.02, tile_pixels=32, workers=1, **kwargs)
+
+class TestComposite(object):
+    def test_composite_layer(self):
+        composite = _composite()
+        assert_equal((7, 7), composite.grid.shape)
+        assert_true(np.isclose(16 - np.pi + np.pi / 4, composite.area(), rtol=1e-3))
+        assert_is_none(composite.coverage)
+        bitmap = composite.mosaic()
+        assert_equal((224, 224), bitmap.shape)
+        # Row 0 is at ymin: the hole around (2, 2) and the pad in its center
+        assert_true(bitmap[100, 100])
+        assert_false(bitmap[100, 60])
+        assert_true(bitmap[100, 40])
+        assert_false(bitmap[210, 100])
+
+    def test_regions_and_overlaps(self):
+        composite = _composite(coverage=True)
+        labels, count = composite.regions()
+        assert_equal(2, count)
+        assert_equal(labels[10, 10], labels[190, 10])
+        assert_true(labels[100, 100] != labels[10, 10])
+        # Both pads are drawn on top of the surface
+        overlap = composite.overlaps().sum() * 0.02 ** 2
+        assert_true(np.isclose(np.pi / 2, overlap, rtol=1e-2))
+
+    def test_negative_layer(self):
+        composite = _composite(layer_polarity=Polarity.Negative)
+        # Copper everywhere but on the surface, plus the ring of the negative pad
+        side = 7 * 32 * 0.02
+        assert_true(np.isclose(side ** 2 - 16 + np.pi - np.pi / 4, composite.area(), rtol=1e-2))
+        bitmap = composite.mosaic()
+        assert_false(bitmap[100, 100])
+        assert_true(bitmap[100, 60])
+        assert_false(bitmap[100, 40])
+        assert_true(bitmap[210, 100])
+
+    @raises(ValueError)
+    def test_overlaps_without_coverage(self):
+        _composite().overlaps()
+
+    def test_connected_components(self):
+        labels = connected_components(6, [0, 4, 2], [1, 5, 1])
+        assert_equal([0, 0, 0, 1, 2, 2], labels.tolist())
+
+    def test_propagate_labels(self):
+        labels = propagate_labels([-1, 0, -1, -1, 1, -1], [0, 1, 2, 3], [1, 2, 3, 4])
+        assert_equal([0, 0, 0, 1, 1, -1], labels.tolist())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false
+from io import StringIO
+import numpy as np
+from ODBPy.ColumnarNetlist import parse_columnar_netlist
+from ODBPy.Connectivity import *
+from ODBPy.DrillHits import DrillHits
+from ODBPy.DrillTools import DrillTool, DrillToolType
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+from ODBPy.Structures import HolePlating, Polarity
+
+# A trace between two pads and a separate pad
+testTop = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r200
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+L 0.0 0.0 5.0 0.0 1 P 0
+P 5.0 0.0 0 P 0 8 0
+P 10.0 0.0 0 P 0 8 0
+"""
+
+# A pad inside a surface, a trace leaving the surface and a separate pad
+testBottom = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r200
+
+#
+#Layer features
+#
+S P 0
+OB 4.0 -1.0 I
+OS 6.0 -1.0
+OS 6.0 1.0
+OS 4.0 1.0
+OS 4.0 -1.0
+OE
+SE
+P 5.0 0.0 0 P 0 8 0
+L 5.5 0.5 5.0 5.0 1 P 0
+P 10.0 0.0 0 P 0 8 0
+"""
+
+# A pour with a via pad inside an antipad and a via pad without one
+testAntipad = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r400
+
+#
+#Layer features
+#
+S P 0
+OB 0.0 0.0 I
+OS 10.0 0.0
+OS 10.0 10.0
+OS 0.0 10.0
+OS 0.0 0.0
+OE
+SE
+P 5.0 5.0 0 N 0 8 0
+P 5.0 5.0 1 P 0 8 0
+P 2.0 2.0 1 P 0 8 0
+"""
+
+# A negative plane layer with a clearance and a thermal relief
+testPlane = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 thr1000x600x45x4x100
+
+#
+#Layer features
+#
+P 5.0 5.0 0 P 0 8 0
+P 2.0 2.0 1 P 0 8 0
+"""
+
+# Net B claims the end of the bottom trace, which is connected to net A
+testNetlist = {
+    None: ["H optimize n", "UNITS=MM"],
+    "Nets names": ["$0 A", "$1 B"],
+    "Netlist points": [
+        "0 0.02 0.0 0.0 T e e staggered 0 0 0",
+        "1 0.02 10.0 0.0 T e e staggered 0 0 0",
+        "1 0.02 5.0 5.0 D e e staggered 0 0 0",
+    ]
+}
+
+def _layer(text):
+    return layer_connectivity(parse_feature_arrays(read_linerecords(StringIO(text))))
+
+def _hits():
+    "A plated hole at (5, 0) and a non-plated hole at (10, 0), both 0.3 mm"
+    tools = [DrillTool(1, HolePlating.Plated, DrillToolType.Standard, 11.8, {}),
+             DrillTool(2, HolePlating.NonPlated, DrillToolType.Standard, 11.8, {})]
+    return DrillHits("through_drill", np.array([5., 10.]), np.array([0., 0.]),
+                     np.full(2, 11.8), np.array([0, 1]), tools, "MM")
+
+class TestConnectivity(object):
+    def test_layer_connectivity(self):
+        top = _layer(testTop)
+        assert_equal(2, top.count)
+        assert_equal([0, 0, 0, 1], top.component.tolist())
+        bottom = _layer(testBottom)
+        # The pad inside the surface and the trace are connected to it,
+        # the polygon lines of the surface are no features
+        assert_equal(2, bottom.count)
+        assert_equal([0] + [-1] * 7 + [0, 0, 1], bottom.component.tolist())
+
+    def test_connect_layers(self):
+        nets = connect_layers([_layer(testTop), _layer(testBottom)], [(_hits(), [0, 1])])
+        # Both layers are joined by the plated hole only
+        assert_equal(3, nets.count)
+        top, bottom = nets.feature_nets(0), nets.feature_nets(1)
+        assert_equal(top[0], bottom[9])
+        assert_false(top[3] == bottom[10])
+        assert_equal([top[0], top[3], -1], nets.nets_at(0, [2., 10.2, 20.], [0., 0., 0.]).tolist())
+
+    def test_antipad(self):
+        layer = _layer(testAntipad)
+        # The via pad inside the antipad is separated from the pour
+        # (the surface lines and the antipad have no copper)
+        assert_equal(2, layer.count)
+        assert_equal([0] + [-1] * 8 + [1, 0], layer.component.tolist())
+        nets = connect_layers([layer], [])
+        assert_equal([nets.feature_nets(0)[9], nets.feature_nets(0)[0]],
+                     nets.nets_at(0, [5., 5.6], [5., 5.], 0.15).tolist())
+
+    def test_negative_plane(self):
+        layer = layer_connectivity(parse_feature_arrays(read_linerecords(StringIO(testPlane))),
+                                   layer_polarity=Polarity.Negative)
+        # Only the plane (after the two features) has copper
+        assert_equal([-1, -1, 0], layer.component.tolist())
+        nets = connect_layers([layer], [])
+        # No copper in the clearance, the thermal relief connects its hole
+        assert_equal([-1, 0, 0], nets.nets_at(0, [5., 2., 3.5], [5., 2., 3.5], 0.15).tolist())
+
+    def test_netlist_feature_nets(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        assert_equal([0, 1], layer_points(netlist, 0, 2).tolist())
+        assert_equal([2], layer_points(netlist, 1, 2).tolist())
+        assert_equal([], layer_points(netlist, 1, 3).tolist())
+        # Points on both sides are on every layer
+        through = parse_columnar_netlist(dict(testNetlist, **{"Netlist points":
+            testNetlist["Netlist points"] + ["0 0.02 7.0 0.0 B e e staggered 0 0 0"]}))
+        assert_equal([0, 1, 3], layer_points(through, 0, 3).tolist())
+        assert_equal([3], layer_points(through, 1, 3).tolist())
+        assert_equal([2, 3], layer_points(through, 2, 3).tolist())
+        top = parse_feature_arrays(read_linerecords(StringIO(testTop)))
+        assert_equal([0, 0, 0, 1], netlist_feature_nets(top, netlist, 0, 2).tolist())
+        # Net B spreads from the end of the trace to the surface and its pad
+        bottom = parse_feature_arrays(read_linerecords(StringIO(testBottom)))
+        assert_equal([1] + [-1] * 7 + [1, 1, -1],
+                     netlist_feature_nets(bottom, netlist, 1, 2).tolist())
+
+    def test_compare_with_netlist(self):
+        nets = connect_layers([_layer(testTop), _layer(testBottom)], [(_hits(), [0, 1])])
+        netlist = parse_columnar_netlist(testNetlist)
+        derived = copper_netlist(nets, netlist)
+        assert_equal(derived.netid[0], derived.netid[2])
+        diff = compare_with_netlist(nets, netlist)
+        # Net B is open (split over two copper nets), the copper net of A shorts A and B
+        assert_equal(["B"], [net for net, _ in diff.opens])
+        assert_equal(1, len(diff.shorts))
+        assert_equal(["A", "B"], sorted(diff.shorts[0][1]))
+
+    def test_matching_netlist(self):
+        nets = connect_layers([_layer(testTop), _layer(testBottom)], [(_hits(), [0, 1])])
+        # The point on both sides only has copper on the bottom layer
+        netlist = parse_columnar_netlist({
+            None: ["H optimize n", "UNITS=MM"],
+            "Nets names": ["$0 A", "$1 C"],
+            "Netlist points": [
+                "0 0.02 0.0 0.0 T e e staggered 0 0 0",
+                "0 0.02 5.0 5.0 B e e staggered 0 0 0",
+                "1 0.02 10.0 0.0 T e e staggered 0 0 0",
+            ]
+        })
+        derived = copper_netlist(nets, netlist)
+        assert_equal(derived.netid[0], derived.netid[1])
+        assert_equal(["A", "A", "C"], [derived.names[i] for i in derived.net_index])
+        diff = compare_with_netlist(nets, netlist)
+        assert_equal([], diff.opens)
+        assert_equal([], diff.shorts)
+        assert_equal([], diff.renamed)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true
+from io import StringIO
+import numpy as np
+from ODBPy.Density import *
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+
+# A square surface with a negative pad in the middle
+# and an overlapping positive pad at a corner
+testLayer = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r2000
+$1 r1000
+
+#
+#Layer features
+#
+S P 0
+OB 0.0 0.0 I
+OS 4.0 0.0
+OS 4.0 4.0
+OS 0.0 4.0
+OS 0.0 0.0
+OE
+SE
+P 2.0 2.0 0 N 0 8 0
+P 0.5 0.5 1 P 0 8 0
+"""
+
+class TestDensity(object):
+    def test_copper_density(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(testLayer)))
+        density = copper_density(features, 1., 0.03, extents=(0., 0., 4., 4.),
+                                 workers=1, tile_pixels=64)
+        # 1 mm cells of 34 pixels (resolution reduced to 1/34 mm), one tile of 2x2 cells
+        assert_equal((4, 4), density.area.shape)
+        assert_true(np.isclose(16 - np.pi, density.total_area(), rtol=1e-3))
+        # The overlapping pad is counted once
+        assert_true(np.isclose(1., density.density()[0, 0]))
+        # The negative pad removes a quarter circle from each center cell
+        assert_true(np.allclose(1 - np.pi / 4, density.density()[1:3, 1:3], rtol=1e-2))
+        assert_equal((1., 2., 2., 3.), density.cell_bounds(2, 1))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.DrillHits import *
+from ODBPy.DrillTools import parse_drill_tools
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+from ODBPy.StructuredTextParser import parse_structured_text
+from ODBPy.Structures import *
+from .TestStructuredTextParser import testDrillTools
+
+# Tool 1 = 12 mil via, tool 2 = 1 mm non-plated
+testDrillFeatures = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r304.8
+$1 r1000
+$2 r500
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 0
+P 1.0 0.0 0 P 0 0
+P 9.0 9.0 0 P 0 0
+P 5.0 5.0 1 P 0 0
+P 5.0 6.0 2 P 0 0
+"""
+
+# The same tools with MM units: sizes in micrometers
+testMetricDrillTools = testDrillTools.replace("THICKNESS=0", "THICKNESS=0\nUNITS=MM") \
+    .replace("DRILL_SIZE=12\n", "DRILL_SIZE=304.8\n").replace("DRILL_SIZE=39.3701", "DRILL_SIZE=1000")
+
+def _hits(by="size", tools=testDrillTools, **kwargs):
+    features = parse_feature_arrays(read_linerecords(StringIO(testDrillFeatures)))
+    toolset = parse_drill_tools(parse_structured_text(StringIO(tools)))
+    return join_drill_hits("through_drill", features, toolset, by=by, **kwargs)
+
+class TestDrillHits(object):
+    def test_join_by_size(self):
+        hits = _hits()
+        assert_equal(5, len(hits))
+        assert_equal([0, 0, 0, 1, -1], hits.tool.tolist())
+        assert_true(np.allclose([12., 12., 12., 39.3701], hits.diameter[:4], atol=1e-3))
+        assert_equal([4], hits.unmatched().tolist())
+        assert_equal(hits.y.tolist(), hits.locations().y.tolist())
+
+    def test_join_by_number(self):
+        hits = _hits(by="number")
+        assert_equal([0, 0, 0, 1, -1], hits.tool.tolist())
+        hits = _hits(by="number", number_offset=0)
+        assert_equal([-1, -1, -1, 0, 1], hits.tool.tolist())
+
+    def test_metric_tools(self):
+        assert_equal([0, 0, 0, 1, -1], _hits(tools=testMetricDrillTools).tool.tolist())
+
+    @raises(ValueError)
+    def test_join_invalid(self):
+        _hits(by="color")
+
+    def test_statistics(self):
+        hits = _hits()
+        assert_equal({1: 3, 2: 1}, hits.hits_per_tool())
+        assert_equal({HolePlating.Via: 3, HolePlating.NonPlated: 1}, hits.plating_counts())
+        histogram, xedges, yedges = hits.density(bins=2, extents=(0., 0., 10., 10.))
+        assert_equal([[2., 0.], [0., 3.]], histogram.tolist())
+        assert_equal([0., 5., 10.], xedges.tolist())
+        assert_equal(5 * 2. + 2 * 10., hits.drill_time(2., 10.))
+        assert_equal(3 * 1. + 1 * 3. + 2 * 10., hits.drill_time({1: 1., 2: 3.}, 10.))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.FeatureArrays import *
+from ODBPy.LineRecordParser import *
+from ODBPy.SurfaceParser import Surface
+from ODBPy.Structures import *
+
+testFeatures = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r40
+$1 s20
+
+#
+#Layer features
+#
+P -30.9595 3.8107 0 P 0 8 0;0=0,2=0
+L 4.8298 -44.2445 4.8298 -45.2654 0 P 0
+S P 0
+OB -38.104 -0.6351 I
+OS -38.104 19.3649
+OS -18.104 19.3649
+OE
+SE
+P 1.0 2.0 -1 1 0.02 N 4 9 30.0
+A 0.0 1.0 1.0 0.0 0.0 0.0 1 P 2 Y
+P 3.0 4.0 1 P 0 5
+"""
+
+class TestFeatureArrays(object):
+    def test_parse_feature_arrays(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(testFeatures)))
+        assert_equal("MM", features.unit)
+        assert_equal({0: "r40", 1: "s20"}, features.symbols)
+        pads = features.pads
+        assert_equal([0, 8, 10], pads.order.tolist())
+        assert_equal([-30.9595, 1.0, 3.0], pads.x.tolist())
+        assert_equal([0, 1, 1], pads.symbol.tolist())
+        assert_equal([1., 0.02, 1.], pads.resize.tolist())
+        assert_equal([Polarity.Positive.value, Polarity.Negative.value,
+                      Polarity.Positive.value], pads.polarity.tolist())
+        assert_equal([Mirror.No.value, Mirror.MirrorX.value, Mirror.MirrorX.value],
+                     pads.mirror.tolist())
+        assert_equal([0., 30., 90.], pads.angle.tolist())
+        assert_equal(Point(1.0, pads.y[1]), pads.locations()[1])
+        assert_equal([1], features.lines.order.tolist())
+        assert_equal([-45.2654], features.lines.ye.tolist())
+        assert_equal(1, len(features.arcs))
+        assert_equal([True], features.arcs.clockwise.tolist())
+        assert_equal([1], features.arcs.symbol.tolist())
+        # Surfaces keep their position
+        assert_equal(1, len(features.surfaces))
+        order, surface = features.surfaces[0]
+        assert_equal(2, order)
+        assert_true(isinstance(surface, Surface))
+        assert_equal(2, len(surface.polygons[0].steps))
+
+    def test_units_header(self):
+        text = testFeatures.replace("#\n#Units\n#\nU MM\n", "UNITS=MM\n")
+        linerecords = read_linerecords(StringIO(text))
+        assert_false("Units" in linerecords)
+        assert_equal("MM", parse_feature_arrays(linerecords).unit)
+
+    def test_parse_empty(self):
+        features = parse_feature_arrays({})
+        assert_equal("INCH", features.unit)
+        assert_equal(0, len(features.pads))
+        assert_equal(np.int64, features.pads.symbol.dtype)
+        assert_equal([], features.surfaces)
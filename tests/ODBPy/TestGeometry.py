@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+import numpy as np
+from ODBPy.Geometry import *
+
+class TestGeometry(object):
+    def test_symbol_shape(self):
+        assert_equal((SHAPE_ROUND, 40., 40.), symbol_shape("r40"))
+        assert_equal((SHAPE_RECT, 60., 30.), symbol_shape("r60x30"))
+        assert_equal((SHAPE_OVAL, 60., 30.), symbol_shape("oval60x30"))
+        assert_equal(SHAPE_OTHER, symbol_shape("donut_r60x30")[0])
+
+    def test_symbol_outlines(self):
+        area = outlines_area
+        assert_true(np.isclose(100. ** 2 - 20. ** 2, area(symbol_outlines("donut_s100x20"))))
+        assert_true(np.isclose(80. * 60. - 60. * 40., area(symbol_outlines("donut_rc80x60x10"))))
+        # Four 10 wide gaps, 20 long, cut out of the ring
+        thermal = symbol_outlines("thr100x60x45x4x10", 1.)
+        assert_equal(4, len(thermal))
+        assert_true(np.isclose(np.pi * (50. ** 2 - 30. ** 2) - 4 * 10. * 20., area(thermal), rtol=1e-2))
+        assert_true(np.isclose(50. * 20., area(symbol_outlines("di50x40"))))
+        assert_is_none(symbol_outlines("moire1x1x1x1x1x1"))
+        assert_is_none(symbol_outlines("my_user_symbol"))
+
+    def test_primitives_inside(self):
+        # A round pad (feature 0) and a 10 x 10 square (feature 1)
+        outer = Primitives.concatenate([
+            Primitives.capsules(np.array([0]), np.zeros(1), np.zeros(1), np.zeros(1),
+                                np.zeros(1), np.full(1, 2.)),
+            Primitives.outlines(np.array([1]), box_outlines(
+                np.array([10.]), np.zeros(1), np.array([5.]), np.array([5.]), np.zeros(1)))])
+        x = np.array([0.5, 1.5, 10., 14.])
+        inner = Primitives.capsules(np.arange(4), x, np.zeros(4), x, np.zeros(4), np.full(4, 1.))
+        item, owner, margin = primitives_inside(inner, outer, limit=3.)
+        assert_equal([0, 2], item.tolist())
+        assert_equal([0, 1], owner.tolist())
+        assert_true(np.allclose([0.5, 3.], margin))
+
+    def test_distance_inside(self):
+        shape = np.array([SHAPE_ROUND, SHAPE_RECT, SHAPE_RECT, SHAPE_OVAL, SHAPE_OVAL, SHAPE_OTHER])
+        hw = np.array([1., 2., 2., 2., 1., 1.])
+        hh = np.array([1., 1., 1., 1., 2., 1.])
+        angle = np.array([0., 0., 90., 0., 0., 0.])
+        dx = np.array([0.5, 1.5, 0., 1.5, 0., 0.])
+        dy = np.array([0., 0.5, 1.5, 0., 1.5, 0.])
+        actual = distance_inside(shape, hw, hh, angle, dx, dy)
+        assert_true(np.allclose([0.5, 0.5, 0.5, 0.5, 0.5], actual[:5]))
+        assert_true(np.isnan(actual[5]))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, assert_is, assert_is_not, raises
+import os
+import tempfile
+import threading
+import zipfile
+from ODBPy.JobManager import *
+
+testMatrix = """
+LAYER {
+    ROW=1
+    CONTEXT=BOARD
+    TYPE=SIGNAL
+    NAME=TOP
+    POLARITY=POSITIVE
+    START_NAME=
+    END_NAME=
+}
+LAYER {
+    ROW=2
+    CONTEXT=BOARD
+    TYPE=SIGNAL
+    NAME=BOTTOM
+    POLARITY=POSITIVE
+    START_NAME=
+    END_NAME=
+}
+"""
+
+testFeatures = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+"""
+
+def _write(directory, path, text):
+    filename = os.path.join(directory, *path.split("/"))
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    if filename.endswith(".Z"):
+        with zipfile.ZipFile(filename, "w") as thezip:
+            thezip.writestr(os.path.basename(filename)[:-2], text)
+    else:
+        with open(filename, "w") as fout:
+            fout.write(text)
+    # Make sure the change is visible even with coarse modification times
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def _job(directory):
+    _write(directory, "matrix/matrix", testMatrix)
+    for layer in ("top", "bottom"):
+        _write(directory, "steps/pcb/layers/{}/features.Z".format(layer), testFeatures)
+
+class TestJobManager(object):
+    def test_refresh(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _job(directory)
+            manager = JobManager(directory)
+            assert_equal(["top", "bottom"], [layer.name for layer in manager.layers()])
+            top, bottom = manager.feature_arrays("top"), manager.feature_arrays("bottom")
+            layers = manager.layers()
+            assert_equal(1, len(top.pads))
+            assert_equal([], manager.refresh())
+            # Rewriting a file with the same content does not reparse anything
+            _write(directory, "steps/pcb/layers/bottom/features.Z", testFeatures)
+            assert_equal([], manager.refresh())
+            # Only the changed layer is reparsed
+            _write(directory, "steps/pcb/layers/top/features.Z",
+                   testFeatures + "P 1.0 0.0 0 P 0 8 0\n")
+            assert_equal({("features", "top"), ("feature_arrays", "top")},
+                         set(manager.refresh()))
+            assert_equal(2, len(manager.feature_arrays("top").pads))
+            assert_is_not(top, manager.feature_arrays("top"))
+            assert_is(bottom, manager.feature_arrays("bottom"))
+            assert_is(layers, manager.layers())
+            fingerprints = manager.fingerprints(("features", "top"))
+            assert_equal(1, len(fingerprints))
+            assert_true(all(isinstance(f, FileFingerprint) for f in fingerprints.values()))
+
+    def test_deleted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _job(directory)
+            manager = JobManager(directory)
+            manager.features("bottom")
+            os.remove(os.path.join(directory, "steps", "pcb", "layers", "bottom", "features.Z"))
+            assert_equal([("features", "bottom")], manager.refresh())
+            assert_equal([], manager.loaded())
+
+    def test_outdated_base(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _job(directory)
+            manager = JobManager(directory)
+            manager.features("top")
+            _write(directory, "steps/pcb/layers/top/features.Z",
+                   testFeatures + "P 1.0 0.0 0 P 0 8 0\n")
+            # Built from the outdated features, so it is outdated as well
+            assert_equal(1, len(manager.feature_arrays("top").pads))
+            assert_equal({("features", "top"), ("feature_arrays", "top")},
+                         set(manager.refresh()))
+            assert_equal(2, len(manager.feature_arrays("top").pads))
+            # Invalidating a base also invalidates the artifacts built from it
+            manager.invalidate([("features", "top")])
+            assert_equal([], manager.loaded())
+
+    def test_failed_refresh(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _job(directory)
+            manager = JobManager(directory)
+            top = manager.feature_arrays("top")
+            bottom = manager.features("bottom")
+            # A half-written file keeps the previous artifacts
+            with open(os.path.join(directory, "steps", "pcb", "layers", "top",
+                                   "features.Z"), "w") as fout:
+                fout.write("PK")
+            _write(directory, "steps/pcb/layers/bottom/features.Z",
+                   testFeatures + "P 1.0 0.0 0 P 0 8 0\n")
+            assert_equal([("features", "bottom")], manager.refresh())
+            assert_equal({("features", "top"), ("feature_arrays", "top")},
+                         set(manager.errors))
+            assert_is(top, manager.feature_arrays("top"))
+            assert_is_not(bottom, manager.features("bottom"))
+            assert_equal({("features", "top"), ("feature_arrays", "top")},
+                         set(manager.changed()))
+            _write(directory, "steps/pcb/layers/top/features.Z",
+                   testFeatures + "P 1.0 0.0 0 P 0 8 0\n")
+            assert_equal({("features", "top"), ("feature_arrays", "top")},
+                         set(manager.refresh()))
+            assert_equal({}, manager.errors)
+            assert_equal(2, len(manager.feature_arrays("top").pads))
+
+    @raises(FileNotFoundError)
+    def test_missing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            JobManager(directory).profile()
+
+    def test_watcher(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _job(directory)
+            manager = JobManager(directory)
+            manager.features("top")
+            changes = []
+            event = threading.Event()
+            def callback(changed):
+                changes.append(changed)
+                event.set()
+            with JobWatcher(manager, interval=0.01, callback=callback):
+                _write(directory, "steps/pcb/layers/top/features.Z", "")
+                assert_true(event.wait(10.))
+            assert_equal([[("features", "top")]], changes)
+            assert_false(manager.features("top"))
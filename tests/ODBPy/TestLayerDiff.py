@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_is_none, raises
+from io import StringIO
+import os
+import tempfile
+import zipfile
+import numpy as np
+from ODBPy.LayerDiff import *
+from ODBPy.LineRecordParser import *
+
+testReference = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r200
+
+#
+#Feature attribute names
+#
+@0 .smd
+@1 .bga
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0;0
+P 1.0 0.0 0 P 0 8 0;0
+P 5.0 5.0 0 P 0 8 0
+L 0.0 0.0 1.0 0.0 1 P 0
+A 3.0 0.0 2.0 1.0 2.0 0.0 1 P 0 N
+S P 0
+OB 10.0 10.0 I
+OS 11.0 10.0
+OS 11.0 11.0
+OS 10.0 10.0
+OE
+SE
+"""
+
+# Reordered tables and features, reversed line and arc, a moved pad,
+# a removed pad and an added line far away
+testRevision = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r200
+$1 r1000
+
+#
+#Feature attribute names
+#
+@0 .bga
+@1 .smd
+
+#
+#Layer features
+#
+S P 0
+OB 11.0 11.0 I
+OS 10.0 10.0
+OS 11.0 10.0
+OS 11.0 11.0
+OE
+SE
+A 2.0 1.0 3.0 0.0 2.0 0.0 0 P 0 Y
+L 1.0 0.0 0.0 0.0 0 P 0
+P 1.0 0.0 1 P 0 8 0;1
+P 5.5 5.0 1 P 0 8 0
+L 50.0 50.0 51.0 50.0 0 P 0
+"""
+
+def _records(text):
+    return read_linerecords(StringIO(text))
+
+def _write_layer(directory, layer, text):
+    layer_directory = os.path.join(directory, "steps", "pcb", "layers", layer)
+    os.makedirs(layer_directory)
+    with zipfile.ZipFile(os.path.join(layer_directory, "features.Z"), "w") as thezip:
+        thezip.writestr("features", text)
+
+class TestLayerDiff(object):
+    def test_feature_keys(self):
+        reference = feature_keys(_records(testReference))
+        revision = feature_keys(_records(testRevision))
+        assert_equal(6, len(reference))
+        assert_equal([FEATURE_PAD] * 3 + [FEATURE_LINE, FEATURE_ARC, FEATURE_SURFACE],
+                     reference.kind.tolist())
+        # Identical features get identical keys regardless of their order and tables
+        common = np.intersect1d(reference.key, revision.key)
+        assert_equal(4, len(common))
+        # The attribute distinguishes otherwise equal pads
+        assert_true(reference.shape[0] == reference.shape[1])
+        assert_true(reference.shape[0] != reference.shape[2])
+
+    def test_diff(self):
+        diff = diff_layer_features(_records(testReference), _records(testRevision),
+                                   cluster_distance=2.)
+        assert_equal([0], diff.removed.order.tolist())
+        assert_equal([FEATURE_LINE], diff.added.kind.tolist())
+        assert_equal(1, len(diff.moved))
+        assert_equal([2, 10], [diff.moved.reference_order[0], diff.moved.revised_order[0]])
+        assert_true(np.allclose([0.5, 0.], [diff.moved.dx[0], diff.moved.dy[0]]))
+        assert_equal({FEATURE_PAD: (1, 0, 1), FEATURE_LINE: (0, 1, 0),
+                      FEATURE_ARC: (0, 0, 0), FEATURE_SURFACE: (0, 0, 0)}, diff.counts())
+        # The three changes are more than 2 mm apart
+        assert_equal(3, len(diff))
+        assert_equal(3, len(diff.clusters))
+        assert_equal([1, 1, 1], diff.clusters.count.tolist())
+        # Moves beyond max_move are a removal and an addition
+        diff = diff_layer_features(_records(testReference), _records(testRevision),
+                                   max_move=0.1)
+        assert_equal(0, len(diff.moved))
+        assert_equal(2, len(diff.removed))
+
+    def test_nearest_move(self):
+        pads = """
+U MM
+#
+#Feature symbol names
+#
+$0 r1000
+#
+#Layer features
+#
+"""
+        reference = _records(pads + "P 0.0 0.0 0 P 0 8 0\nP 1.0 0.0 0 P 0 8 0\n")
+        revision = _records(pads + "P 1.1 0.0 0 P 0 8 0\n")
+        # The pad at (1, 0) moved, the one at (0, 0) was removed
+        diff = diff_layer_features(reference, revision)
+        assert_equal([1], diff.moved.reference_order.tolist())
+        assert_true(np.allclose([0.1], diff.moved.dx))
+        assert_equal([0], diff.removed.order.tolist())
+
+    @raises(ValueError)
+    def test_units(self):
+        diff_layer_features(_records(testReference), _records(testRevision.replace("U MM", "U INCH")))
+
+    def test_read_layer_diffs(self):
+        with tempfile.TemporaryDirectory() as reference, tempfile.TemporaryDirectory() as revision:
+            _write_layer(reference, "top", testReference)
+            _write_layer(revision, "top", testRevision)
+            for directory in (reference, revision):
+                _write_layer(directory, "bottom", testReference)
+            diffs = read_layer_diffs(reference, revision, ["top", "bottom"], workers=1)
+        assert_is_none(diffs["bottom"])
+        assert_equal(3, len(diffs["top"]))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+from ODBPy.LayerSummary import *
+from ODBPy.LineRecordParser import *
+from ODBPy.Structures import *
+
+testFeatures = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r40
+$1 s20
+
+#
+#Layer features
+#
+P -30.9595 3.8107 0 P 0 8 0;0=0,2=0
+P 1.0 2.0 -1 1 0.02 N 4 8 30.0
+L 4.8298 -44.2445 4.8298 -45.2654 0 P 0
+S P 0
+OB -38.104 -0.6351 I
+OS -38.104 19.3649
+OC -18.104 19.3649 -28.104 19.3649 Y
+OE
+SE
+"""
+
+class TestLayerSummary(object):
+    def test_summarize_features(self):
+        summary = summarize_features(read_linerecords(StringIO(testFeatures)))
+        assert_equal({"P": 2, "L": 1, "S": 1, "OB": 1, "OS": 1, "OC": 1, "OE": 1, "SE": 1},
+            summary.record_counts)
+        assert_equal((-38.104, -45.2654, 4.8298, 19.3649), summary.extents)
+        assert_equal({"r40": 2, "s20": 1}, summary.symbols)
+        assert_equal({Polarity.Positive: 3, Polarity.Negative: 1}, summary.polarities)
+
+    def test_summarize_empty(self):
+        summary = summarize_features({"Units": ["U MM"]})
+        assert_is_none(summary.extents)
+        assert_equal({}, summary.record_counts)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.Layers import *
+from ODBPy.StructuredTextParser import *
+
+def _layer(row, context, type_, name, start="", end=""):
+    return """
+LAYER {{
+    ROW={}
+    CONTEXT={}
+    TYPE={}
+    NAME={}
+    POLARITY=POSITIVE
+    START_NAME={}
+    END_NAME={}
+}}""".format(row, context, type_, name, start, end)
+
+testMatrix = "".join([
+    _layer(1, "BOARD", "COMPONENT", "comp_+_top"),
+    _layer(2, "BOARD", "SIGNAL", "top"),
+    _layer(3, "BOARD", "POWER_GROUND", "gnd"),
+    _layer(4, "BOARD", "SIGNAL", "inner"),
+    _layer(5, "BOARD", "SIGNAL", "bottom"),
+    _layer(7, "BOARD", "DRILL", "through_drill", "TOP", "BOTTOM"),
+    _layer(6, "BOARD", "DRILL", "blind", "top", "gnd"),
+    _layer(8, "BOARD", "DRILL", "nc_drill"),
+])
+
+def _stackup():
+    return parse_layers(parse_structured_text(StringIO(testMatrix))).stackup()
+
+class TestStackupIndex(object):
+    def test_positions(self):
+        stackup = _stackup()
+        assert_equal(["comp_+_top", "top", "gnd", "inner", "bottom", "blind",
+                      "through_drill", "nc_drill"], [l.name for l in stackup.layers])
+        assert_equal(5, stackup.position_of("blind"))
+        assert_equal(5, stackup.position_of_row(6))
+        assert_is_none(stackup.position_of_row(9))
+        assert_equal(LayerType.PowerGround, stackup.layer("GND").type)
+        assert_is_none(stackup.layer("nonexistent"))
+        assert_equal(["top", "gnd", "inner", "bottom"],
+                     [l.name for l in stackup.copper_layers])
+        assert_equal(1, stackup.copper_position("gnd"))
+
+    def test_spans(self):
+        stackup = _stackup()
+        assert_equal(["top", "gnd", "inner", "bottom"], stackup.span("through_drill"))
+        assert_equal(["top", "gnd"], stackup.span("blind"))
+        assert_equal([0, 1], stackup.span_positions(stackup.layer("blind")))
+        # No start and end layer: spans the entire stackup
+        assert_equal(["top", "gnd", "inner", "bottom"], stackup.span("nc_drill"))
+
+    def test_drills_on(self):
+        stackup = _stackup()
+        assert_equal(["blind", "through_drill", "nc_drill"], stackup.drills_on("gnd"))
+        assert_equal(["through_drill", "nc_drill"], stackup.drills_on(2))
+        assert_equal(["through_drill", "nc_drill"], stackup.drills_on(np.int64(2)))
+
+    @raises(ValueError)
+    def test_unknown_span(self):
+        parse_layers(parse_structured_text(StringIO(
+            testMatrix + _layer(9, "BOARD", "DRILL", "typo", "top", "gnt")))).stackup()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true
+from io import StringIO
+import numpy as np
+from ODBPy.ColumnarNetlist import parse_columnar_netlist
+from ODBPy.Connectivity import layer_connectivity, connect_layers
+from ODBPy.DrillHits import DrillHits
+from ODBPy.DrillTools import DrillTool, DrillToolType
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+from ODBPy.NetStatistics import *
+from ODBPy.Structures import HolePlating, Polarity
+
+# Two traces (straight and a half circle) between pads, a square pad
+# with a square line, a negative line and a surface
+testLayer = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r200
+$2 s1000
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+L 0.0 0.0 3.0 4.0 1 P 0
+P 3.0 4.0 0 P 0 8 0
+P 10.0 0.0 2 P 0 8 0
+L 10.0 0.0 10.0 2.0 2 P 0
+A 10.0 2.0 10.0 6.0 10.0 4.0 1 P 0 Y
+L 10.0 0.0 20.0 0.0 1 N 0
+S P 0
+OB 20.0 0.0 I
+OS 22.0 0.0
+OS 22.0 1.0
+OS 20.0 1.0
+OS 20.0 0.0
+OE
+SE
+"""
+
+testNetlist = {
+    None: ["H optimize n"],
+    None: ["UNITS=MM"],
+    "Nets names": ["$0 VCC", "$1 GND"],
+    "Netlist points": [
+        "0 0.02 0.0 0.0 T e e staggered 0 0 0",
+        "0 0.02 3.0 4.0 T e e staggered 0 0 0",
+        # Off the center of the square pad, which the negative line clears
+        "1 0.02 10.0 0.3 T e e staggered 0 0 0",
+    ]
+}
+
+def _features():
+    return parse_feature_arrays(read_linerecords(StringIO(testLayer)))
+
+class TestNetStatistics(object):
+    def test_feature_measures(self):
+        measures = feature_measures(_features())
+        # The negative line and the surface lines are no measured features
+        assert_equal([0, 1, 2, 3, 4, 5, 7], measures.order.tolist())
+        assert_true(np.allclose([0., 5., 0., 0., 2., 2 * np.pi, 0.], measures.length))
+        round_pad = np.pi * 0.25
+        expected = [round_pad, 0.2 * 5. + np.pi * 0.01, round_pad, 1.,
+                    1. + 2., 0.2 * 2 * np.pi + np.pi * 0.01, 2.]
+        assert_true(np.allclose(expected, measures.area))
+
+    def test_negative_layer(self):
+        # On a negative layer, only the negative line adds copper
+        measures = feature_measures(_features(), Polarity.Negative)
+        assert_equal([6], measures.order.tolist())
+        assert_true(np.allclose([10.], measures.length))
+        assert_true(np.allclose([0.2 * 10. + np.pi * 0.01], measures.area))
+
+    def test_resized_pads(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(
+            testLayer.replace("P 0.0 0.0 0 P 0 8 0", "P 0.0 0.0 -1 0 2.0 P 0 8 0"))))
+        assert_true(np.isclose(np.pi, feature_measures(features).area[0]))
+
+    def test_net_statistics(self):
+        features = _features()
+        connectivity = layer_connectivity(features)
+        nets = connect_layers([connectivity], [])
+        netlist = parse_columnar_netlist(testNetlist)
+        names = nets.net_names(netlist)
+        assert_equal(3, len(names))
+        assert_equal(["VCC", "GND", "COPPER_2"], names)
+        stats = net_statistics(["top"], [feature_measures(features)],
+                               [nets.feature_nets(0)], names, via_nets=[1, 1, 0, -1])
+        assert_equal(["VCC", "GND", "COPPER_2"], stats.names)
+        assert_true(np.allclose([5., 2. + 2 * np.pi, 0.], stats.total_length()))
+        assert_equal([1, 2, 0], stats.vias.tolist())
+        table = stats.table()
+        assert_true(np.isclose(2., table["COPPER_2"].area["top"]))
+        assert_equal(2, table["GND"].vias)
+
+    def test_merged_names(self):
+        measures = feature_measures(_features())
+        nets = np.array([0, 0, 0, 1, 1, 1, -1, 2])
+        stats = net_statistics(["top"], [measures], [nets], ["A", "B", "A"])
+        assert_equal(["A", "B"], stats.names)
+        assert_true(np.allclose([5., 2. + 2 * np.pi], stats.length[:, 0]))
+
+    def test_via_hits(self):
+        tools = [DrillTool(1, HolePlating.Via, DrillToolType.Standard, 10., {}),
+                 DrillTool(2, HolePlating.Plated, DrillToolType.Standard, 40., {})]
+        hits = DrillHits("through_drill", np.zeros(3), np.zeros(3), np.full(3, 10.),
+                         np.array([0, 1, 0]), tools)
+        assert_equal([0, 2], via_hits(hits).tolist())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from ODBPy.NetlistDiff import *
+from ODBPy.ColumnarNetlist import parse_columnar_netlist
+
+def _netlist(nets, unit="INCH"):
+    "Build a ColumnarNetlist from a {name: [(x, y), ...]} dict"
+    names, points = [], []
+    for netid, (name, locations) in enumerate(sorted(nets.items())):
+        names.append("${} {}".format(netid, name))
+        points += ["{} 0.01 {} {} T e e".format(netid, x, y) for x, y in locations]
+    return parse_columnar_netlist({None: ["UNITS=" + unit], "Nets names": names,
+                                   "Netlist points": points})
+
+class TestNetlistDiff(object):
+    def test_identical(self):
+        netlist = _netlist({"GND": [(0, 0), (1, 1)], "VCC": [(2, 2), (3, 3)]})
+        assert_equal(NetlistDiff([], [], [], [], [], []), diff_netlists(netlist, netlist))
+
+    def test_renamed(self):
+        diff = diff_netlists(_netlist({"A": [(0, 0), (1, 1)], "B": [(2, 2), (3, 3)]}),
+                             _netlist({"A": [(0, 0), (1, 1)], "C": [(2, 2), (3, 3)]}))
+        assert_equal([("B", "C")], diff.renamed)
+        assert_equal([], diff.opens)
+
+    def test_open_and_short(self):
+        reference = _netlist({"A": [(0, 0), (1, 1), (2, 2)], "B": [(5, 5)], "C": [(6, 6)]})
+        revised = _netlist({"A": [(0, 0), (1, 1)], "A2": [(2, 2)], "BC": [(5, 5), (6, 6)]})
+        diff = diff_netlists(reference, revised)
+        assert_equal([("A", ["A", "A2"])], diff.opens)
+        assert_equal([("BC", ["B", "C"])], diff.shorts)
+
+    def test_moved(self):
+        diff = diff_netlists(_netlist({"A": [(0, 0), (1, 1)], "B": [(7, 7)]}),
+                             _netlist({"A": [(0, 0), (1, 1.5)], "C": [(8, 8)]}))
+        assert_equal(1, len(diff.moved))
+        assert_equal("A", diff.moved[0].reference_net)
+        assert_equal([[1, 1]], diff.moved[0].removed.tolist())
+        assert_equal([[1, 1.5]], diff.moved[0].added.tolist())
+        assert_equal(["B"], diff.removed_nets)
+        assert_equal(["C"], diff.added_nets)
+
+    def test_tolerance(self):
+        diff = diff_netlists(_netlist({"A": [(0, 0), (1, 1)]}),
+                             _netlist({"A": [(0, 0), (1.00001, 1)]}), tolerance=1e-3)
+        assert_equal([], diff.moved)
+
+    def test_cell_boundary(self):
+        # 0.04 and 0.06 snap to different grid points but are closer than tolerance
+        diff = diff_netlists(_netlist({"A": [(0, 0), (1, 0.04)], "B": [(5, 5)]}),
+                             _netlist({"A": [(0, 0), (1, 0.06)], "B": [(5, 5)]}), tolerance=0.1)
+        assert_equal(NetlistDiff([], [], [], [], [], []), diff)
+        # Far enough apart in the neighbouring cell
+        diff = diff_netlists(_netlist({"A": [(0, 0), (1, 0.04)]}),
+                             _netlist({"A": [(0, 0), (1, 0.16)]}), tolerance=0.1)
+        assert_equal(1, len(diff.moved))
+
+    def test_units(self):
+        # The revised netlist is converted to the unit of the reference
+        diff = diff_netlists(_netlist({"A": [(0, 0), (25.4, 50.8)]}, "MM"),
+                             _netlist({"A": [(0, 0), (1, 2)]}, "INCH"))
+        assert_equal(NetlistDiff([], [], [], [], [], []), diff)
+        diff = diff_netlists(_netlist({"A": [(0, 0), (1, 2)]}, "MM"),
+                             _netlist({"A": [(0, 0), (1, 2)]}, "INCH"))
+        assert_equal([[25.4, 50.8]], diff.moved[0].added.tolist())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from ODBPy.NetlistParser import *
+from ODBPy.NetlistParser import TestpointTestSide as PointTestSide
+from ODBPy.Structures import *
+from ODBPy.Decoder import *
+
+class TestNetlistPointParser(object):
+    def test_parse_realdata(self):
+        """Test netlist point parsing with DipTrace-generated data"""
+        expected = NetlistPoint(10, 0.0236, Point(0.45, -1.2916), NetSide.Both, None,
+            NetPointLocation.EndPoint, NetPointExposure.SolderMaskExposed,
+            StaggeringParameters(Point(0., 0.), 0.),
+            NetlistPointTypeInformation(False, False, False, False, None, PointTestSide.Undefined))
+        assert_equal(expected, parse_netlist_point("10 0.0236 0.45 -1.2916 B e e staggered 0 0 0"))
+        actual = parse_netlist_point("9 0.0069 0.287 -1.312 B e e staggered 0 0 0 v")
+        assert_true(actual.point_type.is_via)
+        actual = parse_netlist_point("9 0 0.24 -1.18 T 0.0354 0.0276 e e staggered 0 0 0")
+        assert_equal(Point(0.0354, 0.0276), actual.size)
+        assert_equal(NetSide.Top, actual.side)
+
+    def test_parse_all_fields(self):
+        actual = parse_netlist_point("$NONE$ 0.1 1 2 D m c v f t m eXtended foo b")
+        assert_equal("$NONE$", actual.netid)
+        assert_is_none(actual.staggered)
+        assert_equal(NetPointLocation.MidPoint, actual.point_location)
+        assert_equal(NetPointExposure.SolderMaskCovered, actual.exposure)
+        assert_equal(NetlistPointTypeInformation(True, True, True, True, "foo", PointTestSide.BothSides),
+            actual.point_type)
+
+    def test_parse_invalid(self):
+        assert_is_none(parse_netlist_point("H optimize n"))
+        assert_is_none(parse_netlist_point("x 0.1 1 2 T e e"))
+        assert_is_none(parse_netlist_point("1 a 1 2 T e e"))
+        assert_is_none(parse_netlist_point("1 0.1 1 2 X e e"))
+        assert_is_none(parse_netlist_point("1 0.1 1 2 T e x"))
+        assert_is_none(parse_netlist_point("1 0.1 1 2 T 3 e"))
+        # Only plain decimal numbers, like the regex based parser
+        assert_is_none(parse_netlist_point("1 nan 1 2 T e e"))
+        assert_is_none(parse_netlist_point("1 0.1 inf 2 T e e"))
+        assert_is_none(parse_netlist_point("1 0.1 1 1e3 T e e"))
+        assert_is_none(parse_netlist_point("1 0.1 1 2 T 1e3 1 e e"))
+        assert_is_none(parse_netlist_point("1 0.1 1 2 T e e staggered 0 -inf 0"))
+        assert_is_none(split_netlist_point("1 0.1 1 2e T e e"))
+        assert_is_none(parse_netlist_point("1 0.1 1 - T e e"))
+
+    def test_decoder_options(self):
+        assert_equal(parse_netlist_point("10 0.0236 0.45 -1.2916 B e e staggered 0 0 0"),
+            run_decoder_on_line("10 0.0236 0.45 -1.2916 B e e staggered 0 0 0", netlist_decoder_options))
+        assert_is_none(run_decoder_on_line("H optimize n", netlist_decoder_options))
+
+    def test_assign_net_name(self):
+        point = parse_netlist_point("0 0.1 1 2 T e e")
+        assert_equal("GND", assign_net_name({0: "GND"}, point).netid)
+        assert_equal(0, assign_net_name({1: "VCC"}, point).netid)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true
+from io import StringIO
+import numpy as np
+from ODBPy.ColumnarNetlist import parse_columnar_netlist
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+from ODBPy.NetlistParser import NetSide
+from ODBPy.PadNets import *
+
+testNetlist = {
+    None: ["H optimize n"],
+    "Nets names": ["$0 GND", "$1 VCC"],
+    "Netlist points": [
+        "0 0.02 1.0 1.0 T e e staggered 0 0 0",
+        "1 0.02 2.0 1.0 T e e staggered 0 0 0",
+        "1 0.02 3.0 1.0 B e e staggered 0 0 0 v",
+        "0 0.02 4.0 1.0 T e e staggered 0 0 0",
+        "0 0.02 1.0 1.0 D e e staggered 0 0 0",
+    ]
+}
+
+testLayer = """
+#
+#Feature symbol names
+#
+$0 r20
+
+#
+#Layer features
+#
+P 1.0 1.0 0 P 0 8 0
+P 2.0001 1.0 0 P 0 8 0
+P 3.0 1.0 0 P 0 8 0
+P 5.0 1.0 0 P 0 8 0
+"""
+
+class TestPadNets(object):
+    def test_assign_pad_nets(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        features = parse_feature_arrays(read_linerecords(StringIO(testLayer)))
+        pad_nets = assign_pad_nets(features, netlist, NetSide.Top)
+        assert_equal(4, len(pad_nets))
+        # The through via (side B) matches on the top layer as well
+        assert_equal([0, 1, 2, -1], pad_nets.point.tolist())
+        assert_equal(["GND", "VCC", "VCC", None], pad_nets.net_names(netlist))
+        assert_equal([3], pad_nets.unmatched_pads().tolist())
+        # The top point at (4, 1) has no pad, the bottom point is not considered
+        assert_equal([3], pad_nets.unmatched_points.tolist())
+        assert_true(np.isclose(0.0001, pad_nets.distance[1]))
+        assert_equal([1, 2], pad_nets.pads_of(netlist.net_by_name("VCC")).tolist())
+
+    def test_units(self):
+        # The same netlist in mm is converted to the inch coordinates of the pads
+        points = []
+        for line in testNetlist["Netlist points"]:
+            net, radius, x, y, rest = line.split(" ", 4)
+            points.append(" ".join((net, radius, str(float(x) * 25.4), str(float(y) * 25.4), rest)))
+        netlist = parse_columnar_netlist({None: ["H optimize n", "UNITS=MM"],
+                                          "Nets names": testNetlist["Nets names"],
+                                          "Netlist points": points})
+        assert_equal("MM", netlist.unit)
+        features = parse_feature_arrays(read_linerecords(StringIO(testLayer)))
+        pad_nets = assign_pad_nets(features, netlist, NetSide.Top)
+        assert_equal([0, 1, 2, -1], pad_nets.point.tolist())
+        assert_true(np.isclose(0.0001, pad_nets.distance[1]))
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
 from io import StringIO
+import numpy as np
 from ODBPy.Profile import *
 from ODBPy.LineRecordParser import *
 from ODBPy.Structures import *
@@ -42,3 +43,45 @@ class TestProfile(object):
         actual = parse_profile(read_linerecords(StringIO(testProfile)))
         print(actual)
         assert_equal(expected, actual)
+
+# A 10 x 10 board with rounded lower right corner (radius 2)
+# and a round hole of radius 1 at (5, 5), given as a full circle
+testRoundedProfile = """
+#
+#Units
+#
+U MM
+
+#
+#Layer features
+#
+S P 0
+OB 0.0 0.0 I
+OS 0.0 10.0
+OS 10.0 10.0
+OS 10.0 2.0
+OC 8.0 0.0 8.0 2.0 Y
+OS 0.0 0.0
+OE
+OB 6.0 5.0 H
+OC 6.0 5.0 5.0 5.0 N
+OE
+SE
+"""
+
+class TestProfileGeometry(object):
+    def test_measures(self):
+        geometry = parse_profile(read_linerecords(StringIO(testRoundedProfile))).geometry()
+        corner = 4 - np.pi
+        assert_true(np.isclose(100 - corner - np.pi, geometry.area()))
+        assert_true(np.isclose(40 - 4 + np.pi + 2 * np.pi, geometry.perimeter()))
+        assert_true(np.allclose((0., 0., 10., 10.), geometry.bbox()))
+
+    def test_contains(self):
+        profile = parse_profile(read_linerecords(StringIO(testRoundedProfile)))
+        geometry = profile.geometry()
+        assert_true(geometry is profile.geometry())
+        x = np.array([1., 5., 9.8, 9., 5., 5.9, -1., 11.])
+        y = np.array([1., 5., 0.2, 1., 6.5, 5., 5., 5.])
+        expected = [True, False, False, True, True, False, False, False]
+        assert_equal(expected, list(geometry.contains(x, y)))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, assert_is
+from io import StringIO
+import os
+import tempfile
+import zipfile
+import numpy as np
+from ODBPy.Composite import TileGrid
+from ODBPy.LineRecordParser import *
+from ODBPy.Profile import parse_profile
+from ODBPy.Raster import *
+
+testProfile = """
+#
+#Units
+#
+U MM
+
+#
+#Layer features
+#
+S P 0
+OB 0.0 0.0 I
+OS 0.0 2.0
+OS 4.0 2.0
+OS 4.0 0.0
+OS 0.0 0.0
+OE
+SE
+"""
+
+# A line along the board with a negative pad interrupting it
+testLayer = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r500
+$1 r1000
+
+#
+#Layer features
+#
+L 0.5 1.0 3.5 1.0 0 P 0
+P 2.0 1.0 1 N 0 8 0
+"""
+
+testMatrix = """
+LAYER {
+    ROW=1
+    CONTEXT=BOARD
+    TYPE=SIGNAL
+    NAME=TOP
+    POLARITY=POSITIVE
+    START_NAME=
+    END_NAME=
+}
+"""
+
+def _write_job(directory):
+    "Write a job with the test profile and a single layer 'top'"
+    layer = os.path.join(directory, "steps", "pcb", "layers", "top")
+    os.makedirs(layer)
+    os.makedirs(os.path.join(directory, "matrix"))
+    with open(os.path.join(directory, "matrix", "matrix"), "w") as outfile:
+        outfile.write(testMatrix)
+    with open(os.path.join(directory, "steps", "pcb", "profile"), "w") as outfile:
+        outfile.write(testProfile)
+    with zipfile.ZipFile(os.path.join(layer, "features.Z"), "w") as thezip:
+        thezip.writestr("features", testLayer)
+
+class TestRaster(object):
+    def test_profile_extents(self):
+        profile = parse_profile(read_linerecords(StringIO(testProfile)))
+        assert_equal((0., 0., 4., 2.), profile_extents(profile))
+        assert_true(np.allclose((0., 0., 4000., 2000.), profile_extents(profile, "UM")))
+
+    def test_rasterize_profile(self):
+        profile = parse_profile(read_linerecords(StringIO(testProfile)))
+        grid = TileGrid.covering(*profile_extents(profile), resolution=0.05, tile_pixels=16)
+        filled = rasterize_profile(profile, grid)
+        assert_true(np.isclose(8., filled.area()))
+        outline = rasterize_profile(profile, grid, width=0.1).mosaic()
+        assert_true(outline[0, 10])
+        assert_false(outline[20, 40])
+
+    def test_layer_rasterizer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write_job(directory)
+            rasterizer = LayerRasterizer(directory, tile_pixels=16, workers=1)
+            bitmap = rasterizer.render("top", 0.05)
+            assert_equal(rasterizer.render_profile(0.05).shape, bitmap.shape)
+            # Row 20 is y = 1.0: line copper left and right of the negative pad
+            assert_true(bitmap[20, 15])
+            assert_false(bitmap[20, 40])
+            assert_true(bitmap[20, 60])
+            assert_false(bitmap[5, 15])
+            # Renderings are cached until cleared
+            layer = rasterizer.layer("top", 0.05)
+            assert_is(layer, rasterizer.layer("top", 0.05))
+            rasterizer.clear("top")
+            assert_false(layer is rasterizer.layer("top", 0.05))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true
+from io import StringIO
+import os
+import tempfile
+import zipfile
+import numpy as np
+from ODBPy.ComponentParser import Component, ToeprintRecord
+from ODBPy.ComponentStore import ComponentCollection
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.Layers import Layer, LayerSet, LayerType
+from ODBPy.LineRecordParser import *
+from ODBPy.NetlistParser import NetSide
+from ODBPy.SolderPaste import *
+from ODBPy.Structures import Point, Mirror, Polarity
+
+# Two 1 x 0.5 mm apertures, a surface aperture with a small one next to it
+# and a stray aperture without a toeprint
+testTopPaste = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000x500
+$1 r200
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+P 2.0 0.0 0 P 0 8 0
+S P 0
+OB 4.7 -0.5 I
+OS 5.3 -0.5
+OS 5.3 0.5
+OS 4.7 0.5
+OS 4.7 -0.5
+OE
+SE
+P 5.0 0.6 1 P 0 8 0
+P 9.0 9.0 1 P 0 8 0
+"""
+
+testBottomPaste = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+"""
+
+def _component(name, x, pins):
+    toeprints = [ToeprintRecord(i, Point(px, py), 0., Mirror.No, 0, 0, str(i))
+                 for i, (px, py) in enumerate(pins)]
+    return Component(name, "part", Point(x, 0.), 0., Mirror.No, {}, {}, toeprints)
+
+def _collection(unit="MM", scale=1.):
+    return ComponentCollection(
+        [_component("R1", scale, [(0., 0.), (2. * scale, 0.)]),
+         _component("U1", 5. * scale, [(5. * scale, 0.)])],
+        [_component("C1", 0., [(0., 0.)])], unit=unit)
+
+def _apertures(text):
+    return paste_apertures(parse_feature_arrays(read_linerecords(StringIO(text))))
+
+def _write_layer(directory, layer, text):
+    layer_directory = os.path.join(directory, "steps", "pcb", "layers", layer)
+    os.makedirs(layer_directory)
+    with zipfile.ZipFile(os.path.join(layer_directory, "features.Z"), "w") as thezip:
+        thezip.writestr("features", text)
+
+class TestSolderPaste(object):
+    def test_paste_apertures(self):
+        apertures = _apertures(testTopPaste)
+        assert_equal([0, 1, 2, 10, 11], apertures.order.tolist())
+        assert_true(np.allclose([0.5, 0.5, 0.6, 0.01 * np.pi, 0.01 * np.pi], apertures.area))
+        assert_true(np.allclose([5., 0.], [apertures.x[2], apertures.y[2]]))
+        assert_true(np.allclose(np.hypot(0.3, 0.5), apertures.reach[2]))
+
+    def test_paste_volumes(self):
+        collection = _collection()
+        apertures = {NetSide.Top: [_apertures(testTopPaste)],
+                     NetSide.Bottom: [_apertures(testBottomPaste)]}
+        # The windowpane pad at (5, 0.6) is matched to U1 within its reach + tolerance
+        assert_equal([0, 1, 2, 2, -1], join_paste_apertures(
+            apertures[NetSide.Top][0], collection, NetSide.Top, 0.6).tolist())
+        # but not by the reach of the large surface
+        assert_equal([0, 1, 2, -1, -1], join_paste_apertures(
+            apertures[NetSide.Top][0], collection, NetSide.Top, 0.45).tolist())
+        volumes = paste_volumes(collection, apertures, 0.1, tolerance=0.6)
+        assert_true(np.allclose([0.5, 0.5, 0.6 + 0.01 * np.pi, 0.25 * np.pi],
+                                volumes.toeprint_area))
+        assert_true(np.allclose([1., 0.6 + 0.01 * np.pi, 0.25 * np.pi], volumes.component_area))
+        assert_true(np.allclose([0.1, 0.06 + 0.001 * np.pi, 0.025 * np.pi],
+                                volumes.component_volume()))
+        assert_true(np.isclose(0.01 * np.pi, volumes.unmatched_area))
+        assert_equal([0, 0, 0, 0], volumes.toeprint_unresolved.tolist())
+        # Components in inch: the apertures are converted, areas are in square inch
+        inch = paste_volumes(_collection("INCH", 1 / 25.4), apertures, 0.1, tolerance=0.6 / 25.4)
+        assert_true(np.allclose(volumes.component_area / 25.4 ** 2, inch.component_area))
+
+    def test_symbol_outlines(self):
+        # A donut, a user symbol and two layers on the same side
+        donut = _apertures(testBottomPaste.replace("r1000", "donut_r1000x500"))
+        assert_true(np.isclose(0.25 * np.pi * (1. - 0.25), donut.area[0], rtol=1e-2))
+        assert_true(np.isclose(0.5, donut.reach[0]))
+        user = _apertures(testBottomPaste.replace("r1000", "my_pad"))
+        assert_true(np.isnan(user.area[0]))
+        volumes = paste_volumes(_collection(), {NetSide.Bottom: [donut, user]}, 0.1)
+        assert_true(np.isclose(donut.area[0], volumes.toeprint_area[3]))
+        assert_equal([0, 0, 0, 1], volumes.toeprint_unresolved.tolist())
+
+    def test_read_paste_volumes(self):
+        # Two paste layers on the top side
+        layers = LayerSet([
+            Layer("sp_top2", LayerType.SolderPaste, Polarity.Positive, 0, None, None),
+            Layer("sp_top", LayerType.SolderPaste, Polarity.Positive, 1, None, None),
+            Layer("top", LayerType.Signal, Polarity.Positive, 2, None, None),
+            Layer("bottom", LayerType.Signal, Polarity.Positive, 3, None, None),
+            Layer("sp_bot", LayerType.SolderPaste, Polarity.Positive, 4, None, None)])
+        assert_equal({NetSide.Top: ["sp_top2", "sp_top"], NetSide.Bottom: ["sp_bot"]},
+                     {side: [layer.name for layer in side_layers]
+                      for side, side_layers in paste_layers(layers).items()})
+        with tempfile.TemporaryDirectory() as directory:
+            _write_layer(directory, "sp_top", testTopPaste)
+            _write_layer(directory, "sp_top2", testBottomPaste)
+            _write_layer(directory, "sp_bot", testBottomPaste)
+            _, volumes = read_paste_volumes(directory, layers, 0.1, _collection(), workers=1)
+        assert_true(np.allclose([1. + 0.25 * np.pi, 0.6, 0.25 * np.pi], volumes.component_area))
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+import numpy as np
+from ODBPy.SpatialIndex import *
+
+class TestSpatialIndex(object):
+    def test_expand_ranges(self):
+        owner, values = expand_ranges([0, 5, 3], [2, 8, 3])
+        assert_equal([0, 0, 1, 1, 1], owner.tolist())
+        assert_equal([0, 1, 5, 6, 7], values.tolist())
+
+    def test_query_pairs(self):
+        index = GridIndex([0, 10, 20], [0, 0, 0], [5, 15, 40], [5, 5, 5], cell_size=2.)
+        query, items = index.query_pairs([4, 30, 100], [1, 1, 1], [12, 31, 101], [2, 2, 2])
+        assert_equal([(0, 0), (0, 1), (1, 2)], list(zip(query.tolist(), items.tolist())))
+        assert_equal([2], index.query_bbox(25, -10, 26, 10).tolist())
+
+    def test_nearest(self):
+        index = GridIndex.from_points([0, 1, 5], [0, 0, 0])
+        items, dist = index.nearest([0.8, 3, 10], [0, 0, 0], 1.5)
+        assert_equal([1, -1, -1], items.tolist())
+        assert_true(np.isclose(dist[0], 0.2))
+        # One radius per query point
+        items, _ = index.nearest([0.8, 3, 3.5], [0, 0, 0], [0.1, 1.5, 2.])
+        assert_equal([-1, -1, 2], items.tolist())
+
+    def test_empty(self):
+        query, items = GridIndex([], [], [], []).query_pairs([0], [0], [1], [1])
+        assert_equal(0, len(query))
@@ -188,6 +188,8 @@ class TestStandardSymbolParsing(object):
         assert_equal(Hole(50,HolePlating.Via,4,5),
             Hole.Parse("hole50xvx4x5"))
 
-
-
-
+    def testParseStandardSymbol(self):
+        assert_equal(Round(40.), parse_standard_symbol("r40"))
+        assert_equal(Rectangle(60., 30.), parse_standard_symbol("r60x30"))
+        assert_equal(RoundDonut(60, 30), parse_standard_symbol("donut_r60x30"))
+        assert_is_none(parse_standard_symbol("my_user_symbol"))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises
+from io import StringIO
+import os
+import tempfile
+import zipfile
+import numpy as np
+from ODBPy.StructuredTextParser import read_structured_text
+from ODBPy.Steps import *
+from ODBPy.Structures import Mirror, Point
+
+testPanelHeader = """
+UNITS=MM
+X_DATUM=0
+Y_DATUM=0
+X_ORIGIN=0
+Y_ORIGIN=0
+STEP-REPEAT {
+    NAME=PCB
+    X=10
+    Y=5
+    DX=20
+    DY=0
+    NX=2
+    NY=1
+    ANGLE=0
+    FLIP=NO
+    MIRROR=NO
+}
+STEP-REPEAT {
+    NAME=PCB
+    X=10
+    Y=30
+    DX=0
+    DY=0
+    NX=1
+    NY=1
+    ANGLE=90
+    FLIP=NO
+    MIRROR=YES
+}
+"""
+
+testBoardHeader = """
+UNITS=MM
+X_DATUM=1
+Y_DATUM=1
+"""
+
+testBoardLayer = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 r500
+
+#
+#Layer features
+#
+P 2.0 1.0 0 P 0 8 0
+L 1.0 1.0 1.0 3.0 1 P 0
+"""
+
+testPanelLayer = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r500
+
+#
+#Layer features
+#
+P 0.0 0.0 0 P 0 8 0
+"""
+
+def _write_job(directory, board_header=testBoardHeader, board_layer=testBoardLayer,
+               panel_header=testPanelHeader):
+    "Write a panel step with three instances of the pcb step"
+    for step, header, layer in (("pcb", board_header, board_layer),
+                                ("panel", panel_header, testPanelLayer)):
+        layer_directory = os.path.join(directory, "steps", step, "layers", "top")
+        os.makedirs(layer_directory)
+        with open(os.path.join(directory, "steps", step, "stephdr"), "w") as outfile:
+            outfile.write(header)
+        with zipfile.ZipFile(os.path.join(layer_directory, "features.Z"), "w") as thezip:
+            thezip.writestr("features", layer)
+
+class TestSteps(object):
+    def test_parse_step_header(self):
+        header = parse_step_header("panel", read_structured_text(StringIO(testPanelHeader)))
+        assert_equal(2, len(header.repeats))
+        assert_equal(StepRepeat("pcb", 10., 5., 20., 0., 2, 1, 0., False, False),
+                     header.repeats[0])
+        assert_true(header.repeats[1].mirror)
+        assert_equal(Point(0., 0.), header.datum)
+
+    def test_placements(self):
+        placements = Placements(np.array([0., 10.]), np.array([0., 0.]),
+                                np.array([0., 90.]), np.array([False, True]))
+        x, y = placements.apply([1.], [2.])
+        # Mirrored to (-1, 2), then rotated clockwise by 90 degrees
+        assert_true(np.allclose([[1.], [12.]], x))
+        assert_true(np.allclose([[2.], [1.]], y))
+        composed = placements.compose(placements)
+        assert_equal(4, len(composed))
+        # The second instance inside the second instance is not mirrored
+        x, y = composed.apply([1.], [2.])
+        assert_false(composed.mirror[3])
+        inner_x, inner_y = placements.apply([1.], [2.])
+        outer_x, outer_y = placements.apply(inner_x[1], inner_y[1])
+        assert_true(np.allclose([outer_x[1, 0], outer_y[1, 0]], [x[3, 0], y[3, 0]]))
+
+    def test_step_tree(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write_job(directory)
+            assert_equal(["panel", "pcb"], list_steps(directory))
+            tree = StepTree(directory)
+            instances = tree.instances("panel")
+            assert_equal(3, len(instances["pcb"]))
+            assert_equal(1, len(instances["panel"]))
+            # The board datum (1, 1) lands on the repeat positions
+            x, y = instances["pcb"].apply([1.], [1.])
+            assert_true(np.allclose([10., 30., 10.], x[:, 0]))
+            assert_true(np.allclose([5., 5., 30.], y[:, 0]))
+            flat = tree.flat_features("panel", "top")
+            assert_equal(4, len(flat.pads))
+            assert_equal(3, len(flat.lines))
+            assert_equal({0: "r1000", 1: "r500"}, flat.symbols)
+            # The panel fiducial is drawn after the board instances
+            assert_equal("r500", flat.symbols[flat.pads.symbol[3]])
+            assert_true(np.all(flat.pads.order[3] > flat.pads.order[:3]))
+            # Pad at (2, 1) = datum + (1, 0) in the mirrored, rotated instance
+            assert_true(np.allclose([10., 31.], [flat.pads.x[2], flat.pads.y[2]]))
+            assert_equal(Mirror.MirrorX.value, flat.pads.mirror[2])
+            assert_true(np.isclose(90., flat.pads.angle[2]))
+
+    def test_header_units(self):
+        # The same board datum (1 mm) given in inch
+        header = testBoardHeader.replace("UNITS=MM", "UNITS=INCH").replace("=1", "={}".format(1 / 25.4))
+        with tempfile.TemporaryDirectory() as directory:
+            _write_job(directory, board_header=header)
+            tree = StepTree(directory)
+            assert_equal("INCH", tree.header("pcb").unit())
+            flat = tree.flat_features("panel", "top")
+            assert_true(np.allclose([10., 31.], [flat.pads.x[2], flat.pads.y[2]]))
+
+    @raises(ValueError)
+    def test_mixed_feature_units(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write_job(directory, board_layer=testBoardLayer.replace("U MM", "U INCH"))
+            StepTree(directory).flat_features("panel", "top")
+
+    @raises(ValueError)
+    def test_flipped_instance(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write_job(directory, panel_header=testPanelHeader.replace("FLIP=NO", "FLIP=YES", 1))
+            tree = StepTree(directory)
+            assert_true(tree.header("panel").repeats[0].flip)
+            tree.flat_features("panel", "top")
+
+    def test_unknown_symbol(self):
+        with tempfile.TemporaryDirectory() as directory:
+            _write_job(directory, board_layer=testBoardLayer + "P 3.0 1.0 7 P 0 8 0\n")
+            flat = StepTree(directory).flat_features("panel", "top")
+            # Symbol 7 is not in the symbol table of the board
+            assert_equal(7, len(flat.pads))
+            assert_equal(3, (flat.pads.symbol == -1).sum())
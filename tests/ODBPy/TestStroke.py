@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+from io import StringIO
+import numpy as np
+from ODBPy.Stroke import *
+from ODBPy.FeatureArrays import parse_feature_arrays
+from ODBPy.LineRecordParser import *
+
+testLines = """
+#
+#Units
+#
+U MM
+
+#
+#Feature symbol names
+#
+$0 r1000
+$1 s1000
+$2 donut_r60x30
+
+#
+#Layer features
+#
+L 0.0 0.0 4.0 0.0 0 P 0
+L 0.0 0.0 2.0 3.0 1 N 0
+L 1.0 1.0 1.0 1.0 1 P 0
+L 0.0 0.0 1.0 1.0 2 P 0
+"""
+
+def _area(vertices):
+    "Shoelace area of (N, K, 2) polygons"
+    x, y = vertices[:, :, 0], vertices[:, :, 1]
+    return (x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1) / 2
+
+class TestStroke(object):
+    def test_stroke_outlines(self):
+        xs, ys = np.array([0., 0.]), np.array([0., 0.])
+        xe, ye = np.array([4., 2.]), np.array([0., 3.])
+        outlines = stroke_outlines(xs, ys, xe, ye, box_pen([0.5, 0.5], [0.5, 0.5]))
+        assert_equal((2, 6, 2), outlines.shape)
+        assert_true(np.allclose([5., 1. + 5.], _area(outlines)))
+        assert_true(np.allclose([-0.5, -0.5], outlines[0].min(axis=0)))
+        assert_true(np.allclose([2.5, 3.5], outlines[1].max(axis=0)))
+
+    def test_round_pen(self):
+        pen = round_pen([1.], segments=8)
+        # Circumscribed: every edge midpoint lies on the circle
+        midpoints = (pen[0] + np.roll(pen[0], -1, axis=0)) / 2
+        assert_true(np.allclose(1., np.hypot(midpoints[:, 0], midpoints[:, 1])))
+
+    def test_stroke_lines(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(testLines)))
+        stroked = stroke_lines(features, segments=32)
+        assert_equal([0, 1, 2], stroked.order.tolist())
+        assert_equal((3, 34, 2), stroked.vertices.shape)
+        # Capsule area: rectangle plus circle
+        assert_true(np.isclose(4. + np.pi * 0.25, _area(stroked.vertices)[0], rtol=0.01))
+        assert_true(np.allclose([6., 1.], _area(stroked.vertices)[1:]))
+
+    def test_line_primitives(self):
+        features = parse_feature_arrays(read_linerecords(StringIO(testLines)))
+        primitives = line_primitives(features, features.lines.polarity == 1)
+        assert_equal([0, 2, 2, 2, 2, 2, 2], primitives.owner.tolist())
+        assert_equal([0.5, 0., 0., 0., 0., 0., 0.], primitives.radius.tolist())
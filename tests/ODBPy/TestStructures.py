@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from nose.tools import assert_equal, assert_true, assert_almost_equal, assert_false, raises, assert_is_none
+import numpy as np
 from ODBPy.Structures import *
 
 class TestPoint(object):
@@ -19,3 +20,49 @@ class TestPoint(object):
     def test_div(self):
         assert_equal(Point(1, 2), Point(3, 8) / Point(3, 4))
         assert_equal(Point(1, 9), Point(-3, -27) / -3)
+
+class TestPointArray(object):
+    def test_conversion(self):
+        points = [Point(1., 2.), Point(3., 4.)]
+        array = PointArray.from_points(points)
+        assert_equal(2, len(array))
+        assert_equal(points, array.to_points())
+        assert_equal(points, list(array))
+        assert_equal(Point(3., 4.), array[1])
+        assert_equal([Point(3., 4.)], array[array.x > 2].to_points())
+        assert_equal(0, len(PointArray.from_points([])))
+
+    def test_operators(self):
+        array = PointArray.from_xy([1., 3.], [2., 4.])
+        assert_equal([Point(2., 3.), Point(4., 5.)], (array + 1).to_points())
+        assert_equal([Point(0., -1.), Point(2., 1.)], (array - Point(1, 3)).to_points())
+        assert_equal([Point(1., 4.), Point(9., 16.)], (array * array).to_points())
+        assert_equal([Point(0.5, 1.), Point(1.5, 2.)], (array / 2).to_points())
+        assert_equal([Point(-1., -2.), Point(-3., -4.)], (-array).to_points())
+
+    def test_reflected_operators(self):
+        array = PointArray.from_xy([1., 3.], [2., 4.])
+        assert_equal([Point(2., 3.), Point(4., 5.)], (1 + array).to_points())
+        assert_equal([Point(0., 1.), Point(-2., -1.)], (Point(1, 3) - array).to_points())
+        assert_equal([Point(2., 4.), Point(6., 8.)], (2 * array).to_points())
+        offsets = np.array([[1., 1.], [0., 0.]])
+        assert_equal([Point(0., -1.), Point(-3., -4.)], (offsets - array).to_points())
+
+    @raises(TypeError)
+    def test_invalid_operand(self):
+        PointArray.from_xy([1.], [2.]) + "a"
+
+    def test_transforms(self):
+        array = PointArray.from_xy([1., 2.], [0., 1.])
+        # Clockwise rotation
+        rotated = array.rotate(90)
+        assert_almost_equal(0., rotated.x[0])
+        assert_almost_equal(-1., rotated.y[0])
+        rotated = array.rotate([0, 180], origin=(1., 0.))
+        assert_almost_equal(0., rotated.x[1])
+        assert_almost_equal(-1., rotated.y[1])
+        assert_equal([Point(-1., 0.), Point(-2., 1.)], array.mirror(Mirror.Mirror).to_points())
+        assert_equal([Point(1., 0.), Point(2., -1.)], array.mirror(Mirror.MirrorY).to_points())
+        assert_equal([Point(1., 0.), Point(0., 1.)],
+                     array.mirror([False, True], origin=(1., 0.)).to_points())
+        assert_equal(array.to_points(), array.mirror(Mirror.No).to_points())
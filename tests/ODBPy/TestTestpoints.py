@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from nose.tools import assert_equal, assert_true
+import numpy as np
+from ODBPy.ColumnarNetlist import parse_columnar_netlist
+from ODBPy.NetlistParser import NetSide
+from ODBPy.Testpoints import *
+
+testNetlist = {
+    None: ["H optimize n"],
+    "Nets names": ["$0 GND", "$1 VCC", "$2 SIG", "$3 CLK"],
+    "Netlist points": [
+        # GND: exposed testpoint on both sides, restricted to the solder side
+        "0 0.02 0.0 0.0 B e e staggered 0 0 0 t s",
+        # VCC: top testpoint covered by solder mask, exposed via on the bottom
+        "1 0.02 1.0 0.0 T e c staggered 0 0 0 t",
+        "1 0.01 2.01 0.0 B e e staggered 0 0 0 v",
+        # SIG: midpoint testpoint (not testable) and a forced one
+        "2 0.02 3.0 0.0 T m e staggered 0 0 0 t",
+        "2 0.02 4.0 0.0 T m e staggered 0 0 0 t m",
+        # CLK: two vias, the second one is closer to the grid, a covered one on the grid
+        "3 0.01 5.3 0.0 B e e staggered 0 0 0 v",
+        "3 0.01 7.05 0.0 B e e staggered 0 0 0 v",
+        "3 0.01 8.0 0.0 B e c staggered 0 0 0 v",
+        # Tooling hole
+        "-1 0.05 9.0 0.0 B e e staggered 0 0 0 t",
+    ]
+}
+
+class TestTestpoints(object):
+    def test_probe_access(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        top, bottom = probe_access(netlist)
+        assert_equal([True, False, True, False, True, True, True, False, True], top.tolist())
+        assert_equal([True, False, True, False, False, True, True, False, True], bottom.tolist())
+        top, bottom = accessible_testpoints(netlist)
+        assert_equal([4], np.flatnonzero(top[:-1]).tolist())
+        assert_equal([0], np.flatnonzero(bottom[:-1]).tolist())
+
+    def test_coverage(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        coverage = net_coverage(netlist)
+        assert_equal(["GND", "VCC", "SIG", "CLK"], coverage.names)
+        assert_equal([0, 0, 1, 0], coverage.top.tolist())
+        assert_equal([1, 0, 0, 0], coverage.bottom.tolist())
+        assert_equal(["VCC", "CLK"], [netlist.names[net] for net in coverage.uncovered()])
+        assert_equal(0.5, coverage.fraction())
+        assert_equal(0.25, coverage.fraction(NetSide.Bottom))
+
+    def test_probe_candidates(self):
+        netlist = parse_columnar_netlist(testNetlist)
+        assert_true(np.allclose([0., 0.05, 0.05], grid_distance([1., 1.05, 0.], [2., 2., 0.05], 0.5)))
+        candidates = probe_candidates(netlist, 1.0)
+        assert_equal(["VCC", "CLK"], [netlist.names[net] for net in candidates.net])
+        assert_equal([2, 6], candidates.point.tolist())
+        assert_true(np.allclose([0.01, 0.05], candidates.distance))
@@ -41,3 +41,12 @@ class TestUnits(object):
     @raises(ValueError)
     def test_linerecords_unit_wrongformat(self):
         assert_equal("MM", linerecords_unit({"Units": ["UBAR"]}))
+
+    def test_symbol_unit(self):
+        assert_equal("UM", symbol_unit("MM"))
+        assert_equal("MIL", symbol_unit("INCH"))
+
+    def test_find_unit(self):
+        assert_equal("MM", find_unit(["H optimize n", "UNITS=MM", "$0 GND"]))
+        assert_equal("MM", find_unit(["U MM"]))
+        assert_equal("INCH", find_unit(["H optimize n"]))
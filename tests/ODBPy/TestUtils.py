@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from nose.tools import assert_equal, assert_true, assert_false, raises, assert_is_none
+import hashlib
+import os
+import tempfile
 from ODBPy.Utils import *
 
 class TestUtils(object):
@@ -18,3 +21,15 @@ class TestUtils(object):
         assert_true(not_none(0))
         assert_true(not_none(""))
 
+
+    def test_file_digest(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "features")
+            with open(path, "wb") as outfile:
+                outfile.write(b"P 0 0 0 P 0 8 0\n")
+            assert_equal(hashlib.sha256(b"P 0 0 0 P 0 8 0\n").hexdigest(), file_digest(path))
+            assert_equal(file_digest(path, "md5"), file_digest(path, "md5", chunk_size=3))
+
+    def test_parallel_map(self):
+        assert_equal([1, 8, 9], list(parallel_map(pow, [1, 2, 3], [3, 3, 2], workers=1)))
+        assert_equal([1, 8, 9], list(parallel_map(pow, [1, 2, 3], [3, 3, 2], workers=2)))